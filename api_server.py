@@ -6,15 +6,32 @@
 
 import os
 import json
+import time
+import asyncio
 import logging
 from typing import List, Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
+from openai import AsyncOpenAI
 
-from src.database import RecipeDB
+from src.database import RecipeDB, SEARCH_MODES
 from src.vectorizer import RecipeVectorizer
+from src.openai_clients import OpenAIClientRegistry, set_registry
+from src.search_cache import (
+    SearchResultCache, query_fingerprint, search_fingerprint, encode_cursor, decode_cursor
+)
+from src.vector_index import MmapVectorIndex
+from src.chat_fast_path import ChatFastPath, render_recommendation
+from src.semantic_cache import SemanticAnswerCache
+from src.prompt_builder import PromptBuilder
+from src.session_store import session_store_from_env
+from src.recipe_detail import (
+    format_minutes_korean, format_servings_count_korean, format_duration_korean, format_servings_korean,
+    extract_recipe_filters
+)
 
 # 환경 변수 로드
 load_dotenv('config/.env')
@@ -37,6 +54,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # /search 다음 페이지 커서
 )
 
 # Pydantic 모델들
@@ -46,6 +64,10 @@ class ChatMessage(BaseModel):
     # 사용자 취향 컨트롤: less|normal|more
     spiciness: Optional[str] = "normal"
     saltiness: Optional[str] = "normal"
+    # 구조화 필터 (비우면 메시지에서 "20분 이내", "2인분", 카테고리명 인식)
+    max_minutes: Optional[int] = None
+    servings: Optional[int] = None
+    category: Optional[str] = None
 
 class RecipeResponse(BaseModel):
     id: int
@@ -81,77 +103,45 @@ class UserPrefs(BaseModel):
 # 전역 변수
 db = None
 vectorizer = None
-# 간단한 인메모리 대화 내역 저장소 (프로덕션은 Redis/DB 권장)
-chat_histories: dict[str, list[dict[str, str]]] = {}
-# 간단한 인메모리 사용자 취향 저장소
-user_prefs: dict[str, dict[str, str]] = {}
+# 앱 단위 OpenAI 클라이언트 레지스트리 (HTTP 커넥션 풀 공유, startup에서 생성)
+openai_registry: Optional[OpenAIClientRegistry] = None
+# 채팅/번역용 공유 비동기 OpenAI 클라이언트
+openai_client: Optional[AsyncOpenAI] = None
+# 데이터셋 버전 기반 검색 결과 캐시
+search_cache = SearchResultCache.from_env()
+# 인프로세스 mmap 벡터 인덱스 (VECTOR_SEARCH_BACKEND=mmap, 최신이 아니면 Postgres로 검색)
+vector_index = MmapVectorIndex.from_env() if os.getenv('VECTOR_SEARCH_BACKEND', 'postgres') == 'mmap' else None
+# 기본 검색 모드 (vector | hybrid, hybrid는 db/migrations/006 적용 후 선택)
+SEARCH_MODE = os.getenv('SEARCH_MODE', 'vector')
+# 채팅 템플릿 빠른 경로 (검색 결과가 확실하거나 LLM 예산/SLO 초과 시 GPT 생략)
+chat_fast_path = ChatFastPath.from_env()
+# 채팅 의미 기반 답변 캐시 (비슷한 질문 + 같은 취향/검색 결과면 GPT 답변 재사용)
+semantic_cache = SemanticAnswerCache.from_env()
+# 채팅 프롬프트 조립기 (토큰 예산, 대화 내역 압축)
+prompt_builder = PromptBuilder.from_env()
+# 채팅 메시지에서 인식할 레시피 카테고리 (startup에서 DB 값으로 채움)
+recipe_categories: list[str] = []
+# 채팅 세션 저장소 (사용자별 대화 내역 + 취향, CHAT_SESSION_BACKEND=memory|postgres, startup에서 생성)
+# 대화 내역: [요약 항목] + 최근 메시지 (어시스턴트는 추천 레시피 id/제목만, PromptBuilder.append_turn)
+session_store = None
 translate_cache: dict[str, str] = {}
 
 # -------- 유틸 함수들 --------
-def format_duration_korean(value: Optional[str]) -> str:
-    if not value:
-        return "미정"
-    s = str(value)
-    # ISO8601 like PT30M, PT1H30M, PT45S
-    if s.startswith('PT'):
-        hours = minutes = seconds = 0
-        cur = s[2:]
-        num = ''
-        for ch in cur:
-            if ch.isdigit():
-                num += ch
-            else:
-                if ch == 'H':
-                    hours = int(num or 0)
-                elif ch == 'M':
-                    minutes = int(num or 0)
-                elif ch == 'S':
-                    seconds = int(num or 0)
-                num = ''
-        parts = []
-        if hours:
-            parts.append(f"{hours}시간")
-        if minutes:
-            parts.append(f"{minutes}분")
-        if seconds and not parts:
-            parts.append(f"{seconds}초")
-        return ' '.join(parts) or "미정"
-    # already like '30분'
-    if any(u in s for u in ['분', '시간', '초']):
-        return s
-    # plain number treat as minutes
-    try:
-        n = int(''.join([c for c in s if c.isdigit()]))
-        if n:
-            return f"{n}분"
-    except Exception:
-        pass
-    return s
-
-def format_servings_korean(value: Optional[str]) -> str:
-    if not value:
-        return "미정"
-    s = str(value)
-    # e.g., '4 servings', '2인분'
-    digits = ''.join([c for c in s if c.isdigit()])
-    if digits:
-        return f"{int(digits)}인분"
-    return s
-
-def translate_to_korean(openai_client, text: Optional[str]) -> str:
+async def translate_to_korean(text: Optional[str]) -> str:
     if not text:
         return ""
     if text in translate_cache:
         return translate_cache[text]
     try:
-        resp = openai_client.chat.completions.create(
+        resp = await openai_client.chat.completions.create(
             model=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
             messages=[
                 {"role": "system", "content": "Translate the following to natural Korean. Reply with Korean text only."},
                 {"role": "user", "content": text}
             ],
             max_tokens=80,
-            temperature=0.2
+            temperature=0.2,
+            timeout=openai_registry.timeout('translation')
         )
         ko = (resp.choices[0].message.content or '').strip()
         translate_cache[text] = ko
@@ -159,67 +149,170 @@ def translate_to_korean(openai_client, text: Optional[str]) -> str:
     except Exception:
         return text or ""
 
-def classify_ingredient(name: str) -> str:
-    text = (name or '').lower()
-    seasoning_kw = [
-        '간장','고추장','된장','소금','설탕','후추','식용유','참기름','고춧가루','다진 마늘','마늘','양념','청주','미림','식초','버터','올리브유','우스터','소스','후춧가루','설탕','꿀','고추기름','된장','쌈장','파우더','조미료'
-    ]
-    main_kw = [
-        '닭','소고기','돼지고기','쇠고기','양고기','생선','새우','오징어','문어','두부','두유','베이컨','햄','계란','달걀','면','파스타','밥','쌀','감자','고구마','버섯','두껍','스테이크'
-    ]
-    if any(k in text for k in seasoning_kw):
-        return 'seasoning'
-    if any(k in text for k in main_kw):
-        return 'main'
-    return 'sub'
-
-def split_ingredients_kor(ings: list[str]) -> dict:
-    result = {'main': [], 'sub': [], 'seasoning': []}
-    for ing in ings:
-        cat = classify_ingredient(ing)
-        result[cat].append(ing)
-    return result
-
-def group_steps_kor(steps: list[str]) -> list[tuple[str, list[str]]]:
-    groups: list[tuple[str, list[str]]] = []
-    buckets = {
-        '준비': [],
-        '볶기/굽기': [],
-        '끓이기/조림': [],
-        '마무리': []
-    }
-    for s in steps:
-        t = s.lower()
-        if any(k in t for k in ['손질','썰','자르','씻','준비','해동','다지']):
-            buckets['준비'].append(s)
-        elif any(k in t for k in ['볶','굽','부침','지지','볶아','팬','프라이팬']):
-            buckets['볶기/굽기'].append(s)
-        elif any(k in t for k in ['끓','조리','졸','끓이','煮']):
-            buckets['끓이기/조림'].append(s)
-        elif any(k in t for k in ['완성','담','섞','간','추가','서빙']):
-            buckets['마무리'].append(s)
+async def ensure_korean_title(title_kr: Optional[str], title_en: Optional[str]) -> str:
+    """한국어 제목이 없으면 영어 제목을 번역해서 반환"""
+    if not title_kr and title_en:
+        return await translate_to_korean(title_en)
+    return title_kr or ""
+
+def document_to_row(doc: dict, similarity: float) -> tuple:
+    """레시피 문서 → 검색 결과 행 (id, title, title_en, description_en, cooking_time, servings, similarity,
+    cooking_minutes, servings_count)"""
+    return (
+        doc['id'], doc.get('title'), doc.get('title_en'), doc.get('description_en'),
+        doc.get('cooking_time'), doc.get('servings'), similarity,
+        doc.get('cooking_minutes'), doc.get('servings_count')
+    )
+
+async def cached_vector_search(query_text: str, limit: int, min_similarity: float,
+                               search_params: Optional[dict] = None, mode: Optional[str] = None,
+                               lexical_text: Optional[str] = None,
+                               filters: Optional[dict] = None,
+                               after: Optional[tuple] = None,
+                               query_vector: Optional[list] = None) -> list[tuple]:
+    """
+    검색 결과 캐시를 거치는 벡터 / 하이브리드 검색
+    
+    캐시 적중 시 임베딩/벡터 스캔 없이 id 조회만 수행한다.
+    Args:
+        search_params: ANN 탐색 파라미터 {'probes', 'ef_search'} (None이면 기본 품질 단계)
+        mode: vector | hybrid (None이면 SEARCH_MODE)
+        lexical_text: 하이브리드 어휘 매칭용 원문 (None이면 query_text)
+        filters: 구조화 필터 {'max_minutes', 'servings', 'category'} (검색 쿼리 안에서 적용)
+        after: 이전 페이지 마지막 (similarity, id) - 벡터 모드 keyset 페이지 (Postgres로 검색, mmap 스냅샷 건너뜀)
+        query_vector: 호출 측이 이미 계산한 query_text 임베딩 (None이면 캐시 미스 시 계산)
+    Returns:
+        (id, title, title_en, description_en, cooking_time, servings, similarity,
+         cooking_minutes, servings_count) 리스트
+    """
+    search_params = search_params or db.search_params()
+    mode = mode or SEARCH_MODE
+    hybrid = mode == 'hybrid'
+    lexical_text = (lexical_text if lexical_text is not None else query_text) if hybrid else None
+    key = search_cache.make_key(
+        query_fingerprint(query_text, vectorizer.model_name), limit, min_similarity,
+        {**search_params, **(filters or {}), 'mode': mode, 'lexical': lexical_text,
+         'after': after}
+    )
+    async with db.acquire_async() as cur:
+        if search_cache.needs_version_check():
+            search_cache.observe_version(await cur.run(db.get_dataset_version))
+        ranked = search_cache.get(key)
+        if ranked is not None:
+            # 레시피 문서 일괄 조회 (카드에 필요 없는 재료/단계는 제외)
+            docs = await cur.run(
+                db.get_recipes_by_ids, [rid for rid, _ in ranked],
+                exclude=['ingredients', 'cooking_steps']
+            )
+            docs_by_id = {doc['id']: doc for doc in docs}
+            return [
+                document_to_row(docs_by_id[rid], sim)
+                for rid, sim in ranked if rid in docs_by_id
+            ]
+    
+    if query_vector is None:
+        query_vector = await vectorizer.avectorize_query(query_text)
+    
+    if hybrid:
+        # 어휘 후보와 벡터 후보를 SQL 한 번에 RRF로 합침 (mmap 인덱스는 벡터 모드 전용)
+        async with db.acquire_async() as cur:
+            rows = await cur.run(
+                db.hybrid_search, query_vector, lexical_text, limit, min_similarity,
+                filters=filters, **search_params
+            )
+        search_cache.put(key, [(row[0], row[6]) for row in rows])
+        return rows
+    
+    # 필터 검색은 Postgres 인덱스 쿼리로 (mmap 스냅샷에는 필터 컬럼이 없음)
+    if vector_index is not None and not filters and after is None:
+        # 스냅샷 하나를 잡고 끝까지 사용 (백그라운드 갱신이 도중에 바꿔도 버전이 섞이지 않음)
+        snapshot = vector_index.fresh_snapshot(search_cache.version)
+        if snapshot is not None:
+            # 인프로세스 top-k (Postgres는 문서 조회만)
+            rerank = snapshot.needs_rerank
+            if rerank:
+                # 양자화 코드로 후보를 넓게 뽑고 원본 임베딩으로 정확히 재정렬
+                ranked = await asyncio.to_thread(
+                    vector_index.search, query_vector, limit * vector_index.rerank_factor, -1.0, snapshot
+                )
+            else:
+                ranked = await asyncio.to_thread(
+                    vector_index.search, query_vector, limit, min_similarity, snapshot
+                )
+            if ranked is not None:
+                async with db.acquire_async() as cur:
+                    if rerank:
+                        ranked = await cur.run(
+                            db.rerank_by_ids, query_vector, [rid for rid, _ in ranked], limit, min_similarity
+                        )
+                    docs = await cur.run(
+                        db.get_recipes_by_ids, [rid for rid, _ in ranked],
+                        exclude=['ingredients', 'cooking_steps']
+                    )
+                docs_by_id = {doc['id']: doc for doc in docs}
+                search_cache.put(key, ranked)
+                return [
+                    document_to_row(docs_by_id[rid], sim)
+                    for rid, sim in ranked if rid in docs_by_id
+                ]
         else:
-            buckets['마무리'].append(s)
-    for k in ['준비','볶기/굽기','끓이기/조림','마무리']:
-        if buckets[k]:
-            groups.append((k, buckets[k]))
-    return groups
+            # 스냅샷 갱신은 백그라운드에서, 이번 요청은 Postgres로
+            vector_index.refresh_async(db, search_cache.version)
+    
+    async with db.acquire_async() as cur:
+        rows = await cur.run(
+            db.search_similar, query_vector, limit, min_similarity,
+            filters=filters, after=after, **search_params
+        )
+    search_cache.put(key, [(row[0], row[6]) for row in rows])
+    return rows
 
 @app.on_event("startup")
 async def startup_event():
     """서버 시작 시 DB 연결 및 벡터화 모델 로드"""
-    global db, vectorizer
+    global db, vectorizer, openai_client, openai_registry, session_store, SEARCH_MODE
     
     try:
         # DB 연결
         db_name = os.getenv('DB_NAME', 'recipe_ai_db')
         db_user = os.getenv('DB_USER', 'recipe_keep')
         db = RecipeDB(db_name, db_user)
-        db.connect()
+        # 요청마다 독립 커넥션을 쓰도록 풀 모드로 연결 (DB_POOL_MIN/MAX/TIMEOUT)
+        db.connect_pool()
+        
+        # 채팅 세션 저장소 (postgres면 워커 간 공유, db/migrations/008_chat_sessions.sql)
+        session_store = session_store_from_env(db)
+        
+        # OpenAI 클라이언트 레지스트리 (벡터화/채팅/번역이 같은 HTTP 풀 공유)
+        openai_registry = OpenAIClientRegistry.from_env()
+        set_registry(openai_registry)
         
         # 벡터화 모델 로드
         use_openai = os.getenv('USE_OPENAI_EMBEDDINGS', 'true').lower() == 'true'
-        vectorizer = RecipeVectorizer(use_openai=use_openai)
+        vectorizer = RecipeVectorizer(use_openai=use_openai, clients=openai_registry)
+        
+        # 채팅/번역용 비동기 클라이언트
+        openai_client = openai_registry.async_client()
+        
+        # 다른 워커(또는 vector_index.py snapshot)가 만든 스냅샷이 있으면 바로 사용
+        if vector_index is not None:
+            vector_index.load()
+        
+        # 채팅 필터용 카테고리 목록
+        try:
+            with db.pooled_cursor() as cur:
+                recipe_categories[:] = db.list_categories(cursor=cur)
+        except Exception as e:
+            logger.warning(f"⚠️  카테고리 목록 로드 실패 (db/migrations/007_recipe_filters.sql 확인): {e}")
+        
+        # 커서 페이지 검색 방식 결정 (pgvector 0.8+ 반복 스캔 / 미만이면 정확 검색)
+        with db.pooled_cursor() as cur:
+            db.supports_iterative_scan(cursor=cur)
+            # 006 미적용이면 기본 모드를 vector로 (채팅 키워드 확장 유지, 요청마다 대체 경로를 타지 않음)
+            if SEARCH_MODE == 'hybrid' and not db.has_hybrid_search(cursor=cur):
+                logger.warning("⚠️  SEARCH_MODE=hybrid but db/migrations/006_hybrid_search.sql is not applied "
+                               "→ default search mode: vector")
+                SEARCH_MODE = 'vector'
         
         logger.info("✅ 서버 시작 완료")
         
@@ -230,6 +323,10 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """서버 종료 시 DB 연결 해제"""
+    if openai_registry:
+        await openai_registry.aclose()
+    if vectorizer:
+        vectorizer.query_cache.close()
     if db:
         db.close()
     logger.info("✅ 서버 종료")
@@ -243,70 +340,110 @@ async def root():
 async def health_check():
     """상세 헬스 체크"""
     try:
-        # 독립 연결로 헬스 체크 (기존 커넥션의 aborted 상태 영향 제거)
-        import os as _os
-        import psycopg2 as _psycopg2
-        tmp_conn = None
-        tmp_cur = None
-        try:
-            dsn = _os.getenv('DATABASE_URL')
-            if dsn:
-                tmp_conn = _psycopg2.connect(dsn)
-            else:
-                tmp_conn = _psycopg2.connect(
-                    host=_os.getenv('DB_HOST', 'localhost'),
-                    database=_os.getenv('DB_NAME', 'recipe_ai_db'),
-                    user=_os.getenv('DB_USER', 'recipe_keep'),
-                    password=_os.getenv('DB_PASSWORD', '')
-                )
-            tmp_conn.autocommit = True
-            tmp_cur = tmp_conn.cursor()
-            tmp_cur.execute("SELECT COUNT(*) FROM recipes")
-            recipe_count = tmp_cur.fetchone()[0]
-        finally:
-            if tmp_cur:
-                tmp_cur.close()
-            if tmp_conn:
-                tmp_conn.close()
+        # 풀에서 독립 커넥션을 빌려 헬스 체크 (다른 요청의 트랜잭션 상태 영향 없음)
+        async with db.acquire_async() as cur:
+            await cur.execute("SELECT COUNT(*) FROM recipes")
+            recipe_count = (await cur.fetchone())[0]
         
         return {
             "status": "healthy",
             "database": "connected",
             "total_recipes": recipe_count,
-            "vectorizer": "loaded"
+            "vectorizer": "loaded",
+            "db_pool": db.pool_stats()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
+@app.get("/stats")
+async def get_stats():
+    """런타임 통계 (DB 커넥션 풀, OpenAI HTTP 풀, 임베딩 캐시 등)"""
+    return {
+        "db_pool": db.pool_stats() if db else {"enabled": False},
+        "openai": openai_registry.stats() if openai_registry else {},
+        "embedding_cache": vectorizer.query_cache.stats() if vectorizer else {},
+        "search_cache": search_cache.stats(),
+        "vector_index": vector_index.stats() if vector_index else {"enabled": False},
+        "chat_fast_path": chat_fast_path.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "chat_prompt": prompt_builder.stats(),
+        "chat_sessions": session_store.stats() if session_store else {}
+    }
+
 @app.post("/search", response_model=List[RecipeResponse])
 async def search_recipes(
+    response: Response,
     query: str,
     limit: int = 5,
-    min_similarity: float = 0.0
+    min_similarity: float = 0.0,
+    quality: Optional[str] = None,
+    probes: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    mode: Optional[str] = None,
+    max_minutes: Optional[int] = None,
+    servings: Optional[int] = None,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None
 ):
-    """벡터 검색으로 레시피 찾기"""
+    """
+    레시피 검색 (quality: fast / balanced / accurate, probes·ef_search로 직접 지정 가능)
+    
+    mode: vector (임베딩만) | hybrid (제목/재료명 어휘 매칭 + 임베딩, 기본값 SEARCH_MODE)
+    max_minutes / servings / category: 조리시간 이내, 인분, 카테고리 필터 (인덱스 쿼리 안에서 적용)
+    cursor: 이전 응답의 X-Next-Cursor 헤더 값 - 다음 페이지 (vector 모드만, OFFSET 없이 이어가지만
+            인덱스가 앞 페이지 후보를 다시 훑으므로 깊은 페이지일수록 느려짐)
+            hybrid 모드는 커서를 만들지 않고 X-Pagination: unsupported 헤더로 알림
+            (RRF 순위는 제한된 후보 목록 안에서만 정해져 이어서 볼 기준이 없음)
+    """
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
     try:
-        # 쿼리를 벡터로 변환
-        query_vector = vectorizer.vectorize(query)
-        
-        # 벡터 검색
-        db.cursor.execute("""
-            SELECT 
-                id, 
-                title, 
-                title_en, 
-                description_en,
-                cooking_time,
-                servings,
-                1 - (embedding <=> %s::vector) as similarity
-            FROM recipes
-            WHERE embedding IS NOT NULL
-              AND 1 - (embedding <=> %s::vector) >= %s
-            ORDER BY embedding <=> %s::vector
-            LIMIT %s
-        """, (query_vector, query_vector, min_similarity, query_vector, limit))
-        
-        results = db.cursor.fetchall()
+        search_params = db.search_params(quality, probes, ef_search)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if mode is not None and mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown search mode '{mode}' (choose from {list(SEARCH_MODES)})")
+    mode = mode or SEARCH_MODE
+    filters = {
+        key: value for key, value in
+        (('max_minutes', max_minutes), ('servings', servings), ('category', category))
+        if value is not None
+    }
+    
+    # 커서는 같은 쿼리/필터/파라미터의 벡터 검색에서만 유효 (limit은 페이지마다 바꿀 수 있음)
+    pageable = mode == 'vector'
+    fingerprint = search_fingerprint(search_cache.make_key(
+        query_fingerprint(query, vectorizer.model_name), limit, min_similarity, {**search_params, **filters}
+    ))
+    after = None
+    if cursor:
+        if not pageable:
+            raise HTTPException(status_code=400, detail="Cursor pagination requires mode=vector "
+                                                        "(hybrid ranks a bounded candidate set)")
+        try:
+            after = decode_cursor(cursor, fingerprint)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # 쿼리 벡터화(쿼리 임베딩 캐시) + 검색 (검색 결과 캐시 우선)
+        results = await cached_vector_search(
+            query, limit, min_similarity, search_params, mode,
+            filters=filters, after=after
+        )
+        if not pageable:
+            response.headers['X-Pagination'] = 'unsupported; mode=hybrid (use mode=vector for X-Next-Cursor)'
+        elif results and len(results) == limit:
+            last = results[-1]
+            similarity = last[6]
+            if after is None:
+                # 첫 페이지는 mmap 스냅샷 결과일 수 있음 → 커서 유사도는 다음 페이지 SQL과 같은 식으로 (PK 1건)
+                query_vector = await vectorizer.avectorize_query(query)
+                async with db.acquire_async() as cur:
+                    exact = await cur.run(db.rerank_by_ids, query_vector, [last[0]], 1, -1.0)
+                if exact:
+                    similarity = exact[0][1]
+            response.headers['X-Next-Cursor'] = encode_cursor(similarity, last[0], fingerprint)
         
         return [
             RecipeResponse(
@@ -327,136 +464,23 @@ async def search_recipes(
 
 @app.get("/recipe/{recipe_id}", response_model=RecipeDetail)
 async def get_recipe_detail(recipe_id: int):
-    """레시피 상세 정보 조회 (한국어로 번역)"""
+    """레시피 상세 정보 조회 (미리 생성된 한국어 상세 문서 제공, LLM 호출 없음)"""
     try:
-        from openai import OpenAI
-        openai_client = OpenAI()
-        
-        # 레시피 기본 정보
-        db.cursor.execute("""
-            SELECT id, title, title_en, description_en, cooking_time, servings
-            FROM recipes WHERE id = %s
-        """, (recipe_id,))
+        async with db.acquire_async() as cur:
+            detail = await cur.run(db.get_recipe_detail, recipe_id)
         
-        recipe = db.cursor.fetchone()
-        if not recipe:
+        if not detail:
             raise HTTPException(status_code=404, detail="Recipe not found")
         
-        # 재료 정보
-        db.cursor.execute("""
-            SELECT name_en FROM ingredients WHERE recipe_id = %s ORDER BY id
-        """, (recipe_id,))
-        ingredients_en = [row[0] for row in db.cursor.fetchall() if row[0]]
-        
-        # 조리 단계
-        db.cursor.execute("""
-            SELECT description_en FROM cooking_steps 
-            WHERE recipe_id = %s ORDER BY step_number
-        """, (recipe_id,))
-        cooking_steps_en = [row[0] for row in db.cursor.fetchall() if row[0]]
-        
-        # GPT로 한국어 번역 (평문으로 깔끔하게)
-        if ingredients_en or cooking_steps_en:
-            translate_prompt = f"""
-다음 레시피 정보를 한국어로 번역해주세요. 
-- 개인적인 표현(~!, ^^, 감탄사 등) 제거
-- 평문으로 간결하고 명확하게 번역
-- 요리 설명서 스타일로 작성
-
-재료 (영어): {ingredients_en}
-조리 단계 (영어): {cooking_steps_en}
-
-응답 형식:
-{{
-  "ingredients": ["한국어 재료1", "한국어 재료2", ...],
-  "cooking_steps": ["한국어 단계1", "한국어 단계2", ...]
-}}
-"""
-            
-            try:
-                response = openai_client.chat.completions.create(
-                    model=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
-                    messages=[
-                        {"role": "system", "content": "당신은 요리 번역 전문가입니다. 정확하고 자연스러운 한국어로 번역해주세요."},
-                        {"role": "user", "content": translate_prompt}
-                    ],
-                    max_tokens=1000,
-                    temperature=0.3
-                )
-                
-                import json
-                translated = json.loads(response.choices[0].message.content)
-                ingredients = translated.get("ingredients", ingredients_en)
-                cooking_steps = translated.get("cooking_steps", cooking_steps_en)
-            except:
-                # 번역 실패 시 원본 사용
-                ingredients = ingredients_en
-                cooking_steps = cooking_steps_en
-        else:
-            ingredients = ingredients_en
-            cooking_steps = cooking_steps_en
-        
-        # 채팅식 레시피 설명 생성
-        # 한국어 제목/시간/인분 정규화
-        title_kr = recipe[1]
-        title_en = recipe[2]
-        # 한국어 제목이 없으면 즉시 번역 사용
-        if not title_kr and title_en:
-            title_kr = translate_to_korean(openai_client, title_en)
-        title_display = title_kr or title_en
-        time_kr = format_duration_korean(recipe[4])
-        servings_kr = format_servings_korean(recipe[5])
-
-        # 재료 분류 및 단계 그룹화
-        ing_split = split_ingredients_kor(ingredients)
-        step_groups = group_steps_kor(cooking_steps)
-
-        # 마크다운 구성
-        md_lines = []
-        md_lines.append(f"🍳 **{title_display}** 레시피를 알려드릴게요!")
-        md_lines.append("")
-        md_lines.append(f"⏰ **조리시간**: {time_kr}")
-        md_lines.append(f"👥 **인분**: {servings_kr}")
-        md_lines.append("")
-        md_lines.append("🥘 **재료**")
-        if ing_split['main']:
-            md_lines.append("- **주재료**:")
-            md_lines += [f"  - {x}" for x in ing_split['main']]
-        if ing_split['sub']:
-            md_lines.append("- **부재료**:")
-            md_lines += [f"  - {x}" for x in ing_split['sub']]
-        if ing_split['seasoning']:
-            md_lines.append("- **양념**:")
-            md_lines += [f"  - {x}" for x in ing_split['seasoning']]
-        if not any(ing_split.values()):
-            md_lines.append("- 재료 정보 없음")
-        md_lines.append("")
-        md_lines.append("👨‍🍳 **조리 단계**")
-        if step_groups:
-            for group_title, steps_list in step_groups:
-                md_lines.append(f"- **{group_title}**")
-                for idx, st in enumerate(steps_list, 1):
-                    md_lines.append(f"  {idx}. {st}")
-        else:
-            if cooking_steps:
-                for idx, st in enumerate(cooking_steps, 1):
-                    md_lines.append(f"{idx}. {st}")
-            else:
-                md_lines.append("- 조리 방법 정보 없음")
-        md_lines.append("")
-        md_lines.append("맛있게 만들어보세요! 😊")
-
-        chat_style_recipe = "\n".join(md_lines)
-
         return RecipeDetail(
-            id=recipe[0],
-            title=recipe[1],
-            title_en=recipe[2],
-            description_en=chat_style_recipe,  # 채팅식 설명으로 변경
-            cooking_time=str(recipe[4]) if recipe[4] else "미정",
-            servings=str(recipe[5]) if recipe[5] else "미정",
-            ingredients=ingredients,
-            cooking_steps=cooking_steps
+            id=detail['id'],
+            title=detail['title'],
+            title_en=detail['title_en'] or "",
+            description_en=detail['markdown'],  # 채팅식 설명
+            cooking_time=str(detail['cooking_time']) if detail['cooking_time'] else "미정",
+            servings=str(detail['servings']) if detail['servings'] else "미정",
+            ingredients=detail['ingredients'],
+            cooking_steps=detail['cooking_steps']
         )
         
     except HTTPException:
@@ -465,187 +489,378 @@ async def get_recipe_detail(recipe_id: int):
         logger.error(f"레시피 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get recipe: {str(e)}")
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat_with_ai(chat_message: ChatMessage):
-    """AI 채팅 - 레시피 추천"""
-    try:
-        from openai import OpenAI
-        
-        # OpenAI 클라이언트 초기화
-        openai_client = OpenAI()
-        
-        # 1. 사용자 메시지를 명확한 검색 쿼리로 변환
-        # "소고기 레시피" → "beef recipe"로 강화
-        user_query = chat_message.message
-        
-        # 한국어 재료명을 영어로 키워드 확장
-        ingredient_keywords = {
-            '소고기': 'beef beef meat beef recipe',
-            '돼지고기': 'pork pork meat pork recipe',
-            '닭고기': 'chicken chicken meat chicken recipe',
-            '생선': 'fish seafood fish recipe',
-            '새우': 'shrimp seafood shrimp recipe',
-            '연어': 'salmon fish seafood salmon recipe',
-            '오징어': 'squid seafood squid recipe',
-            '두부': 'tofu tofu recipe',
-            '버섯': 'mushroom mushroom recipe',
-            '파스타': 'pasta pasta recipe',
-            '볶음밥': 'fried rice fried rice recipe',
-            '떡볶이': 'rice cake rice cake recipe',
-            '볶음': 'stir-fry stir fry recipe',
-            '구이': 'grilled grill recipe',
-            '조림': 'braised braised recipe',
-            '찜': 'steamed steam recipe',
-            '국': 'soup soup recipe',
-            '찌개': 'stew stew recipe',
-            '전': 'pancake pancake recipe',
-            '무침': 'salad salad recipe'
-        }
-        
-        # 한국어 키워드 추가
-        enhanced_query = user_query
-        for korean, english in ingredient_keywords.items():
+# 한국어 재료명을 영어로 키워드 확장 (vector 모드 전용)
+CHAT_INGREDIENT_KEYWORDS = {
+    '소고기': 'beef beef meat beef recipe',
+    '돼지고기': 'pork pork meat pork recipe',
+    '닭고기': 'chicken chicken meat chicken recipe',
+    '생선': 'fish seafood fish recipe',
+    '새우': 'shrimp seafood shrimp recipe',
+    '연어': 'salmon fish seafood salmon recipe',
+    '오징어': 'squid seafood squid recipe',
+    '두부': 'tofu tofu recipe',
+    '버섯': 'mushroom mushroom recipe',
+    '파스타': 'pasta pasta recipe',
+    '볶음밥': 'fried rice fried rice recipe',
+    '떡볶이': 'rice cake rice cake recipe',
+    '볶음': 'stir-fry stir fry recipe',
+    '구이': 'grilled grill recipe',
+    '조림': 'braised braised recipe',
+    '찜': 'steamed steam recipe',
+    '국': 'soup soup recipe',
+    '찌개': 'stew stew recipe',
+    '전': 'pancake pancake recipe',
+    '무침': 'salad salad recipe'
+}
+CHAT_NOT_FOUND_MESSAGE = "죄송해요, 관련 레시피를 찾을 수 없어요. 다른 재료나 요리법으로 다시 말씀해 주세요!"
+CHAT_NOT_FOUND_SUGGESTIONS = ["닭고기 요리", "간단한 파스타", "한국 전통 요리", "건강한 샐러드"]
+CHAT_SUGGESTIONS = ["더 많은 닭고기 요리", "간단한 요리", "건강한 요리", "한국 전통 요리"]
+CHAT_MARKDOWN_HEADER = """🍽️ 추천 레시피\n\n**아래에서 원하는 레시피를 선택해 주세요. (1~3번)**\n\n"""
+# 요청마다 바뀌지 않는 지시문은 전부 시스템 프롬프트에 (프롬프트 캐시 접두사)
+CHAT_SYSTEM_PROMPT = (
+    "당신은 친근한 한국어 레시피 챗봇입니다."
+    " 항상 한국어로만 답변하세요."
+    " 답변은 마크다운으로 구성하고, 섹션 제목(아이콘 포함), 목록, 단계 나열을 사용하세요."
+    " 사용자의 취향(맵기/짜기)을 반영하여 우선순위를 조정하세요.\n"
+    "사용자 메시지에는 이전 대화 요약, 최근 대화, 데이터베이스에서 찾은 관련 레시피, 사용자 취향과 요청이 주어집니다."
+    " 사용자의 요청과 취향을 반영해 1~3개의 레시피를 추천하고,"
+    " 각 레시피의 조리시간/인분/간단한 특징을 1-2문장으로 요약하세요."
+    " 마지막 줄에는 '원하시면 1번/2번/3번 중에 선택해 주세요.'라고 안내하세요."
+)
+
+
+def chat_search_query(chat_message: ChatMessage) -> str:
+    """채팅 메시지 → 임베딩할 검색 쿼리 (키워드 확장 + 취향 문구)"""
+    user_query = chat_message.message
+    
+    # 한국어 키워드 추가 (하이브리드 모드는 한국어 제목/재료명을 직접 매칭하므로 생략)
+    # "소고기 레시피" → "beef recipe"로 강화
+    enhanced_query = user_query
+    if SEARCH_MODE != 'hybrid':
+        for korean, english in CHAT_INGREDIENT_KEYWORDS.items():
             if korean in user_query:
                 enhanced_query += f" {english}"
-        
-        # 취향 정보 추가
-        pref_text = (
-            f"Preferences: spiciness={chat_message.spiciness}, "
-            f"saltiness={chat_message.saltiness}."
+    
+    # 취향 정보 추가
+    pref_text = (
+        f"Preferences: spiciness={chat_message.spiciness}, "
+        f"saltiness={chat_message.saltiness}."
+    )
+    return f"{enhanced_query}\n{pref_text}"
+
+
+async def retrieve_chat_recipes(chat_message: ChatMessage) -> tuple:
+    """
+    채팅 1단계: 메시지 → 검색 → 추천 후보 레시피 정보 (최대 5개, 없으면 빈 리스트)
+    
+    Returns:
+        (추천 후보, 검색 쿼리 임베딩) - 임베딩은 의미 캐시 조회에 그대로 재사용
+    """
+    user_query = chat_message.message
+    augmented_query = chat_search_query(chat_message)
+    # 검색 결과 캐시 적중이어도 의미 캐시에 필요하므로 먼저 한 번만 임베딩
+    query_vector = await vectorizer.avectorize_query(augmented_query)
+    # 구조화 필터: 요청 필드 우선, 없으면 메시지에서 인식
+    explicit_filters = {
+        key: value for key, value in (
+            ('max_minutes', chat_message.max_minutes),
+            ('servings', chat_message.servings),
+            ('category', chat_message.category)
+        ) if value is not None
+    }
+    filters = {**extract_recipe_filters(user_query, recipe_categories), **explicit_filters}
+    search_results = await cached_vector_search(
+        augmented_query, 10, 0.0, lexical_text=user_query, filters=filters, query_vector=query_vector
+    )
+    if not search_results and filters != explicit_filters:
+        # 메시지에서 인식한 필터는 추정이므로 결과가 없으면 빼고 다시 검색 (요청 필드는 그대로 유지)
+        logger.info(f"🔎 메시지 인식 필터 {filters} 결과 없음 → 요청 필드만으로 재검색")
+        search_results = await cached_vector_search(
+            augmented_query, 10, 0.0, lexical_text=user_query, filters=explicit_filters, query_vector=query_vector
         )
-        augmented_query = f"{enhanced_query}\n{pref_text}"
-        query_vector = vectorizer.vectorize(augmented_query)
-        
-        db.cursor.execute("""
-            SELECT 
-                id, title, title_en, description_en, cooking_time, servings,
-                1 - (embedding <=> %s::vector) as similarity
-            FROM recipes
-            WHERE embedding IS NOT NULL
-              AND 1 - (embedding <=> %s::vector) >= 0.0
-            ORDER BY embedding <=> %s::vector
-            LIMIT 10
-        """, (query_vector, query_vector, query_vector))
-        
-        search_results = db.cursor.fetchall()
-        
-        if not search_results:
-            return ChatResponse(
-                message="죄송해요, 관련 레시피를 찾을 수 없어요. 다른 재료나 요리법으로 다시 말씀해 주세요!",
-                recipes=[],
-                suggestions=["닭고기 요리", "간단한 파스타", "한국 전통 요리", "건강한 샐러드"]
-            )
-        
-        # 2. 유사도가 높은 레시피만 필터링 (0.1 이상)
-        filtered_results = [row for row in search_results if row[6] >= 0.1]
-        
-        # 3. 레시피 정보를 GPT에게 전달하여 추천 메시지 생성
-        recipes_info = []
-        for row in filtered_results[:5]:  # 최대 5개만
-            # 제목 한국어 보정: 없으면 OpenAI로 즉시 번역
-            title_kr = row[1] or ""
-            title_en = row[2] or ""
-            if not title_kr and title_en:
-                title_kr = translate_to_korean(openai_client, title_en)
-            recipes_info.append({
-                "id": row[0],
-                "title": title_kr or title_en,
-                "title_en": title_en,
-                "description": row[3] or "",
-                "cooking_time": str(row[4]) if row[4] else "미정",
-                "servings": str(row[5]) if row[5] else "미정",
-                "similarity": row[6]
-            })
-        
-        # 필터링 후 레시피가 없으면
-        if not recipes_info:
-            return ChatResponse(
-                message="죄송해요, 관련 레시피를 찾을 수 없어요. 다른 재료나 요리법으로 다시 말씀해 주세요!",
-                recipes=[],
-                suggestions=["닭고기 요리", "간단한 파스타", "한국 전통 요리", "건강한 샐러드"]
-            )
-        
-        # GPT 프롬프트
-        system_prompt = (
-            "당신은 친근한 한국어 레시피 챗봇입니다."
-            " 항상 한국어로만 답변하세요."
-            " 답변은 마크다운으로 구성하고, 섹션 제목(아이콘 포함), 목록, 단계 나열을 사용하세요."
-            " 사용자의 취향(맵기/짜기)을 반영하여 우선순위를 조정하세요."
+    
+    # 유사도가 높은 레시피만 (0.1 이상, 최대 5개)
+    top_results = [row for row in search_results if row[6] >= 0.1][:5]
+    # 제목 한국어 보정: 없으면 OpenAI로 즉시 번역 (여러 건을 동시에 요청)
+    titles_kr = await asyncio.gather(*[
+        ensure_korean_title(row[1], row[2]) for row in top_results
+    ])
+    recipes_info = []
+    for row, title_kr in zip(top_results, titles_kr):
+        title_en = row[2] or ""
+        recipes_info.append({
+            "id": row[0],
+            "title": title_kr or title_en,
+            "title_en": title_en,
+            "description": row[3] or "",
+            # 파싱된 값이 없으면 (007 마이그레이션 전 / 해석 불가) 원문 표기
+            "cooking_time": format_minutes_korean(row[7]) if row[7] else format_duration_korean(row[4]),
+            "servings": format_servings_count_korean(row[8]) if row[8] else format_servings_korean(row[5]),
+            "similarity": row[6]
+        })
+    return recipes_info, query_vector
+
+
+async def load_chat_session(chat_message: ChatMessage) -> dict:
+    """요청당 1번 세션 조회 - 이후 단계(프롬프트 조립, 대화 내역 저장)는 이 세션을 그대로 사용"""
+    return await session_store.load(chat_message.user_id or "default")
+
+
+async def retrieve_chat_context(chat_message: ChatMessage) -> tuple:
+    """
+    채팅 1단계 + 세션 조회 (동시 실행)
+    
+    Returns:
+        (추천 후보, 검색 쿼리 임베딩, 세션)
+    """
+    (recipes_info, query_vector), session = await asyncio.gather(
+        retrieve_chat_recipes(chat_message), load_chat_session(chat_message)
+    )
+    return recipes_info, query_vector, session
+
+
+def build_chat_messages(chat_message: ChatMessage, recipes_info: list[dict], session: dict) -> list[dict]:
+    """채팅 2단계: 추천 후보 + 대화 내역 → GPT 메시지 (CHAT_PROMPT_TOKEN_BUDGET 안에서 조립)"""
+    return prompt_builder.build(
+        CHAT_SYSTEM_PROMPT,
+        session['history'],
+        recipes_info,
+        chat_message.message,
+        f"맵기={chat_message.spiciness}, 짠맛={chat_message.saltiness}"
+    )
+
+
+def chat_completion_params(messages: list[dict]) -> dict:
+    return dict(
+        model=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
+        messages=messages,
+        max_tokens=500,
+        temperature=0.6,
+        timeout=openai_registry.timeout('chat')
+    )
+
+
+def to_recipe_responses(recipes_info: list[dict]) -> list[RecipeResponse]:
+    """추천 후보 → 응답 카드 (상위 3개)"""
+    return [
+        RecipeResponse(
+            id=recipe["id"],
+            title=recipe["title"],
+            title_en=recipe.get("title_en", recipe["title"]),
+            description_en=recipe["description"],
+            cooking_time=recipe["cooking_time"],
+            servings=recipe["servings"],
+            similarity=recipe["similarity"]
         )
+        for recipe in recipes_info[:3]
+    ]
 
-        convo = chat_histories.get(chat_message.user_id or "default", [])
-
-        instruction = (
-            "다음은 사용자 대화 일부와 데이터베이스에서 찾은 관련 레시피입니다."
-            " 사용자의 요청과 취향을 반영해 1~3개의 레시피를 추천하고,"
-            " 각 레시피의 조리시간/인분/간단한 특징을 1-2문장으로 요약하세요."
-            " 마지막 줄에는 '원하시면 1번/2번/3번 중에 선택해 주세요.'라고 안내하세요.\n\n"
-            f"사용자 취향: 맵기={chat_message.spiciness}, 짠맛={chat_message.saltiness}\n"
-            f"대화 일부: {json.dumps(convo[-6:], ensure_ascii=False)}\n"
-            f"레시피 정보: {json.dumps(recipes_info, ensure_ascii=False)}\n"
-            f"사용자 요청: {chat_message.message}"
-        )
-        
-        # GPT 호출
-        response = openai_client.chat.completions.create(
-            model=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": instruction}
-            ],
-            max_tokens=500,
-            temperature=0.6
+
+async def record_chat_history(chat_message: ChatMessage, recipes_info: list[dict], session: dict):
+    """
+    채팅 마지막 단계: 대화 내역/취향 저장 (추천한 레시피만 저장, 오래된 턴은 롤링 요약)
+    
+    요청 시작 때 읽은 세션에 이번 턴을 붙여 저장한다. 그사이 같은 사용자의 다른 요청이
+    먼저 저장했으면 세션 저장소가 최신 세션을 다시 읽어 이번 턴을 붙인다.
+    """
+    prefs = {"spiciness": chat_message.spiciness, "saltiness": chat_message.saltiness}
+    await session_store.update(
+        chat_message.user_id or "default",
+        session,
+        lambda current: (
+            prompt_builder.append_turn(current['history'], chat_message.message, recipes_info[:3]),
+            prefs
         )
+    )
 
-        ai_message = response.choices[0].message.content
 
-        # 대화 내역 업데이트 (간단한 저장)
-        chat_histories.setdefault(chat_message.user_id or "default", []).extend([
-            {"role": "user", "content": chat_message.message},
-            {"role": "assistant", "content": ai_message or ""}
-        ])
-        # 메모리 폭주 방지: 최근 20개만 유지
-        chat_histories[chat_message.user_id or "default"] = chat_histories[chat_message.user_id or "default"][-20:]
-        
-        # 3. 응답 구성
-        recipe_responses = [
-            RecipeResponse(
-                id=recipe["id"],
-                title=recipe["title"],
-                title_en=recipe.get("title_en", recipe["title"]),
-                description_en=recipe["description"],
-                cooking_time=recipe["cooking_time"],
-                servings=recipe["servings"],
-                similarity=recipe["similarity"]
+def semantic_cache_args(chat_message: ChatMessage, recipes_info: list[dict], query_vector: list) -> tuple:
+    """
+    의미 캐시 조회/저장 인자 (쿼리 임베딩, 취향 튜플, 검색된 레시피 id)
+    
+    쿼리 임베딩은 검색 단계(retrieve_chat_recipes)에서 계산한 것을 그대로 사용한다.
+    """
+    semantic_cache.observe_version(search_cache.version)
+    preferences = (chat_message.spiciness, chat_message.saltiness)
+    return query_vector, preferences, [recipe['id'] for recipe in recipes_info]
+
+
+async def generate_recommendation(chat_message: ChatMessage, recipes_info: list[dict], session: dict) -> tuple:
+    """
+    채팅 3단계: 추천 문구 - 템플릿 빠른 경로 또는 GPT (SLO 안에 응답이 없으면 템플릿)
+    
+    Returns:
+        (추천 문구, 빠른 경로 사유 - GPT 답변이면 None)
+    """
+    started = time.perf_counter()
+    reason = chat_fast_path.route(recipes_info)
+    if reason is None:
+        try:
+            # GPT 호출 (비동기 - 응답 대기 중에도 다른 요청 처리)
+            response = await asyncio.wait_for(
+                openai_client.chat.completions.create(
+                    **chat_completion_params(build_chat_messages(chat_message, recipes_info, session))
+                ),
+                timeout=chat_fast_path.slo_seconds
             )
-            for recipe in recipes_info[:3]  # 상위 3개만 반환
-        ]
-        # 한국어 표기 보정
-        for r in recipe_responses:
-            r.cooking_time = format_duration_korean(r.cooking_time)
-            r.servings = format_servings_korean(r.servings)
+            chat_fast_path.record_llm(time.perf_counter() - started)
+            return response.choices[0].message.content, None
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️  채팅 LLM SLO 초과 ({chat_fast_path.slo_ms:.0f}ms) → 템플릿 응답")
+            reason = 'slo'
+    ai_message = render_recommendation(recipes_info, chat_message.spiciness, chat_message.saltiness)
+    chat_fast_path.record_fast(reason, time.perf_counter() - started)
+    return ai_message, reason
+
+
+async def open_chat_stream(messages: list[dict]):
+    """
+    GPT 스트리밍 호출을 열고 첫 조각까지 받음 (SLO는 첫 토큰 기준)
+    
+    Returns:
+        (스트림, 첫 조각) - 호출 측이 끝나면 반드시 stream.close() (HTTP 커넥션 반납)
+    """
+    stream = await openai_client.chat.completions.create(**chat_completion_params(messages), stream=True)
+    try:
+        first = await stream.__aiter__().__anext__()
+    except StopAsyncIteration:
+        first = None
+    except BaseException:
+        # 첫 토큰 SLO 초과(wait_for 취소) / 오류 시 열린 스트림을 닫아 공유 커넥션 풀에 반납
+        await stream.close()
+        raise
+    return stream, first
+
+
+def chunk_text(chunk) -> Optional[str]:
+    return chunk.choices[0].delta.content if chunk is not None and chunk.choices else None
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Server-Sent Events 프레임"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat_with_ai(chat_message: ChatMessage):
+    """AI 채팅 - 레시피 추천"""
+    try:
+        recipes_info, query_vector, session = await retrieve_chat_context(chat_message)
+        if not recipes_info:
+            return ChatResponse(message=CHAT_NOT_FOUND_MESSAGE, recipes=[], suggestions=CHAT_NOT_FOUND_SUGGESTIONS)
         
-        # 추천 키워드 생성
-        suggestions = [
-            "더 많은 닭고기 요리",
-            "간단한 요리",
-            "건강한 요리",
-            "한국 전통 요리"
-        ]
+        cache_args = semantic_cache_args(chat_message, recipes_info, query_vector)
+        ai_message = semantic_cache.get(*cache_args)
+        if ai_message is None:
+            ai_message, reason = await generate_recommendation(chat_message, recipes_info, session)
+            if reason is None:
+                semantic_cache.put(*cache_args, ai_message)
+        await record_chat_history(chat_message, recipes_info, session)
         
-        md_header = """🍽️ 추천 레시피\n\n**아래에서 원하는 레시피를 선택해 주세요. (1~3번)**\n\n"""
-
         return ChatResponse(
             message=ai_message,
-            markdown_message=md_header + (ai_message or ""),
-            recipes=recipe_responses,
-            suggestions=suggestions
+            markdown_message=CHAT_MARKDOWN_HEADER + (ai_message or ""),
+            recipes=to_recipe_responses(recipes_info),
+            suggestions=CHAT_SUGGESTIONS
         )
         
     except Exception as e:
         logger.error(f"채팅 처리 실패: {e}")
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_with_ai_stream(chat_message: ChatMessage):
+    """
+    AI 채팅 스트리밍 (text/event-stream)
+    
+    이벤트 순서:
+        recipes - 검색이 끝나는 즉시 추천 카드 {"recipes": [...], "markdown_header": str}
+        token   - GPT 추천 문구 조각 {"delta": str} (여러 번, 템플릿/의미 캐시 답변이면 전체 1번)
+        done    - {"message", "markdown_message", "suggestions"} (대화 내역 저장 후)
+        error   - {"detail": str} (스트리밍 도중 실패)
+    """
+    try:
+        recipes_info, query_vector, session = await retrieve_chat_context(chat_message)
+    except Exception as e:
+        logger.error(f"채팅 검색 실패: {e}")
+        raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
+    
+    async def events():
+        if not recipes_info:
+            yield sse_event("recipes", {"recipes": [], "markdown_header": ""})
+            yield sse_event("done", {
+                "message": CHAT_NOT_FOUND_MESSAGE,
+                "markdown_message": None,
+                "suggestions": CHAT_NOT_FOUND_SUGGESTIONS
+            })
+            return
+        
+        yield sse_event("recipes", {
+            "recipes": [card.model_dump() for card in to_recipe_responses(recipes_info)],
+            "markdown_header": CHAT_MARKDOWN_HEADER
+        })
+        cache_args = semantic_cache_args(chat_message, recipes_info, query_vector)
+        cached = semantic_cache.get(*cache_args)
+        if cached is not None:
+            await record_chat_history(chat_message, recipes_info, session)
+            yield sse_event("token", {"delta": cached})
+            yield sse_event("done", {
+                "message": cached,
+                "markdown_message": CHAT_MARKDOWN_HEADER + cached,
+                "suggestions": CHAT_SUGGESTIONS
+            })
+            return
+        
+        started = time.perf_counter()
+        reason = chat_fast_path.route(recipes_info)
+        parts = []
+        if reason is None:
+            try:
+                stream, first = await asyncio.wait_for(
+                    open_chat_stream(build_chat_messages(chat_message, recipes_info, session)),
+                    timeout=chat_fast_path.slo_seconds
+                )
+                # 오류 / 클라이언트 연결 끊김(GeneratorExit)에도 스트림을 닫음
+                try:
+                    if chunk_text(first):
+                        parts.append(chunk_text(first))
+                        yield sse_event("token", {"delta": parts[-1]})
+                    if first is not None:
+                        async for chunk in stream:
+                            delta = chunk_text(chunk)
+                            if delta:
+                                parts.append(delta)
+                                yield sse_event("token", {"delta": delta})
+                finally:
+                    await stream.close()
+                chat_fast_path.record_llm(time.perf_counter() - started)
+                semantic_cache.put(*cache_args, ''.join(parts))
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️  채팅 LLM 첫 토큰 SLO 초과 ({chat_fast_path.slo_ms:.0f}ms) → 템플릿 응답")
+                reason = 'slo'
+            except Exception as e:
+                logger.error(f"채팅 스트리밍 실패: {e}")
+                yield sse_event("error", {"detail": f"Chat failed: {str(e)}"})
+                return
+        if reason:
+            parts = [render_recommendation(recipes_info, chat_message.spiciness, chat_message.saltiness)]
+            chat_fast_path.record_fast(reason, time.perf_counter() - started)
+            yield sse_event("token", {"delta": parts[0]})
+        
+        ai_message = ''.join(parts)
+        await record_chat_history(chat_message, recipes_info, session)
+        yield sse_event("done", {
+            "message": ai_message,
+            "markdown_message": CHAT_MARKDOWN_HEADER + ai_message,
+            "suggestions": CHAT_SUGGESTIONS
+        })
+    
+    # 프록시 버퍼링 끄기 (nginx 등에서 이벤트가 모였다가 한꺼번에 나가지 않도록)
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+레시피 문서 백필 스크립트
+- 검색 필터 값 (cooking_minutes / servings_count, 수집 JSON이 있으면 category)
+- JSONB 레시피 문서 (recipes.document): 레시피 + 재료 + 조리 단계를 PK 1회 조회로
+- 한국어 상세 문서 (recipe_details): /recipe/{id} 가 요청마다 GPT 번역을 하지 않도록
+(새로 수집되는 레시피는 insert_recipe에서 자동 생성)
+"""
+
+import os
+import glob
+import json
+import time
+import logging
+import argparse
+from dotenv import load_dotenv
+
+from src.database import RecipeDB
+
+load_dotenv('config/.env')
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="레시피 문서 백필")
+    parser.add_argument(
+        '--all',
+        action='store_true',
+        help='이미 문서가 있는 레시피도 다시 생성 (분류 규칙 변경 시)'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=200,
+        help='한 번에 처리할 레시피 수 (기본: 200)'
+    )
+    parser.add_argument(
+        '--category-json',
+        nargs='*',
+        default=[],
+        help='카테고리를 채울 수집 결과 JSON (예: data/recipes_*.json)'
+    )
+    args = parser.parse_args()
+
+    logger.info("=" * 60)
+    logger.info("📄 레시피 문서 생성")
+    logger.info("=" * 60)
+
+    db_name = os.getenv('DB_NAME', 'recipe_ai_db')
+    db_user = os.getenv('DB_USER', 'recipe_keep')
+
+    db = RecipeDB(db_name, db_user)
+    db.connect()
+
+    started = time.time()
+    changed = set(db.normalize_recipe_attributes(only_missing=not args.all))
+    logger.info(f"✅ 조리시간/인분 필터 값 {len(changed)}개 갱신")
+    if args.category_json:
+        category_rows = []
+        for path in sorted({p for pattern in args.category_json for p in glob.glob(pattern)}):
+            with open(path, 'r', encoding='utf-8') as f:
+                category_rows += [
+                    (recipe['url'].split('/')[-1], recipe.get('category'))
+                    for recipe in json.load(f) if recipe.get('url')
+                ]
+        categorized = db.update_recipe_categories(category_rows)
+        changed.update(categorized)
+        logger.info(f"✅ 카테고리 {len(categorized)}개 갱신")
+    if changed and not args.all:
+        # 필터 값이 바뀐 레시피는 문서도 다시 생성
+        db.refresh_recipe_documents(sorted(changed))
+    documents = db.refresh_recipe_documents(only_missing=not args.all)
+    logger.info(f"✅ JSONB 레시피 문서 {documents}개 생성")
+    built = db.build_recipe_details(only_missing=not args.all, batch_size=args.batch_size)
+    elapsed = time.time() - started
+
+    db.close()
+
+    logger.info(f"✅ 상세 문서 {built}개 생성 ({elapsed:.1f}초)")
+
+
+if __name__ == '__main__':
+    main()
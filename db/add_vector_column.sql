@@ -8,6 +8,8 @@ ALTER TABLE recipes ADD COLUMN IF NOT EXISTS embedding vector(1536);
 
 -- 3. 벡터 검색을 위한 인덱스 생성
 -- IVFFlat 인덱스 (빠른 근사 검색)
+-- 빈 테이블에서 만든 중심점은 품질이 낮으므로 데이터 적재 후
+-- python scripts/database/vector_index.py build 로 재생성
 CREATE INDEX IF NOT EXISTS recipes_embedding_idx 
 ON recipes USING ivfflat (embedding vector_cosine_ops)
 WITH (lists = 100);
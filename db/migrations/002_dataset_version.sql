@@ -0,0 +1,16 @@
+-- Migration: Dataset version for search result cache invalidation
+-- recipes 테이블 내용(레시피 추가/임베딩/번역 수정)이 바뀔 때마다 version을 증가시키고,
+-- API 서버의 검색 결과 캐시는 버전이 바뀌면 이전 항목을 버린다.
+
+CREATE TABLE IF NOT EXISTS dataset_version (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO dataset_version (id, version)
+VALUES (1, 1)
+ON CONFLICT (id) DO NOTHING;
+
+-- 확인
+SELECT version, updated_at FROM dataset_version;
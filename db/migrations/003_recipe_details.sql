@@ -0,0 +1,18 @@
+-- Migration: Precomputed Korean recipe detail documents
+-- /recipe/{id} 응답을 요청마다 GPT로 번역하지 않고, 수집 시/백필 작업으로 한 번만 생성해 저장
+-- 백필: python build_recipe_details.py
+
+CREATE TABLE IF NOT EXISTS recipe_details (
+    recipe_id INTEGER PRIMARY KEY REFERENCES recipes(id) ON DELETE CASCADE,
+    ingredients JSONB NOT NULL,          -- 정리된 한국어 재료
+    cooking_steps JSONB NOT NULL,        -- 정리된 한국어 조리 단계 (step_number 순)
+    ingredient_groups JSONB NOT NULL,    -- {"main": [...], "sub": [...], "seasoning": [...]}
+    step_groups JSONB NOT NULL,          -- [["준비", [...]], ["볶기/굽기", [...]], ...]
+    markdown TEXT NOT NULL,              -- 채팅식 레시피 설명
+    built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 확인
+SELECT
+    (SELECT COUNT(*) FROM recipes) AS total_recipes,
+    (SELECT COUNT(*) FROM recipe_details) AS detail_documents;
@@ -0,0 +1,17 @@
+-- Migration: Denormalized JSONB recipe document
+-- 레시피 + 재료 + 조리 단계(step_number 순)를 하나의 JSONB 문서로 보관해
+-- recipes / ingredients / cooking_steps 3회 조회를 PK 1회 조회로 대체
+-- RecipeDB.refresh_recipe_documents()가 삽입/번역 수정 시 갱신
+-- 백필: python build_recipe_details.py
+
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS document JSONB;
+
+-- 문서가 없는 레시피 찾기용 (백필/점검)
+CREATE INDEX IF NOT EXISTS idx_recipes_document_missing
+ON recipes (id) WHERE document IS NULL;
+
+-- 확인
+SELECT
+    COUNT(*) AS total_recipes,
+    COUNT(document) AS with_document
+FROM recipes;
@@ -0,0 +1,20 @@
+-- Migration: Embedding text fingerprint
+-- 임베딩 원문(RecipeVectorizer.create_document_text)의 SHA-256 해시와 모델명을 벡터 옆에 저장
+-- 번역 수정으로 원문이 바뀌거나 모델을 바꾸면 해시/모델 불일치로 재임베딩 대상이 됨
+-- 같은 해시의 기존 임베딩은 API 호출 없이 재사용
+-- 증분 재임베딩: python vectorize_recipes.py --incremental
+
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS embedding_text_hash TEXT;
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS embedding_model TEXT;
+
+-- 해시 기반 임베딩 재사용 조회용
+CREATE INDEX IF NOT EXISTS idx_recipes_embedding_text_hash
+ON recipes (embedding_text_hash, embedding_model)
+WHERE embedding IS NOT NULL;
+
+-- 확인
+SELECT
+    COUNT(*) AS total_recipes,
+    COUNT(embedding) AS vectorized_recipes,
+    COUNT(embedding_text_hash) AS fingerprinted_recipes
+FROM recipes;
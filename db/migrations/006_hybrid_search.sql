@@ -0,0 +1,21 @@
+-- Migration: Hybrid lexical + vector search
+-- 레시피 문서(recipes.document)의 제목/영문 제목/재료명을 pg_trgm GIN 인덱스로 색인
+-- 한국어 요리명·재료명을 임베딩 없이 바로 매칭하고, 벡터 후보와 RRF로 합침 (RecipeDB.hybrid_search)
+-- 문서가 갱신되면(refresh_recipe_documents) 인덱스도 자동 갱신 - 별도 백필 불필요
+-- 주의: 한글 트라이그램은 데이터베이스 LC_CTYPE이 UTF-8 로케일(ko_KR.UTF-8, C.UTF-8 등)이어야 생성됨
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION recipe_search_text(doc JSONB) RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT COALESCE(doc->>'title', '') || ' ' || COALESCE(doc->>'title_en', '') || ' ' || COALESCE((
+        SELECT string_agg(COALESCE(i->>'name', '') || ' ' || COALESCE(i->>'name_en', ''), ' ')
+        FROM jsonb_array_elements(doc->'ingredients') AS i
+    ), '')
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_recipes_search_text_trgm
+ON recipes USING gin (recipe_search_text(document) gin_trgm_ops);
+
+-- 확인 (한글 트라이그램이 비어 있으면 로케일 확인)
+SELECT show_trgm('소고기 볶음') AS korean_trigrams;
@@ -0,0 +1,21 @@
+-- Migration: Structured recipe filters
+-- cooking_time('PT30M', '1시간 30분') / servings('2인분')의 숫자 값과 수집 카테고리를 컬럼으로 저장해
+-- 검색 쿼리 안에서 바로 필터링 (조리시간 이내, 인분, 카테고리)
+-- 새 레시피는 insert_recipe / bulk_insert_recipes에서 자동 채움
+-- 백필: python build_recipe_details.py (카테고리는 --category-json "data/recipes_*.json")
+
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS cooking_minutes INTEGER;
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS servings_count SMALLINT;
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS category VARCHAR(50);
+
+CREATE INDEX IF NOT EXISTS idx_recipes_cooking_minutes ON recipes (cooking_minutes);
+CREATE INDEX IF NOT EXISTS idx_recipes_servings_count ON recipes (servings_count);
+CREATE INDEX IF NOT EXISTS idx_recipes_category ON recipes (category);
+
+-- 확인
+SELECT
+    COUNT(*) AS total_recipes,
+    COUNT(cooking_minutes) AS with_minutes,
+    COUNT(servings_count) AS with_servings,
+    COUNT(category) AS with_category
+FROM recipes;
@@ -0,0 +1,24 @@
+-- Migration: Chat session store
+-- 채팅 대화 내역/취향을 워커 간 공유하고 재시작 후에도 유지 (CHAT_SESSION_BACKEND=postgres)
+-- 조회는 user_id 기본키 1건, 저장은 version 비교 UPDATE 1건 (동시 요청이 서로의 대화 턴을 덮어쓰지 않도록)
+-- 유휴 TTL(CHAT_SESSION_TTL)이 지난 세션과 최대 세션 수(CHAT_SESSION_MAX)를 넘는 오래된 세션은
+-- API 서버가 주기적으로 삭제 (CHAT_SESSION_PURGE_INTERVAL)
+
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    user_id VARCHAR(128) PRIMARY KEY,
+    -- 압축 형식 대화 내역: [["s", 요약], ["u", 사용자 메시지], ["a", "추천: 1번 #12 ..."], ...]
+    history JSONB NOT NULL DEFAULT '[]',
+    prefs JSONB NOT NULL DEFAULT '{}',
+    -- 저장마다 1 증가 (낙관적 동시성 제어: 읽은 version과 다르면 다시 읽고 재적용)
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 유휴 세션 삭제 / 최대 세션 수 초과분 삭제 (오래된 순)
+CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated_at ON chat_sessions (updated_at);
+
+-- 확인
+SELECT
+    COUNT(*) AS sessions,
+    pg_size_pretty(pg_total_relation_size('chat_sessions')) AS table_size
+FROM chat_sessions;
@@ -91,6 +91,10 @@ class RecipeAISystem:
                 return
             
             logger.info(f"✅ Crawled {len(recipes)} recipes")
+            # JSON-LD에 카테고리가 없으면 수집한 종류별 카테고리로 (검색 필터용)
+            for recipe in recipes:
+                if not recipe.get('category'):
+                    recipe['category'] = self.category['type']
             
             # 2. 번역
             logger.info(f"\n🌐 Step 2: Translating recipes...")
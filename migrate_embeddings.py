@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+임베딩 차원 / 저장 타입 마이그레이션
+- recipes.embedding 을 EMBEDDING_DIMENSIONS 차원, EMBEDDING_STORAGE(vector|halfvec) 타입으로 변환
+- text-embedding-3 계열: 기존 벡터를 앞쪽 차원으로 자르고 재정규화 (재임베딩 불필요)
+- 그 외(모델 변경, SentenceTransformers 등): 벡터를 비우고 vectorize_recipes.py로 재임베딩
+- ANN 인덱스(ivfflat/hnsw)를 새 타입의 연산자 클래스로 재생성
+(pgvector 0.7 이상 필요: halfvec, subvector, l2_normalize)
+"""
+
+import os
+import logging
+import argparse
+from dotenv import load_dotenv
+
+from src.database import RecipeDB, VECTOR_TYPES
+from src.vectorizer import embedding_model_id, configured_embedding_model
+
+load_dotenv('config/.env')
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 차원/저장 타입 마이그레이션")
+    parser.add_argument(
+        '--dimensions',
+        type=int,
+        default=int(os.getenv('EMBEDDING_DIMENSIONS') or 0) or None,
+        help='새 차원 (기본: EMBEDDING_DIMENSIONS, 없으면 현재 차원 유지)'
+    )
+    parser.add_argument(
+        '--storage',
+        choices=VECTOR_TYPES,
+        default=os.getenv('EMBEDDING_STORAGE', 'vector').lower(),
+        help='저장 타입 (기본: EMBEDDING_STORAGE)'
+    )
+    parser.add_argument(
+        '--reembed',
+        action='store_true',
+        help='기존 벡터를 자르지 않고 비움 (임베딩 모델을 바꿀 때)'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='현재 상태와 변환 계획만 출력'
+    )
+    args = parser.parse_args()
+
+    logger.info("=" * 60)
+    logger.info("📐 임베딩 저장 형식 마이그레이션")
+    logger.info("=" * 60)
+
+    db_name = os.getenv('DB_NAME', 'recipe_ai_db')
+    db_user = os.getenv('DB_USER', 'recipe_keep')
+
+    db = RecipeDB(db_name, db_user)
+    db.connect()
+
+    current_type, current_dims = db.embedding_column_type() or (None, None)
+    if current_type is None:
+        logger.error("❌ recipes.embedding 컬럼이 없습니다 (db/migrations/001_add_vector_column.sql 먼저 실행)")
+        db.close()
+        return
+
+    dimensions = args.dimensions or current_dims
+    use_openai = os.getenv('USE_OPENAI_EMBEDDINGS', 'true').lower() == 'true'
+    # RecipeVectorizer와 같은 설정 (EMBEDDING_MODEL)
+    model = configured_embedding_model(use_openai)
+    # text-embedding-3 계열만 앞쪽 차원을 잘라도 API dimensions 결과와 같음
+    truncate = not args.reembed and use_openai and model.startswith('text-embedding-3')
+    if not truncate and current_dims and dimensions < current_dims:
+        logger.info("ℹ️  이 모델은 차원 절단을 지원하지 않아 기존 벡터를 비우고 재임베딩합니다")
+    model_name = embedding_model_id(model, dimensions)
+
+    logger.info(f"모델: {model}")
+    logger.info(f"현재: {current_type}({current_dims})")
+    logger.info(f"변환: {args.storage}({dimensions})")
+    for name, indexdef in db.embedding_indexes():
+        logger.info(f"인덱스: {name} — {indexdef}")
+
+    if args.dry_run:
+        db.close()
+        return
+
+    result = db.migrate_embedding_storage(
+        dimensions,
+        vector_type=args.storage,
+        truncate=truncate,
+        model_name=model_name if truncate else None
+    )
+    db.close()
+
+    logger.info(f"✅ {result['from']} → {result['to']} ({result['conversion']})")
+    logger.info(f"✅ 인덱스 재생성: {', '.join(result['indexes'])}")
+
+    if result['conversion'] == 'cleared':
+        logger.info("\n📌 다음 단계: python vectorize_recipes.py")
+    if args.storage != os.getenv('EMBEDDING_STORAGE', 'vector').lower():
+        logger.info(f"📌 config/.env 에 EMBEDDING_STORAGE={args.storage} 를 설정하세요")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+벡터 인덱스 관리 도구
+- status: 임베딩 행 수, 현재 ANN 인덱스/크기, 권장 lists
+- build: 데이터 적재 후 IVFFlat(lists를 행 수에 맞춤) 또는 HNSW(m/ef_construction) 재생성
+- benchmark: probes / ef_search 별 recall@k (정확 검색 대비) + 지연 시간 백분위
+- snapshot: API 서버 인프로세스 mmap 인덱스 스냅샷 생성 (VECTOR_SEARCH_BACKEND=mmap)
+- quantization: float32 / int8 / PQ 표현별 메모리, recall@k (근사 점수만 / 원본 재정렬 후), 지연 시간
+
+사용 예:
+    python scripts/database/vector_index.py status
+    python scripts/database/vector_index.py build --method ivfflat
+    python scripts/database/vector_index.py build --method hnsw --m 16 --ef-construction 64
+    python scripts/database/vector_index.py benchmark --k 10 --probes 1,5,10,20 --ef-search 20,40,100
+    python scripts/database/vector_index.py snapshot --nlist 256
+    python scripts/database/vector_index.py quantization --pq-m 48,96,192 --rerank-factor 4
+"""
+
+import os
+import sys
+import math
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import List
+
+from dotenv import load_dotenv
+
+
+# -----------------------------------------------------------------------------
+# 프로젝트 루트 기준으로 작동
+# -----------------------------------------------------------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+os.chdir(PROJECT_ROOT)
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.database import RecipeDB  # noqa: E402
+from src.vector_index import MmapVectorIndex, parse_vector_text  # noqa: E402
+from src.quantization import ScalarQuantizer, ProductQuantizer  # noqa: E402
+
+load_dotenv('config/.env')
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = 'idx_recipes_embedding'
+
+
+def recommended_lists(rows: int) -> int:
+    """pgvector 권장 lists: 100만 행까지 rows/1000, 그 이상은 sqrt(rows)"""
+    if rows <= 1000000:
+        return max(10, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """정렬된 값의 백분위 (nearest-rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def parse_int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def count_embeddings(db: RecipeDB) -> int:
+    db.cursor.execute("SELECT COUNT(*) FROM recipes WHERE embedding IS NOT NULL")
+    return db.cursor.fetchone()[0]
+
+
+def cmd_status(db: RecipeDB, args):
+    rows = count_embeddings(db)
+    column = db.embedding_column_type()
+    logger.info(f"📊 임베딩 컬럼: {column[0]}({column[1]})" if column else "❌ embedding 컬럼 없음")
+    logger.info(f"📊 임베딩 행 수: {rows}")
+    logger.info(f"📌 권장 IVFFlat lists: {recommended_lists(rows)} (probes 시작값 ≈ {max(1, int(math.sqrt(recommended_lists(rows))))})")
+
+    indexes = db.embedding_indexes()
+    if not indexes:
+        logger.info("⚠️  ANN 인덱스 없음 (순차 스캔)")
+    for name, indexdef in indexes:
+        db.cursor.execute("SELECT pg_size_pretty(pg_relation_size(%s::regclass))", (name,))
+        logger.info(f"🗂️  {name} ({db.cursor.fetchone()[0]}): {indexdef}")
+
+
+def cmd_build(db: RecipeDB, args):
+    rows = count_embeddings(db)
+    if rows == 0:
+        logger.error("❌ 임베딩이 없습니다. 먼저 python vectorize_recipes.py 를 실행하세요")
+        return
+
+    column = db.embedding_column_type()
+    opclass = f"{column[0]}_cosine_ops"
+
+    if args.method == 'ivfflat':
+        lists = args.lists or recommended_lists(rows)
+        if rows < lists * 10:
+            logger.warning(f"⚠️  행 수({rows})에 비해 lists({lists})가 많습니다. 중심점 품질이 낮을 수 있습니다")
+        using = f"ivfflat (embedding {opclass}) WITH (lists = {lists})"
+    else:
+        using = f"hnsw (embedding {opclass}) WITH (m = {args.m}, ef_construction = {args.ef_construction})"
+
+    logger.info("=" * 60)
+    logger.info(f"🔨 인덱스 생성: {using} ({rows}행)")
+    logger.info("=" * 60)
+
+    started = time.perf_counter()
+    # 인덱스 빌드 메모리 (그래프/중심점이 메모리에 들어가야 빠름) - 세션 한정
+    db.cursor.execute("SELECT set_config('maintenance_work_mem', %s, false)", (args.maintenance_work_mem,))
+    for name, _ in db.embedding_indexes():
+        logger.info(f"🗑️  기존 인덱스 삭제: {name}")
+        db.cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+    db.cursor.execute(f"CREATE INDEX {INDEX_NAME} ON recipes USING {using}")
+    db.cursor.execute("ANALYZE recipes")
+    elapsed = time.perf_counter() - started
+
+    db.cursor.execute("SELECT pg_size_pretty(pg_relation_size(%s::regclass))", (INDEX_NAME,))
+    logger.info(f"✅ 완료: {elapsed:.1f}초, 크기 {db.cursor.fetchone()[0]}")
+    logger.info("📌 다음 단계: benchmark 로 probes / ef_search 확인 후 VECTOR_SEARCH_QUALITY 조정")
+
+
+def cmd_benchmark(db: RecipeDB, args):
+    indexes = db.embedding_indexes()
+    if not indexes:
+        logger.warning("⚠️  ANN 인덱스가 없어 모든 설정이 정확 검색과 같습니다")
+    method = 'hnsw' if any('USING hnsw' in d for _, d in indexes) else 'ivfflat'
+
+    # 실제 레시피 임베딩을 쿼리로 사용 (텍스트 형식 '[...]' 그대로 파라미터로 전달)
+    db.cursor.execute("""
+        SELECT embedding::text FROM recipes
+        WHERE embedding IS NOT NULL
+        ORDER BY random()
+        LIMIT %s
+    """, (args.queries,))
+    queries = [row[0] for row in db.cursor.fetchall()]
+    if not queries:
+        logger.error("❌ 임베딩이 없습니다")
+        return
+
+    logger.info("=" * 60)
+    logger.info(f"🧪 {method} 벤치마크: 쿼리 {len(queries)}개, recall@{args.k}")
+    logger.info("=" * 60)
+
+    # 정확 검색 기준 결과
+    truth = []
+    exact_latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        rows = db.search_similar(query, args.k, -1.0, exact=True)
+        exact_latencies.append((time.perf_counter() - started) * 1000)
+        truth.append({row[0] for row in rows})
+
+    if method == 'hnsw':
+        settings = [{'ef_search': ef} for ef in parse_int_list(args.ef_search)]
+    else:
+        settings = [{'probes': probes} for probes in parse_int_list(args.probes)]
+
+    logger.info(f"{'setting':<16}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    logger.info(f"{'exact':<16}{1.0:>10.3f}{percentile(exact_latencies, 50):>10.2f}"
+                f"{percentile(exact_latencies, 95):>10.2f}{percentile(exact_latencies, 99):>10.2f}")
+
+    for setting in settings:
+        latencies = []
+        hits = 0
+        expected = 0
+        for query, relevant in zip(queries, truth):
+            started = time.perf_counter()
+            rows = db.search_similar(query, args.k, -1.0, **setting)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += len(relevant & {row[0] for row in rows})
+            expected += len(relevant)
+        recall = hits / expected if expected else 0.0
+        label = ', '.join(f"{k}={v}" for k, v in setting.items())
+        logger.info(f"{label:<16}{recall:>10.3f}{percentile(latencies, 50):>10.2f}"
+                    f"{percentile(latencies, 95):>10.2f}{percentile(latencies, 99):>10.2f}")
+
+
+def cmd_snapshot(db: RecipeDB, args):
+    index = MmapVectorIndex.from_env()
+    if args.nlist is not None:
+        index.nlist = args.nlist
+    logger.info(f"🧭 mmap 스냅샷 생성: {index.directory} (nlist={index.nlist})")
+    meta = index.build(db)
+    if meta is None:
+        logger.warning("⚠️  다른 프로세스가 스냅샷을 생성 중입니다")
+        return
+    logger.info(f"✅ v{meta['version']}: {meta['count']}개 벡터, {meta['dimensions']}차원, nlist={meta['nlist']}")
+
+    if args.k:
+        # 스냅샷 정확도 확인 (Postgres 정확 검색 대비)
+        index.load()
+        db.cursor.execute("""
+            SELECT embedding::text FROM recipes
+            WHERE embedding IS NOT NULL
+            ORDER BY random()
+            LIMIT 50
+        """)
+        hits = expected = 0
+        latencies = []
+        for (text,) in db.cursor.fetchall():
+            truth = {row[0] for row in db.search_similar(text, args.k, -1.0, exact=True)}
+            query = [float(v) for v in text[1:-1].split(',')]
+            started = time.perf_counter()
+            ranked = index.search(query, args.k, -1.0)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += len(truth & {rid for rid, _ in ranked})
+            expected += len(truth)
+        logger.info(f"📊 recall@{args.k}: {hits / max(expected, 1):.3f}, "
+                    f"p50 {percentile(latencies, 50):.3f}ms, p99 {percentile(latencies, 99):.3f}ms")
+
+
+def load_embedding_matrix(db: RecipeDB, limit: int):
+    """임베딩을 정규화된 float32 행렬로 로드 (벤치마크용, 최대 limit행)"""
+    import numpy as np
+
+    with db.embedding_snapshot() as (_, count, chunks):
+        rows = []
+        for chunk in chunks:
+            rows.extend(parse_vector_text(text) for _, text in chunk)
+            if len(rows) >= limit:
+                break
+    matrix = np.vstack(rows[:limit])
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def cmd_quantization(db: RecipeDB, args):
+    import numpy as np
+
+    vectors = load_embedding_matrix(db, args.limit)
+    n, dimensions = vectors.shape
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(n, min(args.queries, n), replace=False)]
+    k = args.k
+    candidates = k * args.rerank_factor
+
+    logger.info("=" * 60)
+    logger.info(f"🧪 양자화 벤치마크: {n}개 × {dimensions}차원, 쿼리 {len(queries)}개, "
+                f"recall@{k}, 재정렬 후보 {candidates}개")
+    logger.info("=" * 60)
+
+    truth = [set(np.argpartition(vectors @ q, -k)[-k:]) for q in queries]
+
+    def evaluate(name, score_fn, memory_bytes, train_sec):
+        approx_hits = rerank_hits = 0
+        latencies = []
+        for q, relevant in zip(queries, truth):
+            started = time.perf_counter()
+            scores = score_fn(q)
+            top = np.argpartition(scores, -candidates)[-candidates:]
+            latencies.append((time.perf_counter() - started) * 1000)
+            approx = top[np.argsort(scores[top])[::-1][:k]]
+            approx_hits += len(relevant & set(approx))
+            # 원본 벡터로 재정렬 (API에서는 recipes.embedding PK 조회)
+            exact = top[np.argsort(vectors[top] @ q)[::-1][:k]]
+            rerank_hits += len(relevant & set(exact))
+        total = k * len(queries)
+        logger.info(f"{name:<12}{memory_bytes / 1024 / 1024:>10.1f}{memory_bytes / n:>10.0f}"
+                    f"{approx_hits / total:>10.3f}{rerank_hits / total:>10.3f}"
+                    f"{percentile(latencies, 50):>10.2f}{percentile(latencies, 99):>10.2f}{train_sec:>10.1f}")
+
+    logger.info(f"{'repr':<12}{'MB':>10}{'B/vec':>10}{'recall':>10}{'rerank':>10}"
+                f"{'p50 ms':>10}{'p99 ms':>10}{'train s':>10}")
+    evaluate('float32', lambda q: vectors @ q, vectors.nbytes, 0.0)
+
+    started = time.perf_counter()
+    sq = ScalarQuantizer().fit(vectors)
+    sq_codes = sq.encode(vectors)
+    evaluate('int8', lambda q: sq.scores(sq_codes, q), sq_codes.nbytes, time.perf_counter() - started)
+
+    for m in parse_int_list(args.pq_m):
+        if dimensions % m:
+            logger.warning(f"⚠️  pq m={m}: {dimensions}차원이 나누어떨어지지 않아 건너뜀")
+            continue
+        started = time.perf_counter()
+        pq = ProductQuantizer(m=m).fit(vectors)
+        pq_codes = pq.encode(vectors)
+        evaluate(f'pq m={m}', lambda q: pq.scores(pq_codes, q), pq_codes.nbytes, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 인덱스 관리 (IVFFlat / HNSW)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('status', help='임베딩 행 수와 현재 인덱스')
+
+    build = subparsers.add_parser('build', help='인덱스 재생성 (데이터 적재 후 실행)')
+    build.add_argument('--method', choices=['ivfflat', 'hnsw'], default='ivfflat')
+    build.add_argument('--lists', type=int, help='IVFFlat lists (기본: 행 수 기준 권장값)')
+    build.add_argument('--m', type=int, default=16, help='HNSW 노드당 연결 수 (기본: 16)')
+    build.add_argument('--ef-construction', type=int, default=64, help='HNSW 빌드 후보 수 (기본: 64)')
+    build.add_argument('--maintenance-work-mem', default='512MB', help='빌드 메모리 (기본: 512MB)')
+
+    benchmark = subparsers.add_parser('benchmark', help='recall@k / 지연 시간 측정')
+    benchmark.add_argument('--k', type=int, default=10)
+    benchmark.add_argument('--queries', type=int, default=100, help='샘플 쿼리 수 (기본: 100)')
+    benchmark.add_argument('--probes', default='1,5,10,20,40', help='IVFFlat probes 목록')
+    benchmark.add_argument('--ef-search', default='20,40,100,200', help='HNSW ef_search 목록')
+
+    snapshot = subparsers.add_parser('snapshot', help='인프로세스 mmap 인덱스 스냅샷 생성')
+    snapshot.add_argument('--nlist', type=int, help='IVF 리스트 수 (기본: VECTOR_INDEX_NLIST, 0이면 전체 스캔)')
+    snapshot.add_argument('--k', type=int, default=10, help='생성 후 recall@k 확인 (0이면 생략)')
+
+    quantization = subparsers.add_parser('quantization', help='int8 / PQ 메모리·재현율 벤치마크')
+    quantization.add_argument('--k', type=int, default=10)
+    quantization.add_argument('--queries', type=int, default=200, help='샘플 쿼리 수 (기본: 200)')
+    quantization.add_argument('--limit', type=int, default=100000, help='로드할 최대 임베딩 수')
+    quantization.add_argument('--pq-m', default='48,96,192', help='PQ 부분공간 수 목록 (벡터당 바이트)')
+    quantization.add_argument('--rerank-factor', type=int, default=4, help='재정렬 후보 = k × factor')
+
+    args = parser.parse_args()
+
+    db_name = os.getenv('DB_NAME', 'recipe_ai_db')
+    db_user = os.getenv('DB_USER', 'recipe_keep')
+
+    db = RecipeDB(db_name, db_user)
+    db.connect()
+    try:
+        commands = {
+            'status': cmd_status,
+            'build': cmd_build,
+            'benchmark': cmd_benchmark,
+            'snapshot': cmd_snapshot,
+            'quantization': cmd_quantization
+        }
+        commands[args.command](db, args)
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
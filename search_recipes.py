@@ -10,6 +10,7 @@ import logging
 from dotenv import load_dotenv
 from src.database import RecipeDB
 from src.vectorizer import RecipeVectorizer
+from src.recipe_detail import format_minutes_korean, format_servings_count_korean
 
 load_dotenv('config/.env')
 
@@ -45,26 +46,10 @@ def search_recipes(query: str, top_k: int = 10, min_similarity: float = 0.0):
     
     # 쿼리를 벡터로 변환
     logger.info(f"🔍 검색 쿼리: '{query}'")
-    query_vector = vectorizer.vectorize(query)
+    query_vector = vectorizer.vectorize_query(query)
     
     # 벡터 검색
-    db.cursor.execute("""
-        SELECT 
-            id, 
-            title, 
-            title_en, 
-            description_en,
-            cooking_time,
-            servings,
-            1 - (embedding <=> %s::vector) as similarity
-        FROM recipes
-        WHERE embedding IS NOT NULL
-          AND 1 - (embedding <=> %s::vector) >= %s
-        ORDER BY embedding <=> %s::vector
-        LIMIT %s
-    """, (query_vector, query_vector, min_similarity, query_vector, top_k))
-    
-    results = db.cursor.fetchall()
+    results = db.search_similar(query_vector, top_k, min_similarity)
     db.close()
     
     return results
@@ -80,11 +65,13 @@ def print_results(results):
     print(f"✅ 검색 결과: {len(results)}개")
     print("=" * 80)
     
-    for i, (recipe_id, title_kr, title_en, desc_en, cooking_time, servings, similarity) in enumerate(results, 1):
+    for i, (recipe_id, title_kr, title_en, desc_en, _, _, similarity,
+            cooking_minutes, servings_count) in enumerate(results, 1):
         print(f"\n{i}. [{recipe_id}] {title_en or title_kr}")
         print(f"   한글: {title_kr}")
         print(f"   설명: {desc_en[:100] if desc_en else 'N/A'}...")
-        print(f"   조리 시간: {cooking_time}분 | 인분: {servings}인분")
+        print(f"   조리 시간: {format_minutes_korean(cooking_minutes)} | "
+              f"인분: {format_servings_count_korean(servings_count)}")
         print(f"   유사도: {similarity:.3f} ({similarity*100:.1f}%)")
     
     print("\n" + "=" * 80)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+채팅 템플릿 빠른 경로
+- 검색 결과가 확실하면 (최고 유사도 / 1·2위 격차가 임계값 이상) LLM 없이 추천 마크다운을 바로 생성
+- LLM 호출 예산(분당 호출 수)을 넘었거나 지연 SLO 안에 응답이 없을 때도 같은 템플릿으로 대체
+- 빠른 경로 사용 비율과 절약한 지연 시간(LLM 평균 지연 - 템플릿 경로 시간) 집계
+"""
+
+import os
+import time
+import logging
+from threading import Lock
+from typing import Dict, List, Optional
+
+from src.embedding_engine import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# 빠른 경로 사유
+FAST_PATH_REASONS = ('confident', 'budget', 'slo')
+
+_PREFERENCE_TIPS = {
+    ('spiciness', 'less'): "맵기를 줄이려면 고춧가루·청양고추를 절반만 넣어 보세요.",
+    ('spiciness', 'more'): "더 맵게 즐기려면 청양고추나 고춧가루를 조금 더해 보세요.",
+    ('saltiness', 'less'): "간장·소금은 레시피의 2/3만 넣고 마지막에 간을 보세요.",
+    ('saltiness', 'more'): "간이 부족하면 마지막에 소금이나 간장으로 조금씩 맞춰 보세요."
+}
+
+
+def render_recommendation(recipes_info: List[Dict], spiciness: Optional[str] = None,
+                          saltiness: Optional[str] = None) -> str:
+    """
+    검색된 레시피 → 추천 마크다운 (LLM 응답과 같은 형식: 섹션 제목, 1~3개 목록, 선택 안내)
+
+    Args:
+        recipes_info: retrieve_chat_recipes 결과 (조리시간/인분은 이미 한국어 표기)
+    """
+    picks = recipes_info[:3]
+    lines = ["### 🍳 추천 레시피", ""]
+    for number, recipe in enumerate(picks, 1):
+        lines.append(f"**{number}. {recipe['title']}**")
+        lines.append(f"- ⏱️ 조리시간: {recipe['cooking_time']} · 🍽️ 분량: {recipe['servings']}")
+        if recipe.get('title_en') and recipe['title_en'] != recipe['title']:
+            lines.append(f"- 🌍 {recipe['title_en']}")
+        lines.append("")
+    tips = [
+        tip for (key, value), tip in _PREFERENCE_TIPS.items()
+        if {'spiciness': spiciness, 'saltiness': saltiness}[key] == value
+    ]
+    if tips:
+        lines.append("### 🧂 취향 팁")
+        lines.extend(f"- {tip}" for tip in tips)
+        lines.append("")
+    choices = '/'.join(f"{number}번" for number in range(1, len(picks) + 1))
+    lines.append(f"원하시면 {choices} 중에 선택해 주세요.")
+    return '\n'.join(lines)
+
+
+class ChatFastPath:
+    """LLM 호출 여부 결정 + 템플릿 렌더링 + 통계"""
+
+    def __init__(self, enabled: bool = False, min_similarity: float = 0.55, min_margin: float = 0.05,
+                 llm_calls_per_minute: float = 0, slo_ms: float = 0):
+        """
+        Args:
+            enabled: True면 확신도 경로 사용 (False면 예산/SLO 대체만)
+            min_similarity: 최고 유사도 임계값
+            min_margin: 1위 - 2위 유사도 격차 임계값 (후보가 1개면 격차 조건은 충족으로 봄)
+            llm_calls_per_minute: 채팅 LLM 분당 호출 예산 (0이면 무제한)
+            slo_ms: LLM 응답(스트리밍은 첫 토큰) 대기 한도 (0이면 무제한)
+        """
+        self.enabled = enabled
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.budget = TokenBucket(llm_calls_per_minute) if llm_calls_per_minute > 0 else None
+        self.slo_ms = slo_ms
+        self._lock = Lock()
+        self._llm_latency_ms: Optional[float] = None
+        self._stats = {'requests': 0, 'llm': 0, 'saved_ms': 0.0, **{reason: 0 for reason in FAST_PATH_REASONS}}
+
+    @classmethod
+    def from_env(cls) -> 'ChatFastPath':
+        """환경변수 기반 생성"""
+        return cls(
+            enabled=os.getenv('CHAT_FAST_PATH', 'false').lower() == 'true',
+            min_similarity=float(os.getenv('CHAT_FAST_PATH_MIN_SIMILARITY', '0.55')),
+            min_margin=float(os.getenv('CHAT_FAST_PATH_MIN_MARGIN', '0.05')),
+            llm_calls_per_minute=float(os.getenv('CHAT_LLM_CALLS_PER_MINUTE', '0')),
+            slo_ms=float(os.getenv('CHAT_LLM_SLO_MS', '0'))
+        )
+
+    @property
+    def slo_seconds(self) -> Optional[float]:
+        """asyncio.wait_for 타임아웃 (None이면 무제한)"""
+        return self.slo_ms / 1000.0 if self.slo_ms > 0 else None
+
+    def confident(self, recipes_info: List[Dict]) -> bool:
+        """
+        검색 결과가 템플릿으로 충분할 만큼 확실한지
+
+        하이브리드 검색은 RRF 순서라 유사도가 내림차순이 아님 → 격차는 유사도 순으로 계산하고,
+        템플릿 1번(검색 순서 1위)이 가장 유사한 레시피일 때만 확실하다고 본다.
+        """
+        similarities = sorted((recipe['similarity'] for recipe in recipes_info), reverse=True)
+        if not similarities or similarities[0] < self.min_similarity:
+            return False
+        if recipes_info[0]['similarity'] < similarities[0]:
+            return False
+        return len(similarities) == 1 or similarities[0] - similarities[1] >= self.min_margin
+
+    def route(self, recipes_info: List[Dict]) -> Optional[str]:
+        """
+        빠른 경로 사유 결정 ('confident' / 'budget'), None이면 LLM 호출 (예산 1회 차감)
+        """
+        with self._lock:
+            self._stats['requests'] += 1
+            if self.enabled and self.confident(recipes_info):
+                return 'confident'
+            if self.budget is not None:
+                now = time.monotonic()
+                if self.budget.wait_time(1, now) > 0:
+                    return 'budget'
+                self.budget.reserve(1, now)
+            return None
+
+    def record_llm(self, seconds: float):
+        """LLM 경로 완료 (지연 시간 EWMA 갱신)"""
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            self._stats['llm'] += 1
+            if self._llm_latency_ms is None:
+                self._llm_latency_ms = elapsed_ms
+            else:
+                self._llm_latency_ms += 0.1 * (elapsed_ms - self._llm_latency_ms)
+
+    def record_fast(self, reason: str, seconds: float):
+        """빠른 경로 완료 (절약 시간 = LLM 평균 지연 - 이번 경로 소요 시간)"""
+        with self._lock:
+            self._stats[reason] += 1
+            if self._llm_latency_ms is not None:
+                self._stats['saved_ms'] += max(0.0, self._llm_latency_ms - seconds * 1000)
+
+    def stats(self) -> Dict:
+        """빠른 경로 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+            llm_latency_ms = self._llm_latency_ms
+        fast = sum(stats[reason] for reason in FAST_PATH_REASONS)
+        stats.update({
+            'fast_path': fast,
+            'fast_path_rate': round(fast / stats['requests'], 3) if stats['requests'] else 0.0,
+            'saved_ms': round(stats['saved_ms'], 1),
+            'llm_latency_ms': round(llm_latency_ms, 1) if llm_latency_ms is not None else None,
+            'min_similarity': self.min_similarity,
+            'min_margin': self.min_margin,
+            'slo_ms': self.slo_ms
+        })
+        return stats
@@ -7,13 +7,115 @@
 """
 
 import os
+import re
+import time
+import asyncio
+import threading
+import functools
 import psycopg2
-from psycopg2.extras import execute_values
+from psycopg2 import errors as pg_errors
+from psycopg2.extras import execute_values, Json
+from psycopg2.pool import ThreadedConnectionPool
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, asynccontextmanager
 import logging
 from typing import List, Dict, Optional
 
+from src.recipe_detail import (
+    build_recipe_detail, parse_duration_minutes, parse_servings_count, normalize_category
+)
+
 logger = logging.getLogger(__name__)
 
+# 임베딩 저장 타입 (halfvec: 16비트 float, 인덱스/테이블 크기 절반, pgvector 0.7+)
+VECTOR_TYPES = ('vector', 'halfvec')
+
+# 벡터 검색 품질 단계 (ivfflat.probes / hnsw.ef_search, 클수록 재현율↑ 지연↑)
+# 인덱스에 맞는 값은 scripts/database/vector_index.py benchmark 로 확인
+SEARCH_QUALITY_TIERS = {
+    'fast': {'probes': 1, 'ef_search': 20},
+    'balanced': {'probes': 10, 'ef_search': 40},
+    'accurate': {'probes': 40, 'ef_search': 200}
+}
+
+# 검색 모드: 벡터만 / pg_trgm 어휘 매칭 + 벡터 RRF 융합 (db/migrations/006_hybrid_search.sql)
+SEARCH_MODES = ('vector', 'hybrid')
+
+# 어휘 매칭에서 뺄 요청 표현 (거의 모든 레시피에 해당하거나 제목/재료에 없는 단어)
+LEXICAL_STOPWORDS = {
+    '레시피', '요리', '추천', '추천해줘', '추천해', '알려줘', '만들기', '방법', '해줘', '먹고',
+    '싶어', '싶은', '있는', '어떤', '간단한', '좀', 'recipe', 'recipes', 'the', 'and', 'with'
+}
+
+
+def lexical_terms(text: str, max_terms: int = 8) -> List[str]:
+    """검색어 → 어휘 매칭 단어 (2글자 이상, 불용어 제외, 순서 유지 중복 제거)"""
+    terms = []
+    for word in re.findall(r'\w+', (text or '').lower()):
+        if len(word) >= 2 and word not in LEXICAL_STOPWORDS and word not in terms:
+            terms.append(word)
+    return terms[:max_terms]
+
+# 레시피 + 재료 + 조리 단계를 하나로 묶은 JSONB 문서 (recipes.document)
+# {cooking_minutes}/{servings_count}: RecipeDB._attribute_columns('r')로 채움 (007 미적용 시 NULL)
+RECIPE_DOCUMENT_SQL = """
+    jsonb_build_object(
+        'id', r.id,
+        'recipe_id', r.recipe_id,
+        'title', r.title,
+        'title_en', r.title_en,
+        'description', r.description,
+        'description_en', r.description_en,
+        'cooking_time', r.cooking_time,
+        'servings', r.servings,
+        'cooking_minutes', {cooking_minutes},
+        'servings_count', {servings_count},
+        'category', r.category,
+        'ingredients', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'name', i.name, 'name_en', i.name_en, 'amount', i.amount
+            ) ORDER BY i.id)
+            FROM ingredients i WHERE i.recipe_id = r.id
+        ), '[]'::jsonb),
+        'cooking_steps', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'step_number', s.step_number, 'description', s.description,
+                'description_en', s.description_en, 'image_url', s.image_url
+            ) ORDER BY s.step_number)
+            FROM cooking_steps s WHERE s.recipe_id = r.id
+        ), '[]'::jsonb)
+    )
+"""
+
+
+class AsyncPooledCursor:
+    """풀 커서 비동기 래퍼 - psycopg2 호출을 전용 스레드풀에서 실행해 이벤트 루프를 막지 않음"""
+    
+    def __init__(self, cursor, executor: ThreadPoolExecutor):
+        self._cursor = cursor
+        self._executor = executor
+    
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+    
+    async def execute(self, query: str, params=None):
+        await self._run(self._cursor.execute, query, params)
+    
+    async def fetchone(self):
+        return await self._run(self._cursor.fetchone)
+    
+    async def fetchall(self):
+        return await self._run(self._cursor.fetchall)
+    
+    async def run(self, fn, *args, **kwargs):
+        """cursor를 받는 동기 함수(RecipeDB 조회 메서드 등)를 DB 스레드에서 실행"""
+        return await self._run(functools.partial(fn, *args, cursor=self._cursor, **kwargs))
+    
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
 
 class RecipeDB:
     """레시피 데이터베이스 관리"""
@@ -23,22 +125,52 @@ class RecipeDB:
         self.user = user
         self.conn = None
         self.cursor = None
+        # 임베딩 컬럼 타입 (쿼리 벡터 캐스팅에 사용, 컬럼 변환은 migrate_embeddings.py)
+        self.vector_type = os.getenv('EMBEDDING_STORAGE', 'vector').lower()
+        if self.vector_type not in VECTOR_TYPES:
+            raise ValueError(f"EMBEDDING_STORAGE must be one of {VECTOR_TYPES}: {self.vector_type}")
+        # 커넥션 풀 모드 (connect_pool 사용 시)
+        self.pool = None
+        self.pool_min_size = 0
+        self.pool_max_size = 0
+        self.acquire_timeout = 5.0
+        self._pool_slots = None
+        self._pool_executor = None
+        # cooking_minutes / servings_count 컬럼 존재 여부 (db/migrations/007, 처음 필요할 때 한 번 확인)
+        self._attribute_columns_available: Optional[bool] = None
+        # recipes.document 컬럼 존재 여부 (db/migrations/004, 처음 필요할 때 한 번 확인)
+        self._document_column_available: Optional[bool] = None
+        # pgvector 0.8+ 반복 인덱스 스캔 지원 여부 (pg_extension.extversion, 처음 필요할 때 한 번 확인)
+        self._iterative_scan_available: Optional[bool] = None
+        self._stats_lock = threading.Lock()
+        self._pool_stats = {
+            'acquired': 0,
+            'in_use': 0,
+            'waited': 0,
+            'timeouts': 0,
+            'discarded': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0
+        }
+    
+    def _connect_params(self) -> Dict:
+        """연결 파라미터: 우선순위 1) DATABASE_URL, 2) 로컬 기본값"""
+        database_url = os.getenv('DATABASE_URL')
+        if database_url:
+            # Railway/클라우드 환경: DATABASE_URL 사용
+            return {'dsn': database_url}
+        # 로컬 개발 환경: 명시적 파라미터 사용
+        return {
+            'host': os.getenv('DB_HOST', 'localhost'),
+            'database': self.db_name,
+            'user': self.user,
+            'password': os.getenv('DB_PASSWORD', '')
+        }
     
     def connect(self):
         """DB 연결: 우선순위 1) DATABASE_URL, 2) 로컬 기본값"""
         try:
-            database_url = os.getenv('DATABASE_URL')
-            if database_url:
-                # Railway/클라우드 환경: DATABASE_URL 사용
-                self.conn = psycopg2.connect(database_url)
-            else:
-                # 로컬 개발 환경: 명시적 파라미터 사용
-                self.conn = psycopg2.connect(
-                    host=os.getenv('DB_HOST', 'localhost'),
-                    database=self.db_name,
-                    user=self.user,
-                    password=os.getenv('DB_PASSWORD', '')
-                )
+            self.conn = psycopg2.connect(**self._connect_params())
             # 트랜잭션 중단 상태가 헬스 체크 등에 영향을 주지 않도록 자동 커밋
             self.conn.autocommit = True
             self.cursor = self.conn.cursor()
@@ -47,19 +179,173 @@ class RecipeDB:
             logger.error(f"❌ DB connection failed: {e}")
             raise
     
+    def connect_pool(self, min_size: Optional[int] = None, max_size: Optional[int] = None,
+                     acquire_timeout: Optional[float] = None):
+        """
+        커넥션 풀 모드 연결 (API 서버용)
+        
+        요청마다 독립된 커넥션/커서를 빌려주므로 동시 요청이 하나의 커넥션에
+        줄 서지 않고, 한 요청의 실패가 다른 요청에 영향을 주지 않는다.
+        
+        Args:
+            min_size: 미리 열어둘 커넥션 수 (기본: DB_POOL_MIN 또는 1)
+            max_size: 최대 커넥션 수 (기본: DB_POOL_MAX 또는 10)
+            acquire_timeout: 커넥션 대기 최대 시간(초) (기본: DB_POOL_TIMEOUT 또는 5)
+        """
+        self.pool_min_size = min_size if min_size is not None else int(os.getenv('DB_POOL_MIN', '1'))
+        self.pool_max_size = max_size if max_size is not None else int(os.getenv('DB_POOL_MAX', '10'))
+        self.acquire_timeout = (acquire_timeout if acquire_timeout is not None
+                                else float(os.getenv('DB_POOL_TIMEOUT', '5')))
+        if self.pool_max_size < max(self.pool_min_size, 1):
+            raise ValueError(f"Invalid pool size: min={self.pool_min_size}, max={self.pool_max_size}")
+        
+        try:
+            self.pool = ThreadedConnectionPool(
+                self.pool_min_size, self.pool_max_size, **self._connect_params()
+            )
+            # 풀 자체는 대기 기능이 없으므로 세마포어로 최대 동시 대여 수와 타임아웃을 관리
+            self._pool_slots = threading.BoundedSemaphore(self.pool_max_size)
+            # 비동기 쿼리 실행 전용 스레드 (대여 중인 커넥션 수를 넘지 않음)
+            self._pool_executor = ThreadPoolExecutor(
+                max_workers=self.pool_max_size, thread_name_prefix='recipe-db'
+            )
+            logger.info(f"✅ Connected to database (pool {self.pool_min_size}~{self.pool_max_size})")
+        except Exception as e:
+            logger.error(f"❌ DB pool creation failed: {e}")
+            raise
+    
+    def _acquire(self, timeout: Optional[float] = None):
+        """풀에서 커넥션 대여 (타임아웃 초과 시 TimeoutError)"""
+        if self.pool is None:
+            raise RuntimeError("Connection pool is not initialized. Call connect_pool() first.")
+        
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        acquired = self._pool_slots.acquire(blocking=False)
+        waited = not acquired
+        if not acquired:
+            acquired = self._pool_slots.acquire(timeout=timeout)
+        wait_ms = (time.perf_counter() - started) * 1000
+        
+        with self._stats_lock:
+            if waited:
+                self._pool_stats['waited'] += 1
+            if not acquired:
+                self._pool_stats['timeouts'] += 1
+            else:
+                self._pool_stats['acquired'] += 1
+                self._pool_stats['in_use'] += 1
+                self._pool_stats['total_wait_ms'] += wait_ms
+                self._pool_stats['max_wait_ms'] = max(self._pool_stats['max_wait_ms'], wait_ms)
+        
+        if not acquired:
+            raise TimeoutError(f"DB pool exhausted: no connection available within {timeout}s")
+        
+        try:
+            conn = self.pool.getconn()
+            if conn.closed:
+                self.pool.putconn(conn, close=True)
+                conn = self.pool.getconn()
+            conn.autocommit = True
+            return conn
+        except Exception:
+            self._release_slot()
+            raise
+    
+    def _release(self, conn):
+        """커넥션 반납 (끊어졌거나 트랜잭션이 남은 커넥션은 정리)"""
+        try:
+            discard = bool(conn.closed)
+            if not discard and conn.status != psycopg2.extensions.STATUS_READY:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+            if discard:
+                with self._stats_lock:
+                    self._pool_stats['discarded'] += 1
+            self.pool.putconn(conn, close=discard)
+        finally:
+            self._release_slot()
+    
+    def _release_slot(self):
+        with self._stats_lock:
+            self._pool_stats['in_use'] -= 1
+        self._pool_slots.release()
+    
+    @contextmanager
+    def pooled_cursor(self, timeout: Optional[float] = None):
+        """요청 단위 커서 (with 블록 종료 시 커넥션 자동 반납)"""
+        conn = self._acquire(timeout)
+        try:
+            with conn.cursor() as cur:
+                yield cur
+        finally:
+            self._release(conn)
+    
+    @asynccontextmanager
+    async def acquire_async(self, timeout: Optional[float] = None):
+        """
+        비동기 요청 단위 커서
+        
+        Usage:
+            async with db.acquire_async() as cur:
+                await cur.execute("SELECT ...", params)
+                rows = await cur.fetchall()
+        """
+        loop = asyncio.get_running_loop()
+        # 대기는 기본 executor에서 수행 (쿼리 전용 스레드를 대기로 점유하지 않도록)
+        conn = await loop.run_in_executor(None, self._acquire, timeout)
+        try:
+            cursor = await loop.run_in_executor(self._pool_executor, conn.cursor)
+            try:
+                yield AsyncPooledCursor(cursor, self._pool_executor)
+            finally:
+                cursor.close()
+        finally:
+            await loop.run_in_executor(self._pool_executor, self._release, conn)
+    
+    def pool_stats(self) -> Dict:
+        """커넥션 풀 사용 통계"""
+        if self.pool is None:
+            return {'enabled': False}
+        with self._stats_lock:
+            stats = dict(self._pool_stats)
+        acquired = stats['acquired']
+        return {
+            'enabled': True,
+            'min_size': self.pool_min_size,
+            'max_size': self.pool_max_size,
+            'in_use': stats['in_use'],
+            'available': self.pool_max_size - stats['in_use'],
+            'acquired': acquired,
+            'waited': stats['waited'],
+            'timeouts': stats['timeouts'],
+            'discarded': stats['discarded'],
+            'avg_wait_ms': round(stats['total_wait_ms'] / acquired, 2) if acquired else 0.0,
+            'max_wait_ms': round(stats['max_wait_ms'], 2),
+            'acquire_timeout': self.acquire_timeout
+        }
+    
     def close(self):
         """연결 종료"""
         if self.cursor:
             self.cursor.close()
         if self.conn:
             self.conn.close()
+        if self._pool_executor:
+            self._pool_executor.shutdown(wait=True)
+            self._pool_executor = None
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
         logger.info("DB connection closed")
     
-    def insert_recipe(self, recipe: Dict) -> Optional[int]:
+    def insert_recipe(self, recipe: Dict, bump_version: bool = True) -> Optional[int]:
         """레시피 삽입 (중복 체크)"""
         try:
             # recipe_id 생성
-            recipe_id = recipe['url'].split('/')[-1] if recipe.get('url') else None
+            recipe_id = self._recipe_key(recipe)
             
             # 중복 체크
             self.cursor.execute(
@@ -74,9 +360,9 @@ class RecipeDB:
             self.cursor.execute("""
                 INSERT INTO recipes (
                     recipe_id, title, title_en, description, description_en,
-                    url, servings, cooking_time, difficulty
+                    url, servings, cooking_time, category, difficulty
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'medium')
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'medium')
                 RETURNING id
             """, (
                 recipe_id,
@@ -86,7 +372,8 @@ class RecipeDB:
                 recipe.get('description_en'),
                 recipe.get('url'),
                 recipe.get('servings'),
-                recipe.get('cooking_time')
+                recipe.get('cooking_time'),
+                normalize_category(recipe.get('category'))
             ))
             
             db_id = self.cursor.fetchone()[0]
@@ -99,7 +386,12 @@ class RecipeDB:
             self._insert_steps(db_id, recipe.get('cooking_steps', []),
                               recipe.get('cooking_steps_en', []))
             
+            # JSONB 레시피 문서 / 한국어 상세 문서 미리 생성
+            self._build_documents([db_id])
+            
             self.conn.commit()
+            if bump_version:
+                self.bump_dataset_version()
             logger.info(f"✅ Inserted recipe ID {db_id}: {recipe.get('title')}")
             return db_id
             
@@ -108,40 +400,1200 @@ class RecipeDB:
             self.conn.rollback()
             return None
     
-    def _insert_ingredients(self, recipe_id: int, ingredients: List, 
-                           ingredients_en: List):
-        """재료 삽입"""
+    def _build_documents(self, recipe_ids: List[int]):
+        """검색 필터 값 / JSONB 레시피 문서 / 한국어 상세 문서 생성 (마이그레이션 미적용 시 건너뜀)"""
+        in_transaction = not self.conn.autocommit
+        if in_transaction:
+            # 실패해도 진행 중인 배치 트랜잭션은 살리도록 세이브포인트 사용
+            self.cursor.execute("SAVEPOINT recipe_documents")
+        try:
+            self.normalize_recipe_attributes(recipe_ids)
+            self.refresh_recipe_documents(recipe_ids)
+            self.build_recipe_details(recipe_ids)
+            if in_transaction:
+                self.cursor.execute("RELEASE SAVEPOINT recipe_documents")
+        except (pg_errors.UndefinedTable, pg_errors.UndefinedColumn) as e:
+            if in_transaction:
+                self.cursor.execute("ROLLBACK TO SAVEPOINT recipe_documents")
+            logger.warning(f"⚠️  Recipe documents not built (apply db/migrations): {e}")
+    
+    @staticmethod
+    def _ingredient_rows(recipe_id: int, ingredients: List, ingredients_en: List) -> List[tuple]:
+        """재료 INSERT 행 생성"""
+        rows = []
         for i, ing in enumerate(ingredients):
             ing_name = ing if isinstance(ing, str) else str(ing)
             ing_en = ingredients_en[i] if i < len(ingredients_en) else ing_name
-            
-            self.cursor.execute("""
-                INSERT INTO ingredients (recipe_id, name, name_en, amount)
-                VALUES (%s, %s, %s, %s)
-            """, (recipe_id, ing_name, ing_en, ing_name))
+            rows.append((recipe_id, ing_name, ing_en, ing_name))
+        return rows
     
-    def _insert_steps(self, recipe_id: int, steps: List, steps_en: List):
-        """조리 단계 삽입"""
+    @staticmethod
+    def _step_rows(recipe_id: int, steps: List, steps_en: List) -> List[tuple]:
+        """조리 단계 INSERT 행 생성"""
+        rows = []
         for i, step in enumerate(steps, 1):
             step_text = step.get('text', '') if isinstance(step, dict) else step
             step_en = steps_en[i-1] if i-1 < len(steps_en) else step_text
             step_img = step.get('image', '') if isinstance(step, dict) else ''
-            
-            self.cursor.execute("""
+            rows.append((recipe_id, i, step_text, step_en, step_img))
+        return rows
+    
+    def _insert_ingredients(self, recipe_id: int, ingredients: List, 
+                           ingredients_en: List):
+        """재료 삽입"""
+        rows = self._ingredient_rows(recipe_id, ingredients, ingredients_en)
+        if rows:
+            execute_values(self.cursor, """
+                INSERT INTO ingredients (recipe_id, name, name_en, amount)
+                VALUES %s
+            """, rows)
+    
+    def _insert_steps(self, recipe_id: int, steps: List, steps_en: List):
+        """조리 단계 삽입"""
+        rows = self._step_rows(recipe_id, steps, steps_en)
+        if rows:
+            execute_values(self.cursor, """
                 INSERT INTO cooking_steps (
                     recipe_id, step_number, description, description_en, image_url
                 )
-                VALUES (%s, %s, %s, %s, %s)
-            """, (recipe_id, i, step_text, step_en, step_img))
+                VALUES %s
+            """, rows)
     
     def insert_batch(self, recipes: List[Dict]) -> int:
-        """배치 삽입"""
-        success = 0
-        for recipe in recipes:
-            if self.insert_recipe(recipe):
-                success += 1
-        logger.info(f"Batch insert complete: {success}/{len(recipes)}")
-        return success
+        """배치 삽입 (대량 삽입 경로 사용)"""
+        stats = self.bulk_insert_recipes(recipes)
+        logger.info(f"Batch insert complete: {stats['inserted']}/{len(recipes)}")
+        return stats['inserted']
+    
+    def bulk_insert_recipes(self, recipes: List[Dict], batch_size: int = 500) -> Dict:
+        """
+        대량 레시피 삽입 (10k~50k 적재용)
+        
+        배치마다 명시적 트랜잭션 하나로:
+        1) INSERT ... ON CONFLICT (recipe_id) DO NOTHING RETURNING 으로 중복 체크 + 삽입
+        2) 새로 들어간 레시피의 재료/조리 단계를 execute_values로 일괄 삽입
+        3) JSONB 문서 / 상세 문서 일괄 생성
+        
+        Args:
+            recipes: 레시피 딕셔너리 리스트 (insert_recipe와 동일 형식)
+            batch_size: 트랜잭션당 레시피 수
+        
+        Returns:
+            {'total', 'inserted', 'skipped', 'failed', 'ingredients', 'steps',
+             'elapsed_sec', 'recipes_per_sec', 'rows_per_sec'}
+        """
+        stats = {
+            'total': len(recipes),
+            'inserted': 0,
+            'skipped': 0,
+            'failed': 0,
+            'ingredients': 0,
+            'steps': 0
+        }
+        started = time.perf_counter()
+        
+        prev_autocommit = self.conn.autocommit
+        self.conn.autocommit = False
+        try:
+            for i in range(0, len(recipes), batch_size):
+                batch = recipes[i:i + batch_size]
+                try:
+                    batch_stats = self._bulk_insert_batch(batch)
+                    self.conn.commit()
+                except Exception as e:
+                    self.conn.rollback()
+                    logger.error(f"❌ Bulk insert batch {i // batch_size + 1} failed: {e}")
+                    # 문제 레시피만 걸러내도록 해당 배치는 한 건씩 다시 삽입
+                    batch_stats = self._insert_one_by_one(batch)
+                for key, value in batch_stats.items():
+                    stats[key] += value
+                logger.info(
+                    f"✅ Bulk batch {i // batch_size + 1}: "
+                    f"+{batch_stats['inserted']} inserted, {batch_stats['skipped']} skipped"
+                )
+        finally:
+            self.conn.autocommit = prev_autocommit
+        
+        # 적재 전체에 대해 한 번만 데이터셋 버전 증가
+        if stats['inserted']:
+            self.bump_dataset_version()
+        
+        elapsed = time.perf_counter() - started
+        total_rows = stats['inserted'] + stats['ingredients'] + stats['steps']
+        stats['elapsed_sec'] = round(elapsed, 3)
+        stats['recipes_per_sec'] = round(stats['inserted'] / elapsed, 1) if elapsed > 0 else 0.0
+        stats['rows_per_sec'] = round(total_rows / elapsed, 1) if elapsed > 0 else 0.0
+        
+        logger.info(
+            f"📦 Bulk insert: {stats['inserted']} inserted, {stats['skipped']} skipped, "
+            f"{stats['failed']} failed ({stats['recipes_per_sec']} recipes/s, {stats['rows_per_sec']} rows/s)"
+        )
+        return stats
+    
+    @staticmethod
+    def _recipe_key(recipe: Dict) -> Optional[str]:
+        """중복 판정용 recipe_id (URL 마지막 경로, URL이 없으면 None - 중복 검사 없이 삽입)"""
+        return recipe['url'].split('/')[-1] if recipe.get('url') else None
+    
+    def _insert_one_by_one(self, batch: List[Dict]) -> Dict:
+        """대량 삽입 실패 배치의 개별 삽입 폴백 (중복은 skipped, 삽입 오류만 failed)"""
+        stats = {'inserted': 0, 'skipped': 0, 'failed': 0, 'ingredients': 0, 'steps': 0}
+        self.conn.autocommit = True
+        try:
+            # insert_recipe는 중복과 오류 모두 None이므로 이미 있는 recipe_id는 미리 구분
+            keys = [key for key in map(self._recipe_key, batch) if key]
+            self.cursor.execute("SELECT recipe_id FROM recipes WHERE recipe_id = ANY(%s)", (keys,))
+            seen = {row[0] for row in self.cursor.fetchall()}
+            for recipe in batch:
+                key = self._recipe_key(recipe)
+                if key and key in seen:
+                    stats['skipped'] += 1
+                    continue
+                if key:
+                    seen.add(key)
+                if self.insert_recipe(recipe, bump_version=False):
+                    stats['inserted'] += 1
+                    stats['ingredients'] += len(recipe.get('ingredients', []))
+                    stats['steps'] += len(recipe.get('cooking_steps', []))
+                else:
+                    stats['failed'] += 1
+        finally:
+            self.conn.autocommit = False
+        return stats
+    
+    def _bulk_insert_batch(self, batch: List[Dict]) -> Dict:
+        """배치 1개 삽입 (트랜잭션은 호출자가 관리)"""
+        stats = {'inserted': 0, 'skipped': 0, 'failed': 0, 'ingredients': 0, 'steps': 0}
+        
+        # recipe_id 기준 배치 내 중복 제거 (먼저 나온 것 우선)
+        # URL이 없는 레시피는 insert_recipe처럼 recipe_id NULL로 중복 검사 없이 삽입
+        by_recipe_id = {}
+        unkeyed = []
+        for recipe in batch:
+            recipe_id = self._recipe_key(recipe)
+            if not recipe_id:
+                unkeyed.append(recipe)
+            elif recipe_id in by_recipe_id:
+                stats['skipped'] += 1
+            else:
+                by_recipe_id[recipe_id] = recipe
+        
+        def recipe_row(recipe_id, recipe):
+            return (
+                recipe_id,
+                recipe.get('title'),
+                recipe.get('title_en'),
+                recipe.get('description'),
+                recipe.get('description_en'),
+                recipe.get('url'),
+                recipe.get('servings'),
+                recipe.get('cooking_time'),
+                normalize_category(recipe.get('category'))
+            )
+        
+        insert_sql = """
+            INSERT INTO recipes (
+                recipe_id, title, title_en, description, description_en,
+                url, servings, cooking_time, category, difficulty
+            )
+            VALUES %s
+            ON CONFLICT (recipe_id) DO NOTHING
+            RETURNING id, recipe_id
+        """
+        template = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, 'medium')"
+        new_recipes = []
+        if by_recipe_id:
+            recipe_rows = [recipe_row(recipe_id, recipe) for recipe_id, recipe in by_recipe_id.items()]
+            inserted = execute_values(self.cursor, insert_sql, recipe_rows, template=template,
+                                      page_size=len(recipe_rows), fetch=True)
+            stats['skipped'] += len(recipe_rows) - len(inserted)
+            new_recipes += [(db_id, by_recipe_id[recipe_id]) for db_id, recipe_id in inserted]
+        for recipe in unkeyed:
+            # RETURNING의 recipe_id로 짝을 맞출 수 없어 한 건씩 (URL 없는 레시피는 드묾)
+            (db_id, _), = execute_values(self.cursor, insert_sql, [recipe_row(None, recipe)],
+                                         template=template, fetch=True)
+            new_recipes.append((db_id, recipe))
+        
+        stats['inserted'] = len(new_recipes)
+        if not new_recipes:
+            return stats
+        
+        ingredient_rows = []
+        step_rows = []
+        for db_id, recipe in new_recipes:
+            ingredient_rows += self._ingredient_rows(
+                db_id, recipe.get('ingredients', []), recipe.get('ingredients_en', [])
+            )
+            step_rows += self._step_rows(
+                db_id, recipe.get('cooking_steps', []), recipe.get('cooking_steps_en', [])
+            )
+        
+        if ingredient_rows:
+            execute_values(self.cursor, """
+                INSERT INTO ingredients (recipe_id, name, name_en, amount)
+                VALUES %s
+            """, ingredient_rows, page_size=1000)
+        if step_rows:
+            execute_values(self.cursor, """
+                INSERT INTO cooking_steps (
+                    recipe_id, step_number, description, description_en, image_url
+                )
+                VALUES %s
+            """, step_rows, page_size=1000)
+        stats['ingredients'] = len(ingredient_rows)
+        stats['steps'] = len(step_rows)
+        
+        self._build_documents([db_id for db_id, _ in new_recipes])
+        return stats
+    
+    def get_dataset_version(self, cursor=None) -> Optional[int]:
+        """현재 데이터셋 버전 (검색 결과 캐시 무효화 기준, 테이블이 없으면 None)"""
+        cur = cursor or self.cursor
+        try:
+            cur.execute("SELECT version FROM dataset_version WHERE id = 1")
+            row = cur.fetchone()
+            return row[0] if row else None
+        except pg_errors.UndefinedTable:
+            cur.connection.rollback()
+            return None
+    
+    def bump_dataset_version(self, cursor=None) -> Optional[int]:
+        """
+        데이터셋 버전 증가 - recipes 테이블 내용(레시피/임베딩/번역)이 바뀐 뒤 호출
+        
+        API 서버의 검색 결과 캐시는 버전이 바뀌면 이전 항목을 자동으로 버린다.
+        """
+        cur = cursor or self.cursor
+        try:
+            cur.execute("""
+                UPDATE dataset_version
+                SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = 1
+                RETURNING version
+            """)
+            row = cur.fetchone()
+            cur.connection.commit()
+            return row[0] if row else None
+        except pg_errors.UndefinedTable:
+            cur.connection.rollback()
+            logger.warning("⚠️  dataset_version table missing (run db/migrations/002_dataset_version.sql)")
+            return None
+    
+    def search_params(self, quality: Optional[str] = None, probes: Optional[int] = None,
+                      ef_search: Optional[int] = None) -> Dict:
+        """
+        검색 품질 파라미터 결정 (명시값 > 품질 단계 > VECTOR_SEARCH_QUALITY 기본 단계)
+        
+        Returns:
+            {'probes': int, 'ef_search': int}
+        """
+        tier = quality or os.getenv('VECTOR_SEARCH_QUALITY', 'balanced')
+        if tier not in SEARCH_QUALITY_TIERS:
+            raise ValueError(f"Unknown search quality '{tier}' (choose from {list(SEARCH_QUALITY_TIERS)})")
+        params = dict(SEARCH_QUALITY_TIERS[tier])
+        if probes:
+            params['probes'] = probes
+        if ef_search:
+            params['ef_search'] = ef_search
+        return params
+    
+    def has_attribute_columns(self, cursor=None) -> bool:
+        """
+        recipes.cooking_minutes / servings_count 컬럼 존재 여부 (db/migrations/007_recipe_filters.sql)
+        
+        없으면 검색 결과의 두 값은 NULL, 조리시간/인분 필터는 무시 (카테고리 필터는 기본 스키마 컬럼)
+        """
+        if self._attribute_columns_available is None:
+            cur = cursor or self.cursor
+            cur.execute("""
+                SELECT COUNT(*) FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'recipes'
+                  AND column_name IN ('cooking_minutes', 'servings_count')
+            """)
+            self._attribute_columns_available = cur.fetchone()[0] == 2
+            if not self._attribute_columns_available:
+                logger.warning("⚠️  recipes.cooking_minutes/servings_count missing: duration/servings filters "
+                               "disabled (run db/migrations/007_recipe_filters.sql)")
+        return self._attribute_columns_available
+    
+    def missing_columns(self, table: str, columns: List[str], cursor=None) -> List[str]:
+        """table에 없는 컬럼 (마이그레이션 적용 여부 확인용, 입력 순서 유지)"""
+        cur = cursor or self.cursor
+        cur.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s AND column_name = ANY(%s)
+        """, (table, list(columns)))
+        present = {row[0] for row in cur.fetchall()}
+        return [column for column in columns if column not in present]
+    
+    def has_hybrid_search(self, cursor=None) -> bool:
+        """하이브리드 검색 준비 여부 (db/migrations/006_hybrid_search.sql: pg_trgm + recipe_search_text)"""
+        cur = cursor or self.cursor
+        cur.execute("""
+            SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')
+               AND EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'recipe_search_text')
+        """)
+        return bool(cur.fetchone()[0])
+    
+    def supports_iterative_scan(self, cursor=None) -> bool:
+        """
+        pgvector 0.8+ 여부 (hnsw.iterative_scan / ivfflat.iterative_scan 설정 지원)
+        
+        이전 버전에서 SET LOCAL은 확장 라이브러리가 아직 로드되지 않은 백엔드면 오류 없이 무시되므로
+        (페이지가 조용히 짧아짐) 설정 대신 설치된 확장 버전으로 판단한다.
+        """
+        if self._iterative_scan_available is None:
+            cur = cursor or self.cursor
+            cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            row = cur.fetchone()
+            version = tuple(int(part) for part in re.findall(r'\d+', row[0])[:2]) if row else ()
+            self._iterative_scan_available = version >= (0, 8)
+            if not self._iterative_scan_available:
+                logger.warning(f"⚠️  pgvector {row[0] if row else '(not installed)'} < 0.8: iterative index scan "
+                               f"disabled, cursor pages use exact scan")
+        return self._iterative_scan_available
+    
+    def _attribute_columns(self, alias: str = '', cursor=None) -> Dict[str, str]:
+        """SELECT 식: 컬럼이 있으면 컬럼, 없으면 같은 타입의 NULL"""
+        if self.has_attribute_columns(cursor):
+            prefix = f"{alias}." if alias else ''
+            return {'cooking_minutes': f"{prefix}cooking_minutes", 'servings_count': f"{prefix}servings_count"}
+        return {'cooking_minutes': "NULL::integer", 'servings_count': "NULL::smallint"}
+    
+    def _supported_filters(self, filters: Optional[Dict], cursor=None) -> Optional[Dict]:
+        """마이그레이션 007 미적용이면 조리시간/인분 필터 제외"""
+        if not filters or self.has_attribute_columns(cursor):
+            return filters
+        return {key: value for key, value in filters.items() if key not in ('max_minutes', 'servings')}
+    
+    @staticmethod
+    def filter_conditions(filters: Optional[Dict], alias: str = '') -> tuple:
+        """
+        구조화 필터 → SQL 조건 (인덱스 컬럼 cooking_minutes / servings_count / category)
+        
+        Args:
+            filters: {'max_minutes': int, 'servings': int, 'category': str} (None 값은 무시)
+        
+        Returns:
+            (' AND ...' 조건 문자열, 파라미터 리스트)
+        """
+        prefix = f"{alias}." if alias else ''
+        conditions = []
+        params = []
+        filters = filters or {}
+        if filters.get('max_minutes'):
+            conditions.append(f"{prefix}cooking_minutes <= %s")
+            params.append(int(filters['max_minutes']))
+        if filters.get('servings'):
+            conditions.append(f"{prefix}servings_count = %s")
+            params.append(int(filters['servings']))
+        if filters.get('category'):
+            conditions.append(f"{prefix}category = %s")
+            params.append(filters['category'])
+        return ''.join(f" AND {c}" for c in conditions), params
+    
+    def _scan_settings(self, params: Dict, filtered: bool, exact: bool = False, paged: bool = False,
+                       iterative_supported: bool = True) -> str:
+        """
+        검색 전 SET LOCAL 문 (필터/커서가 있으면 pgvector 0.8+ 반복 스캔으로 top-k 부족 방지)
+        
+        커서 페이지(paged)는 VECTOR_ITERATIVE_SCAN 설정과 관계없이 반복 스캔을 켠다
+        (커서 조건은 인덱스 스캔 뒤에 걸러지므로, 끄면 ef_search/probes 후보를 넘는 페이지가 비어 버림).
+        iterative_supported=False(pgvector 0.8 미만)면 반복 스캔 설정을 보내지 않는다.
+        """
+        settings = f"SET LOCAL ivfflat.probes = {int(params['probes'])}; " \
+                   f"SET LOCAL hnsw.ef_search = {int(params['ef_search'])};"
+        iterative = os.getenv('VECTOR_ITERATIVE_SCAN', '') if iterative_supported else ''
+        if paged and iterative_supported and iterative not in ('relaxed_order', 'strict_order'):
+            # HNSW는 순서를 지키는 strict_order (커서 경계 앞뒤로 순위가 뒤섞이지 않게), IVFFlat은 relaxed_order만 지원
+            iterative = 'strict_order'
+        if (filtered or paged) and not exact and iterative in ('relaxed_order', 'strict_order'):
+            settings += f" SET LOCAL hnsw.iterative_scan = {iterative};"
+            settings += " SET LOCAL ivfflat.iterative_scan = relaxed_order;"
+        if exact:
+            settings += " SET LOCAL enable_indexscan = off;"
+        return settings
+    
+    def search_similar(self, query_vector: List[float], limit: int = 10,
+                       min_similarity: float = 0.0, cursor=None,
+                       quality: Optional[str] = None, probes: Optional[int] = None,
+                       ef_search: Optional[int] = None, exact: bool = False,
+                       filters: Optional[Dict] = None, after: Optional[tuple] = None) -> List[tuple]:
+        """
+        벡터 유사도 검색
+        
+        Args:
+            quality: 품질 단계 (fast / balanced / accurate)
+            probes: IVFFlat 탐색 리스트 수 (품질 단계 값 대신)
+            ef_search: HNSW 탐색 후보 수 (품질 단계 값 대신)
+            exact: True면 인덱스 없이 정확 검색 (재현율 측정 기준)
+            filters: 구조화 필터 (filter_conditions 참고, 벡터 스캔과 같은 쿼리에서 적용)
+            after: 이전 페이지 마지막 행 (similarity, id) - 그 다음 순위부터 (keyset 페이지네이션)
+                   OFFSET처럼 앞 페이지 행을 정렬/전송하지는 않지만, 인덱스 반복 스캔(pgvector 0.8+)이
+                   커서 이전 후보를 다시 훑고 건너뛰므로 깊은 페이지일수록 비용이 커진다 (페이지당 비용 일정 아님).
+                   pgvector 0.8 미만이면 정확 검색 (페이지마다 전체 스캔, 페이지가 잘리지 않음)
+        
+        Returns:
+            (id, title, title_en, description_en, cooking_time, servings, similarity,
+             cooking_minutes, servings_count) 리스트 (유사도 내림차순, 동률은 id 순)
+        """
+        cur = cursor or self.cursor
+        params = self.search_params(quality, probes, ef_search)
+        where, filter_params = self.filter_conditions(self._supported_filters(filters, cur))
+        filtered = bool(filter_params)
+        attributes = self._attribute_columns(cursor=cur)
+        if after is not None:
+            # 결과와 같은 식(1 - 거리)으로 비교해 float 오차 없이 이어감, 인덱스 스캔 순서는 그대로
+            where += (f" AND (1 - (embedding <=> %s::{self.vector_type}) < %s"
+                      f" OR (1 - (embedding <=> %s::{self.vector_type}) = %s AND id > %s))")
+            filter_params += [query_vector, after[0], query_vector, after[0], after[1]]
+        iterative_supported = self.supports_iterative_scan(cur)
+        if after is not None and not iterative_supported:
+            # 반복 스캔 없이 인덱스로 찾으면 ef_search/probes 후보를 넘는 페이지가 비어 버림
+            exact = True
+        # SET LOCAL + SELECT를 한 번에 보내 같은 (암묵적) 트랜잭션 안에서만 적용
+        settings = self._scan_settings(params, filtered, exact, paged=after is not None,
+                                       iterative_supported=iterative_supported)
+        # 거리는 한 번만 계산 (정렬/LIMIT은 인덱스 스캔, 임계값은 top-k에만 적용)
+        # 바깥 ORDER BY는 relaxed_order 반복 스캔(IVFFlat)의 순서 뒤섞임을 바로잡음
+        query = f"""
+            SELECT
+                id,
+                title,
+                title_en,
+                description_en,
+                cooking_time,
+                servings,
+                1 - distance AS similarity,
+                cooking_minutes,
+                servings_count
+            FROM (
+                SELECT id, title, title_en, description_en, cooking_time, servings,
+                       {attributes['cooking_minutes']} AS cooking_minutes,
+                       {attributes['servings_count']} AS servings_count,
+                       embedding <=> %s::{self.vector_type} AS distance
+                FROM recipes
+                WHERE embedding IS NOT NULL{where}
+                ORDER BY distance
+                LIMIT %s
+            ) AS nearest
+            WHERE 1 - distance >= %s
+            ORDER BY distance, id
+        """
+        cur.execute(f"{settings}\n{query}", (query_vector, *filter_params, limit, min_similarity))
+        return cur.fetchall()
+    
+    def hybrid_search(self, query_vector: List[float], query_text: str, limit: int = 10,
+                      min_similarity: float = 0.0, cursor=None,
+                      quality: Optional[str] = None, probes: Optional[int] = None,
+                      ef_search: Optional[int] = None, filters: Optional[Dict] = None) -> List[tuple]:
+        """
+        하이브리드 검색 - pg_trgm 어휘 후보 + 벡터 후보를 RRF(reciprocal-rank fusion)로 합침 (쿼리 1회)
+        
+        제목/영문 제목/재료명에 검색어가 들어 있는 레시피는 임베딩 유사도가 낮아도 상위로 올라온다.
+        min_similarity는 벡터로만 찾은 후보에만 적용.
+        
+        Args:
+            query_text: 어휘 매칭용 원문 (취향 문구 등 덧붙이기 전 사용자 입력)
+            filters: 구조화 필터 (두 후보 목록 모두에 적용)
+        
+        Returns:
+            (id, title, title_en, description_en, cooking_time, servings, similarity,
+             cooking_minutes, servings_count) 리스트 (RRF 점수 순)
+        """
+        cur = cursor or self.cursor
+        params = self.search_params(quality, probes, ef_search)
+        candidates = max(limit, int(os.getenv('HYBRID_CANDIDATES', '50')))
+        rrf_k = int(os.getenv('HYBRID_RRF_K', '60'))
+        threshold = float(os.getenv('HYBRID_WORD_SIMILARITY', '0.5'))
+        filters = self._supported_filters(filters, cur)
+        where, filter_params = self.filter_conditions(filters)
+        lexical_where, _ = self.filter_conditions(filters, alias='r')
+        attributes = self._attribute_columns('r', cur)
+        settings = self._scan_settings(params, bool(filter_params),
+                                       iterative_supported=self.supports_iterative_scan(cur))
+        try:
+            cur.execute(f"""
+                {settings}
+                SET LOCAL pg_trgm.word_similarity_threshold = %s;
+                WITH semantic AS (
+                    SELECT id, 1 - distance AS similarity,
+                           ROW_NUMBER() OVER (ORDER BY distance) AS rank
+                    FROM (
+                        SELECT id, embedding <=> %s::{self.vector_type} AS distance
+                        FROM recipes
+                        WHERE embedding IS NOT NULL{where}
+                        ORDER BY distance
+                        LIMIT %s
+                    ) AS nearest
+                ),
+                lexical AS (
+                    SELECT id, ROW_NUMBER() OVER (ORDER BY score DESC, id) AS rank
+                    FROM (
+                        -- 단어별 GIN 트라이그램 인덱스 조회, 여러 단어가 맞을수록 점수↑
+                        SELECT r.id, SUM(word_similarity(t.term, recipe_search_text(r.document))) AS score
+                        FROM unnest(%s::text[]) AS t(term)
+                        JOIN recipes r ON t.term <%% recipe_search_text(r.document){lexical_where}
+                        GROUP BY r.id
+                        ORDER BY score DESC, r.id
+                        LIMIT %s
+                    ) AS matched
+                ),
+                fused AS (
+                    SELECT COALESCE(s.id, l.id) AS id,
+                           s.similarity,
+                           l.rank IS NOT NULL AS lexical_hit,
+                           COALESCE(1.0 / (%s + s.rank), 0) + COALESCE(1.0 / (%s + l.rank), 0) AS rrf
+                    FROM semantic s
+                    FULL OUTER JOIN lexical l ON l.id = s.id
+                )
+                SELECT r.id, r.title, r.title_en, r.description_en, r.cooking_time, r.servings,
+                       COALESCE(f.similarity, 1 - (r.embedding <=> %s::{self.vector_type}), 0) AS similarity,
+                       {attributes['cooking_minutes']} AS cooking_minutes,
+                       {attributes['servings_count']} AS servings_count
+                FROM fused f
+                JOIN recipes r ON r.id = f.id
+                WHERE f.lexical_hit OR f.similarity >= %s
+                ORDER BY f.rrf DESC, r.id
+                LIMIT %s
+            """, (threshold,
+                  query_vector, *filter_params, candidates,
+                  lexical_terms(query_text), *filter_params, candidates,
+                  rrf_k, rrf_k, query_vector, min_similarity, limit))
+            return cur.fetchall()
+        except (pg_errors.UndefinedFunction, pg_errors.UndefinedObject) as e:
+            cur.connection.rollback()
+            logger.warning(f"⚠️  Hybrid search unavailable, using vector search "
+                           f"(run db/migrations/006_hybrid_search.sql): {e}")
+            return self.search_similar(query_vector, limit, min_similarity, cursor=cur,
+                                       filters=filters, **params)
+    
+    def rerank_by_ids(self, query_vector: List[float], recipe_ids: List[int], limit: int = 10,
+                      min_similarity: float = 0.0, cursor=None) -> List[tuple]:
+        """
+        후보 레시피만 원본 임베딩으로 정확히 재정렬 (양자화 인덱스 후처리, PK 조회)
+        
+        Returns:
+            [(id, similarity), ...] 유사도 내림차순
+        """
+        if not recipe_ids:
+            return []
+        cur = cursor or self.cursor
+        cur.execute(f"""
+            SELECT id, 1 - distance AS similarity
+            FROM (
+                SELECT id, embedding <=> %s::{self.vector_type} AS distance
+                FROM recipes
+                WHERE id = ANY(%s) AND embedding IS NOT NULL
+            ) AS candidates
+            WHERE 1 - distance >= %s
+            ORDER BY distance
+            LIMIT %s
+        """, (query_vector, list(recipe_ids), min_similarity, limit))
+        return cur.fetchall()
+    
+    def build_recipe_details(self, recipe_ids: Optional[List[int]] = None,
+                             only_missing: bool = False, batch_size: int = 200,
+                             cursor=None) -> int:
+        """
+        한국어 레시피 상세 문서 생성/갱신 (recipe_details 테이블)
+        
+        Args:
+            recipe_ids: 대상 레시피 id (None이면 전체)
+            only_missing: True면 문서가 없는 레시피만
+            batch_size: 한 번에 처리할 레시피 수
+        
+        Returns:
+            생성/갱신한 문서 수
+        """
+        cur = cursor or self.cursor
+        conditions = []
+        params = []
+        if recipe_ids is not None:
+            if not recipe_ids:
+                return 0
+            conditions.append("r.id = ANY(%s)")
+            params.append(list(recipe_ids))
+        if only_missing:
+            conditions.append("NOT EXISTS (SELECT 1 FROM recipe_details d WHERE d.recipe_id = r.id)")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cur.execute(f"SELECT r.id FROM recipes r {where} ORDER BY r.id", params)
+        target_ids = [row[0] for row in cur.fetchall()]
+        
+        built = 0
+        for i in range(0, len(target_ids), batch_size):
+            chunk = target_ids[i:i + batch_size]
+            rows = []
+            for recipe_id, detail in self._compose_recipe_details(chunk, cur).items():
+                rows.append((
+                    recipe_id,
+                    Json(detail['ingredients']),
+                    Json(detail['cooking_steps']),
+                    Json(detail['ingredient_groups']),
+                    Json(detail['step_groups']),
+                    detail['markdown']
+                ))
+            execute_values(cur, """
+                INSERT INTO recipe_details (
+                    recipe_id, ingredients, cooking_steps, ingredient_groups, step_groups, markdown
+                )
+                VALUES %s
+                ON CONFLICT (recipe_id) DO UPDATE SET
+                    ingredients = EXCLUDED.ingredients,
+                    cooking_steps = EXCLUDED.cooking_steps,
+                    ingredient_groups = EXCLUDED.ingredient_groups,
+                    step_groups = EXCLUDED.step_groups,
+                    markdown = EXCLUDED.markdown,
+                    built_at = CURRENT_TIMESTAMP
+            """, rows)
+            built += len(rows)
+        return built
+    
+    @staticmethod
+    def _compose_recipe_details(recipe_ids: List[int], cur) -> Dict[int, Dict]:
+        """레시피/재료/조리 단계 조인 → 한국어 상세 문서 (저장하지 않음)"""
+        cur.execute("""
+            SELECT r.id, r.title, r.cooking_time, r.servings,
+                   COALESCE((SELECT array_agg(name ORDER BY id)
+                             FROM ingredients WHERE recipe_id = r.id), '{}'),
+                   COALESCE((SELECT array_agg(description ORDER BY step_number)
+                             FROM cooking_steps WHERE recipe_id = r.id), '{}')
+            FROM recipes r
+            WHERE r.id = ANY(%s)
+        """, (list(recipe_ids),))
+        return {
+            recipe_id: build_recipe_detail(title, cooking_time, servings, ingredients, steps)
+            for recipe_id, title, cooking_time, servings, ingredients, steps in cur.fetchall()
+        }
+    
+    def refresh_recipe_documents(self, recipe_ids: Optional[List[int]] = None,
+                                 only_missing: bool = False, cursor=None) -> int:
+        """
+        JSONB 레시피 문서(recipes.document) 재생성 - 레시피/재료/조리 단계가 바뀐 뒤 호출
+        
+        Args:
+            recipe_ids: 대상 레시피 id (None이면 전체)
+            only_missing: True면 문서가 없는 레시피만
+        
+        Returns:
+            갱신된 레시피 수
+        """
+        cur = cursor or self.cursor
+        conditions = []
+        params = []
+        if recipe_ids is not None:
+            if not recipe_ids:
+                return 0
+            conditions.append("r.id = ANY(%s)")
+            params.append(list(recipe_ids))
+        if only_missing:
+            conditions.append("r.document IS NULL")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        document_sql = RECIPE_DOCUMENT_SQL.format(**self._attribute_columns('r', cur))
+        cur.execute(f"UPDATE recipes r SET document = {document_sql} {where}", params)
+        return cur.rowcount
+    
+    def normalize_recipe_attributes(self, recipe_ids: Optional[List[int]] = None,
+                                    only_missing: bool = False, batch_size: int = 1000,
+                                    cursor=None) -> List[int]:
+        """
+        조리시간/인분 원문 → 검색 필터용 숫자 컬럼 (cooking_minutes, servings_count) 채우기
+        
+        Args:
+            recipe_ids: 대상 레시피 id (None이면 전체)
+            only_missing: True면 숫자 값이 비어 있는 레시피만
+        
+        Returns:
+            값이 바뀐 레시피 id 목록 (JSONB 문서 갱신 대상, 007 미적용이면 빈 목록)
+        """
+        cur = cursor or self.cursor
+        if not self.has_attribute_columns(cur):
+            return []
+        conditions = []
+        params = []
+        if recipe_ids is not None:
+            if not recipe_ids:
+                return []
+            conditions.append("id = ANY(%s)")
+            params.append(list(recipe_ids))
+        if only_missing:
+            conditions.append("(cooking_minutes IS NULL OR servings_count IS NULL)")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cur.execute(f"""
+            SELECT id, cooking_time, servings, cooking_minutes, servings_count
+            FROM recipes {where}
+            ORDER BY id
+        """, params)
+        rows = []
+        for recipe_id, cooking_time, servings, old_minutes, old_count in cur.fetchall():
+            minutes = parse_duration_minutes(cooking_time)
+            count = parse_servings_count(servings)
+            if (minutes, count) != (old_minutes, old_count):
+                rows.append((recipe_id, minutes, count))
+        for i in range(0, len(rows), batch_size):
+            execute_values(cur, """
+                UPDATE recipes r
+                SET cooking_minutes = v.cooking_minutes, servings_count = v.servings_count
+                FROM (VALUES %s) AS v (id, cooking_minutes, servings_count)
+                WHERE r.id = v.id
+            """, rows[i:i + batch_size], template="(%s, %s::integer, %s::smallint)")
+        return [row[0] for row in rows]
+    
+    def update_recipe_categories(self, rows: List[tuple], cursor=None) -> List[int]:
+        """
+        수집 원본(JSON)의 카테고리로 recipes.category 백필 (기존 값이 없는 레시피만)
+        
+        Args:
+            rows: [(recipe_id(사이트 id), category), ...]
+        
+        Returns:
+            갱신된 레시피 id 목록
+        """
+        rows = [(rid, normalize_category(category)) for rid, category in rows]
+        rows = [row for row in rows if row[0] and row[1]]
+        if not rows:
+            return []
+        cur = cursor or self.cursor
+        updated = execute_values(cur, """
+            UPDATE recipes r
+            SET category = v.category
+            FROM (VALUES %s) AS v (recipe_id, category)
+            WHERE r.recipe_id = v.recipe_id AND r.category IS NULL
+            RETURNING r.id
+        """, rows, page_size=1000, fetch=True)
+        return [row[0] for row in updated]
+    
+    def list_categories(self, cursor=None) -> List[str]:
+        """저장된 레시피 카테고리 목록 (채팅 필터 인식용)"""
+        cur = cursor or self.cursor
+        cur.execute("SELECT DISTINCT category FROM recipes WHERE category IS NOT NULL ORDER BY category")
+        return [row[0] for row in cur.fetchall()]
+    
+    def get_chat_session(self, user_id: str, idle_seconds: float = 0, cursor=None) -> Optional[tuple]:
+        """
+        채팅 세션 조회 (db/migrations/008_chat_sessions.sql, 기본키 1건)
+        
+        Args:
+            idle_seconds: 유휴 TTL(초) - 마지막 저장 후 이보다 오래된 세션은 없는 것으로 봄 (0이면 무제한)
+        
+        Returns:
+            (압축 대화 내역, 취향, version) 또는 None
+        """
+        cur = cursor or self.cursor
+        try:
+            cur.execute("""
+                SELECT history, prefs, version
+                FROM chat_sessions
+                WHERE user_id = %s
+                  AND (%s <= 0 OR updated_at > CURRENT_TIMESTAMP - %s * INTERVAL '1 second')
+            """, (user_id, idle_seconds, idle_seconds))
+            return cur.fetchone()
+        except pg_errors.UndefinedTable:
+            cur.connection.rollback()
+            logger.warning("⚠️  chat_sessions table missing (run db/migrations/008_chat_sessions.sql)")
+            return None
+    
+    def save_chat_session(self, user_id: str, history: List, prefs: Dict, expected_version: int = 0,
+                          idle_seconds: float = 0, cursor=None) -> Optional[int]:
+        """
+        채팅 세션 저장 (낙관적 동시성 제어: 읽은 뒤 다른 요청이 저장했으면 저장하지 않음)
+        
+        Args:
+            expected_version: get_chat_session으로 읽은 version (0이면 새 세션 - 없거나 유휴 TTL이 지난 행만 덮어씀)
+            idle_seconds: 유휴 TTL(초, get_chat_session과 같은 값)
+        
+        Returns:
+            저장된 새 version, 충돌(다른 요청이 먼저 저장)이면 None, 테이블이 없으면 0
+        """
+        cur = cursor or self.cursor
+        try:
+            if expected_version:
+                cur.execute("""
+                    UPDATE chat_sessions
+                    SET history = %s, prefs = %s, version = version + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE user_id = %s AND version = %s
+                    RETURNING version
+                """, (Json(history), Json(prefs), user_id, expected_version))
+            else:
+                cur.execute("""
+                    INSERT INTO chat_sessions (user_id, history, prefs, version, updated_at)
+                    VALUES (%s, %s, %s, 1, CURRENT_TIMESTAMP)
+                    ON CONFLICT (user_id) DO UPDATE
+                    SET history = EXCLUDED.history, prefs = EXCLUDED.prefs,
+                        version = chat_sessions.version + 1, updated_at = EXCLUDED.updated_at
+                    WHERE %s > 0 AND chat_sessions.updated_at <= CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+                    RETURNING version
+                """, (user_id, Json(history), Json(prefs), idle_seconds, idle_seconds))
+            row = cur.fetchone()
+            return row[0] if row else None
+        except pg_errors.UndefinedTable:
+            cur.connection.rollback()
+            logger.warning("⚠️  chat_sessions table missing (run db/migrations/008_chat_sessions.sql)")
+            return 0
+    
+    def purge_chat_sessions(self, idle_seconds: float = 0, max_sessions: int = 0, cursor=None) -> Dict:
+        """
+        유휴 TTL이 지난 세션과 최대 세션 수를 넘는 오래된 세션 삭제
+        
+        Returns:
+            {'expired': int, 'evicted': int, 'sessions': int, 'bytes': int}
+        """
+        cur = cursor or self.cursor
+        result = {'expired': 0, 'evicted': 0, 'sessions': 0, 'bytes': 0}
+        try:
+            if idle_seconds > 0:
+                cur.execute("""
+                    DELETE FROM chat_sessions
+                    WHERE updated_at <= CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+                """, (idle_seconds,))
+                result['expired'] = cur.rowcount
+            if max_sessions > 0:
+                cur.execute("""
+                    DELETE FROM chat_sessions
+                    WHERE user_id IN (
+                        SELECT user_id FROM chat_sessions
+                        ORDER BY updated_at DESC
+                        OFFSET %s
+                    )
+                """, (max_sessions,))
+                result['evicted'] = cur.rowcount
+            cur.execute("""
+                SELECT COUNT(*), COALESCE(SUM(pg_column_size(history) + pg_column_size(prefs)), 0)
+                FROM chat_sessions
+            """)
+            result['sessions'], result['bytes'] = cur.fetchone()
+            return result
+        except pg_errors.UndefinedTable:
+            cur.connection.rollback()
+            logger.warning("⚠️  chat_sessions table missing (run db/migrations/008_chat_sessions.sql)")
+            return result
+    
+    def has_document_column(self, cursor=None) -> bool:
+        """recipes.document 컬럼 존재 여부 (db/migrations/004_recipe_document.sql)"""
+        if self._document_column_available is None:
+            self._document_column_available = not self.missing_columns('recipes', ['document'], cursor)
+            if not self._document_column_available:
+                logger.warning("⚠️  recipes.document missing: recipe documents are joined on read "
+                               "(run db/migrations/004_recipe_document.sql)")
+        return self._document_column_available
+    
+    def get_recipes_by_ids(self, ids: List[int], exclude: Optional[List[str]] = None,
+                           cursor=None) -> List[Dict]:
+        """
+        JSONB 레시피 문서 일괄 조회 (쿼리 1회, 입력 id 순서 유지, 읽기 전용)
+        
+        문서가 아직 없는 레시피(백필 전, 004 미적용)는 재료/조리 단계를 조인해 그 자리에서 만들어 반환하고
+        저장하지 않는다 (문서 저장은 수집/백필 경로에서만).
+        
+        Args:
+            ids: 레시피 id 목록
+            exclude: 문서에서 뺄 최상위 키 (예: ['cooking_steps'] - 목록 화면용)
+        
+        Returns:
+            레시피 문서 리스트 (존재하지 않는 id는 제외)
+        """
+        if not ids:
+            return []
+        cur = cursor or self.cursor
+        joined = RECIPE_DOCUMENT_SQL.format(**self._attribute_columns('r', cur))
+        document = f"COALESCE(r.document, {joined})" if self.has_document_column(cur) else joined
+        cur.execute(f"""
+            SELECT r.id, {document} - %s::text[]
+            FROM recipes r
+            WHERE r.id = ANY(%s)
+        """, (list(exclude or []), list(ids)))
+        docs = {row[0]: row[1] for row in cur.fetchall()}
+        return [docs[rid] for rid in ids if docs.get(rid) is not None]
+    
+    def iter_recipe_documents(self, chunk_size: int = 500, after_id: int = 0,
+                              only_missing_embedding: bool = True, cursor=None):
+        """
+        레시피 문서를 청크 단위로 스트리밍 (id > 마지막 id LIMIT n 페이지 조회, 전체를 메모리에 올리지 않음)
+        
+        청크마다 기본키 범위 조회 1회라 자동 커밋 연결에서도 결과 전체를 미리 만들지 않고,
+        청크 사이에 저장/커밋해도 커서가 무효화되지 않는다.
+        
+        Args:
+            chunk_size: 청크당 레시피 수
+            after_id: 이 id 이후부터 (체크포인트 재개용)
+            only_missing_embedding: True면 embedding IS NULL 인 레시피만
+        
+        Yields:
+            [(id, title, document, embedding_text_hash, embedding_model, has_embedding), ...] 청크
+        """
+        cur = cursor or self.cursor
+        query = f"""
+            SELECT id, title, document, embedding_text_hash, embedding_model,
+                   embedding IS NOT NULL AS has_embedding
+            FROM recipes
+            WHERE id > %s
+              {"AND embedding IS NULL" if only_missing_embedding else ""}
+            ORDER BY id
+            LIMIT %s
+        """
+        while True:
+            cur.execute(query, (after_id, chunk_size))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            after_id = rows[-1][0]
+            yield rows
+    
+    def update_embeddings(self, rows: List[tuple], cursor=None) -> int:
+        """
+        임베딩 일괄 업데이트 (UPDATE ... FROM (VALUES ...) 1회)
+        
+        Args:
+            rows: [(recipe_id, embedding, text_hash, model), ...]
+        
+        Returns:
+            업데이트된 행 수
+        """
+        if not rows:
+            return 0
+        cur = cursor or self.cursor
+        execute_values(cur, """
+            UPDATE recipes AS r
+            SET embedding = v.embedding,
+                embedding_text_hash = v.text_hash,
+                embedding_model = v.model
+            FROM (VALUES %s) AS v(id, embedding, text_hash, model)
+            WHERE r.id = v.id
+        """, rows, template=f"(%s, %s::{self.vector_type}, %s, %s)", page_size=len(rows))
+        return cur.rowcount
+    
+    @contextmanager
+    def embedding_snapshot(self, chunk_size: int = 5000):
+        """
+        임베딩 전체를 일관된 스냅샷으로 내보내기 (인메모리 벡터 인덱스 생성용)
+        
+        전용 연결에서 REPEATABLE READ 읽기 전용 트랜잭션으로 데이터셋 버전과 임베딩을 함께 읽는다.
+        
+        Yields:
+            (dataset_version, 행 수, [(id, embedding 텍스트 '[...]'), ...] 청크 이터레이터)
+        """
+        conn = psycopg2.connect(**self._connect_params())
+        try:
+            conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+            cur = conn.cursor()
+            version = self.get_dataset_version(cursor=cur)
+            cur.execute("SELECT COUNT(*) FROM recipes WHERE embedding IS NOT NULL")
+            count = cur.fetchone()[0]
+            
+            def chunks():
+                stream = conn.cursor(name='embedding_snapshot')
+                stream.itersize = chunk_size
+                stream.execute("""
+                    SELECT id, embedding::text
+                    FROM recipes
+                    WHERE embedding IS NOT NULL
+                    ORDER BY id
+                """)
+                while True:
+                    rows = stream.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+                stream.close()
+            
+            yield version, count, chunks()
+        finally:
+            conn.close()
+    
+    def embedding_column_type(self, cursor=None) -> Optional[tuple]:
+        """
+        현재 임베딩 컬럼 타입
+        
+        Returns:
+            (타입명, 차원) 예: ('vector', 1536) / 컬럼이 없으면 None
+        """
+        cur = cursor or self.cursor
+        cur.execute("""
+            SELECT t.typname, a.atttypmod
+            FROM pg_attribute a
+            JOIN pg_type t ON t.oid = a.atttypid
+            WHERE a.attrelid = 'recipes'::regclass
+              AND a.attname = 'embedding'
+              AND NOT a.attisdropped
+        """)
+        row = cur.fetchone()
+        if not row:
+            return None
+        # pgvector는 typmod에 차원을 그대로 저장 (-1이면 차원 미지정)
+        return row[0], (row[1] if row[1] > 0 else None)
+    
+    def embedding_indexes(self, cursor=None) -> List[tuple]:
+        """임베딩 컬럼의 ANN 인덱스 [(이름, 정의), ...] (ivfflat / hnsw)"""
+        cur = cursor or self.cursor
+        cur.execute("""
+            SELECT indexname, indexdef
+            FROM pg_indexes
+            WHERE tablename = 'recipes'
+              AND (indexdef ILIKE '%%USING ivfflat%%' OR indexdef ILIKE '%%USING hnsw%%')
+              AND indexdef ILIKE '%%(embedding %%'
+        """)
+        return cur.fetchall()
+    
+    def migrate_embedding_storage(self, dimensions: int, vector_type: str = 'vector',
+                                  truncate: bool = True, model_name: Optional[str] = None) -> Dict:
+        """
+        임베딩 컬럼 차원/저장 타입 변환 + ANN 인덱스 재생성 (단일 트랜잭션)
+        
+        Args:
+            dimensions: 새 차원
+            vector_type: 'vector' 또는 'halfvec'
+            truncate: True면 기존 벡터를 앞 dimensions개로 자르고 L2 재정규화
+                      (text-embedding-3 계열은 API dimensions 파라미터 결과와 같음)
+                      False면 기존 벡터를 지우고 재임베딩 대상으로 만듦
+            model_name: 변환된 벡터에 기록할 임베딩 모델 식별자 (truncate=True일 때)
+        
+        Returns:
+            변환 결과 (이전/이후 타입, 변환 방식, 재생성한 인덱스)
+        """
+        if vector_type not in VECTOR_TYPES:
+            raise ValueError(f"vector_type must be one of {VECTOR_TYPES}: {vector_type}")
+        
+        current = self.embedding_column_type()
+        if current is None:
+            raise RuntimeError("recipes.embedding column not found (run db/migrations/001_add_vector_column.sql)")
+        current_type, current_dims = current
+        target = f"{vector_type}({dimensions})"
+        
+        if current_dims is not None and dimensions > current_dims:
+            truncate = False  # 차원을 늘릴 수는 없으므로 재임베딩
+        if not truncate:
+            using, conversion = "NULL", 'cleared'
+        elif current_dims is not None and dimensions < current_dims:
+            using = f"l2_normalize(subvector(embedding::vector, 1, {dimensions}))::{target}"
+            conversion = 'truncated'
+        else:
+            using, conversion = f"embedding::{target}", 'cast'
+        
+        indexes = self.embedding_indexes()
+        opclass = re.compile(rf'\b{current_type}_(cosine|l2|ip)_ops\b')
+        
+        if not indexes:
+            # 인덱스가 없었다면 001 마이그레이션과 같은 기본 IVFFlat 인덱스
+            indexes = [('idx_recipes_embedding',
+                        f"CREATE INDEX idx_recipes_embedding ON recipes "
+                        f"USING ivfflat (embedding {current_type}_cosine_ops) WITH (lists = 100)")]
+        
+        # 인덱스 삭제 → 타입 변환 → 인덱스 재생성을 한 트랜잭션으로 (실패 시 원상태 유지)
+        prev_autocommit = self.conn.autocommit
+        self.conn.autocommit = False
+        cur = self.cursor
+        try:
+            for name, _ in indexes:
+                cur.execute(f'DROP INDEX IF EXISTS "{name}"')
+            cur.execute(f"ALTER TABLE recipes ALTER COLUMN embedding TYPE {target} USING {using}")
+            if conversion == 'cleared':
+                cur.execute("UPDATE recipes SET embedding_text_hash = NULL, embedding_model = NULL")
+            elif model_name:
+                cur.execute(
+                    "UPDATE recipes SET embedding_model = %s WHERE embedding IS NOT NULL", (model_name,)
+                )
+            for _, indexdef in indexes:
+                cur.execute(opclass.sub(rf'{vector_type}_\1_ops', indexdef))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self.conn.autocommit = prev_autocommit
+        
+        self.cursor.execute("ANALYZE recipes")
+        self.bump_dataset_version()
+        
+        return {
+            'from': f"{current_type}({current_dims})",
+            'to': target,
+            'conversion': conversion,
+            'indexes': [name for name, _ in indexes]
+        }
+    
+    def reuse_embeddings_by_hash(self, rows: List[tuple], model: str, cursor=None) -> set:
+        """
+        같은 원문 해시 + 모델의 기존 임베딩을 복사 (API 호출 없이, 벡터는 DB 밖으로 나가지 않음)
+        
+        Args:
+            rows: [(recipe_id, text_hash), ...]
+            model: 임베딩 모델명
+        
+        Returns:
+            임베딩을 재사용한 recipe_id 집합
+        """
+        if not rows:
+            return set()
+        cur = cursor or self.cursor
+        reused = execute_values(cur, """
+            UPDATE recipes AS r
+            SET embedding = src.embedding,
+                embedding_text_hash = v.text_hash,
+                embedding_model = v.model
+            FROM (VALUES %s) AS v(id, text_hash, model)
+            CROSS JOIN LATERAL (
+                SELECT s.embedding
+                FROM recipes s
+                WHERE s.embedding_text_hash = v.text_hash
+                  AND s.embedding_model = v.model
+                  AND s.embedding IS NOT NULL
+                LIMIT 1
+            ) AS src
+            WHERE r.id = v.id
+            RETURNING r.id
+        """, [(recipe_id, text_hash, model) for recipe_id, text_hash in rows],
+            page_size=len(rows), fetch=True)
+        return {row[0] for row in reused}
+    
+    def get_recipe_document(self, recipe_id: int, cursor=None) -> Optional[Dict]:
+        """JSONB 레시피 문서 단건 조회"""
+        docs = self.get_recipes_by_ids([recipe_id], cursor=cursor)
+        return docs[0] if docs else None
+    
+    def get_recipe_detail(self, recipe_id: int, cursor=None) -> Optional[Dict]:
+        """
+        미리 생성된 한국어 상세 문서 조회 (읽기 전용)
+        
+        문서가 없으면(백필 전, 003 미적용) 재료/조리 단계를 조인해 그 자리에서 만들어 반환하고 저장하지 않는다.
+        
+        Returns:
+            레시피 기본 정보 + ingredients/cooking_steps/markdown, 레시피가 없으면 None
+        """
+        cur = cursor or self.cursor
+        try:
+            cur.execute("""
+                SELECT r.id, r.title, r.title_en, r.cooking_time, r.servings,
+                       d.ingredients, d.cooking_steps, d.markdown
+                FROM recipes r
+                LEFT JOIN recipe_details d ON d.recipe_id = r.id
+                WHERE r.id = %s
+            """, (recipe_id,))
+            row = cur.fetchone()
+        except pg_errors.UndefinedTable:
+            cur.connection.rollback()
+            logger.warning("⚠️  recipe_details table missing (run db/migrations/003_recipe_details.sql)")
+            cur.execute("""
+                SELECT id, title, title_en, cooking_time, servings, NULL, NULL, NULL
+                FROM recipes
+                WHERE id = %s
+            """, (recipe_id,))
+            row = cur.fetchone()
+        if row is None:
+            return None
+        if row[7] is None:
+            # 백필 전 레시피: 한국어 원문으로 바로 생성 (LLM 호출 없음, 저장은 build_recipe_details.py)
+            detail = self._compose_recipe_details([recipe_id], cur).get(recipe_id, {})
+            row = (*row[:5], detail.get('ingredients'), detail.get('cooking_steps'), detail.get('markdown'))
+        return {
+            'id': row[0],
+            'title': row[1],
+            'title_en': row[2],
+            'cooking_time': row[3],
+            'servings': row[4],
+            'ingredients': row[5] or [],
+            'cooking_steps': row[6] or [],
+            'markdown': row[7] or ""
+        }
     
     def get_recipes(self, limit: int = 10) -> List[Dict]:
         """레시피 조회"""
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+쿼리 임베딩 캐시
+- 정규화된 텍스트 + 모델명 기준 키
+- LRU + TTL 만료
+- float32 배열로 압축 저장 (파이썬 float 리스트 대비 약 1/8 메모리)
+- 선택적 SQLite 디스크 계층 (재시작 후에도 유지, 비동기 경로는 스레드에서 접근)
+"""
+
+import os
+import re
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import unicodedata
+from array import array
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 텍스트 정규화 (유니코드 NFC, 공백 정리, 대소문자 통일)"""
+    text = unicodedata.normalize('NFC', text or '')
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+
+class EmbeddingCache:
+    """LRU/TTL 쿼리 임베딩 캐시 (메모리 + 선택적 디스크 계층)"""
+
+    def __init__(self, max_entries: int = 2000, ttl: float = 86400.0,
+                 disk_path: Optional[str] = None, disk_ttl: float = 30 * 86400.0,
+                 disk_max_entries: int = 100000):
+        """
+        Args:
+            max_entries: 메모리 최대 항목 수 (초과 시 LRU 제거)
+            ttl: 메모리 항목 유효 시간 (초, 0이면 만료 없음)
+            disk_path: SQLite 파일 경로 (None이면 디스크 계층 비활성)
+            disk_ttl: 디스크 항목 유효 시간 (초, 0이면 만료 없음)
+            disk_max_entries: 디스크 최대 항목 수
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.disk_ttl = disk_ttl
+        self.disk_max_entries = disk_max_entries
+
+        # key → (벡터, 만료 시각), LRU 순서
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = Lock()
+        # SQLite 연결은 동시 사용 불가 → 디스크 계층 전용 락 (메모리 조회는 디스크 I/O를 기다리지 않음)
+        self._disk_lock = Lock()
+        self._stats = {
+            'hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'disk_writes': 0
+        }
+        self._disk = None
+        if disk_path:
+            self._open_disk(disk_path)
+
+    @classmethod
+    def from_env(cls) -> 'EmbeddingCache':
+        """환경변수 기반 생성"""
+        return cls(
+            max_entries=int(os.getenv('EMBEDDING_CACHE_SIZE', '2000')),
+            ttl=float(os.getenv('EMBEDDING_CACHE_TTL', '86400')),
+            disk_path=os.getenv('EMBEDDING_CACHE_PATH') or None,
+            disk_ttl=float(os.getenv('EMBEDDING_CACHE_DISK_TTL', str(30 * 86400))),
+            disk_max_entries=int(os.getenv('EMBEDDING_CACHE_DISK_SIZE', '100000'))
+        )
+
+    def _open_disk(self, path: str):
+        """디스크 계층 열기 (실패 시 메모리 전용으로 동작)"""
+        try:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._disk = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("""
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._disk.commit()
+            logger.info(f"💾 Embedding cache disk tier: {path}")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️  Embedding cache disk tier disabled: {e}")
+            self._disk = None
+
+    @staticmethod
+    def make_key(text: str, model: str) -> str:
+        """정규화 텍스트 + 모델명 → 캐시 키"""
+        digest = hashlib.sha256(normalize_query(text).encode('utf-8')).hexdigest()
+        return f"{model}:{digest}"
+
+    def _expired(self, created_at: float, ttl: float) -> bool:
+        return ttl > 0 and time.time() - created_at > ttl
+
+    def _get_memory(self, key: str) -> Optional[array]:
+        """메모리 계층 조회 (만료 항목은 제거)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            vector, expires_at = entry
+            if expires_at is None or time.time() < expires_at:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return vector
+            del self._entries[key]
+            self._stats['expirations'] += 1
+            return None
+
+    def _get_disk(self, key: str) -> Optional[array]:
+        """디스크 계층 조회 + 메모리 계층 승격 (동기 I/O, 비동기 경로에서는 스레드에서 호출)"""
+        row = None
+        if self._disk is not None:
+            with self._disk_lock:
+                try:
+                    row = self._disk.execute(
+                        "SELECT vector, created_at FROM query_embeddings WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️  Embedding cache disk read failed: {e}")
+        with self._lock:
+            if row and not self._expired(row[1], self.disk_ttl):
+                vector = array('f')
+                vector.frombytes(row[0])
+                # 메모리 계층으로 승격 (디스크 항목의 만료 시각을 넘기지 않음)
+                disk_expires_at = row[1] + self.disk_ttl if self.disk_ttl > 0 else None
+                self._store(key, vector, disk_expires_at)
+                self._stats['disk_hits'] += 1
+                return vector
+            self._stats['misses'] += 1
+            return None
+
+    def get(self, text: str, model: str) -> Optional[array]:
+        """캐시 조회 (메모리 → 디스크 순)"""
+        key = self.make_key(text, model)
+        vector = self._get_memory(key)
+        return vector if vector is not None else self._get_disk(key)
+
+    async def aget(self, text: str, model: str) -> Optional[array]:
+        """비동기 캐시 조회 (메모리 적중은 즉시, 디스크 계층은 스레드에서 조회해 이벤트 루프를 막지 않음)"""
+        key = self.make_key(text, model)
+        vector = self._get_memory(key)
+        if vector is not None:
+            return vector
+        if self._disk is None:
+            return self._get_disk(key)
+        return await asyncio.to_thread(self._get_disk, key)
+
+    @staticmethod
+    def _pack(vector: Sequence[float]) -> array:
+        return vector if isinstance(vector, array) and vector.typecode == 'f' else array('f', vector)
+
+    def _put_disk(self, key: str, packed: array):
+        """디스크 계층 저장 (동기 I/O, 비동기 경로에서는 스레드에서 호출)"""
+        with self._disk_lock:
+            if self._disk is None:
+                return
+            try:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                    (key, packed.tobytes(), time.time())
+                )
+                with self._lock:
+                    self._stats['disk_writes'] += 1
+                    prune = self._stats['disk_writes'] % 100 == 0
+                # 주기적으로 디스크 크기 제한 적용
+                if prune:
+                    self._prune_disk()
+                self._disk.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️  Embedding cache disk write failed: {e}")
+
+    def put(self, text: str, model: str, vector: Sequence[float]) -> array:
+        """캐시 저장 (float32 배열로 변환)"""
+        key = self.make_key(text, model)
+        packed = self._pack(vector)
+        with self._lock:
+            self._store(key, packed)
+        self._put_disk(key, packed)
+        return packed
+
+    async def aput(self, text: str, model: str, vector: Sequence[float]) -> array:
+        """비동기 캐시 저장 (메모리는 즉시, 디스크 계층은 스레드에서 저장)"""
+        key = self.make_key(text, model)
+        packed = self._pack(vector)
+        with self._lock:
+            self._store(key, packed)
+        if self._disk is not None:
+            await asyncio.to_thread(self._put_disk, key, packed)
+        return packed
+
+    def _store(self, key: str, vector: array, max_expires_at: Optional[float] = None):
+        """메모리 계층 저장 + LRU 제거 (lock 보유 상태에서 호출)"""
+        expires_at = time.time() + self.ttl if self.ttl > 0 else None
+        if max_expires_at is not None:
+            expires_at = max_expires_at if expires_at is None else min(expires_at, max_expires_at)
+        self._entries[key] = (vector, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _prune_disk(self):
+        """디스크 계층의 만료/초과 항목 제거"""
+        if self.disk_ttl > 0:
+            self._disk.execute(
+                "DELETE FROM query_embeddings WHERE created_at < ?", (time.time() - self.disk_ttl,)
+            )
+        self._disk.execute("""
+            DELETE FROM query_embeddings WHERE key IN (
+                SELECT key FROM query_embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.disk_max_entries,))
+
+    def clear(self):
+        """메모리 계층 비우기"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+            vector_bytes = sum(v.itemsize * len(v) for v, _ in self._entries.values())
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats.update({
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'vector_bytes': vector_bytes,
+            'disk_enabled': self._disk is not None,
+            'hit_rate': round((stats['hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        })
+        return stats
+
+    def close(self):
+        """디스크 계층 닫기"""
+        with self._disk_lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
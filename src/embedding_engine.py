@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+멀티 키 동시 임베딩 엔진
+- OPENAI_API_KEY ~ OPENAI_API_KEY_10 전체에 배치를 분산 (키별 레인)
+- 키별 RPM/TPM 토큰 버킷으로 요청 속도 제어 (고정 sleep 없음)
+- 429 응답은 서버가 준 retry-after / x-ratelimit-reset 힌트만큼 해당 키를 쉬게 한 뒤 재시도
+- 요청당 토큰 예산까지 채워 배치 구성 (항목 수 상한과 함께)
+- 잘못된 입력으로 실패한 배치는 이분 분할로 문제 항목만 격리 (dead letter)
+- 결과는 입력 순서대로 재조립
+"""
+
+import os
+import re
+import time
+import random
+import logging
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import openai
+
+from src.openai_clients import OpenAIClientRegistry, get_registry, load_api_keys
+from src.token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# 재시도 대상 오류 (429 외 일시적 오류)
+TRANSIENT_ERRORS = (
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError
+)
+
+# 배치 안의 특정 입력 때문에 실패하는 오류 (이분 분할로 원인 항목 격리)
+INPUT_ERRORS = (
+    openai.BadRequestError,
+    openai.UnprocessableEntityError
+)
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """'1s', '6m0s', '120ms', '0.5' 형식의 리셋 시간 → 초"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r'([\d.]+)(ms|h|m|s)', value):
+        matched = True
+        total += float(amount) * {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}[unit]
+    return total if matched else None
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """429 응답 헤더에서 대기 시간 힌트 추출"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    if headers.get('retry-after-ms'):
+        try:
+            return float(headers['retry-after-ms']) / 1000
+        except ValueError:
+            pass
+    hints = [
+        parse_reset_duration(headers.get('retry-after')),
+        parse_reset_duration(headers.get('x-ratelimit-reset-requests')),
+        parse_reset_duration(headers.get('x-ratelimit-reset-tokens'))
+    ]
+    hints = [h for h in hints if h is not None]
+    return max(hints) if hints else None
+
+
+class TokenBucket:
+    """분당 한도 토큰 버킷 (예약 방식: 잔량이 음수면 그만큼 기다림)"""
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount를 예약했을 때 기다려야 하는 시간 (예약하지 않음)"""
+        self._refill(now)
+        deficit = amount - self.tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def reserve(self, amount: float, now: float):
+        """amount 차감 (잔량이 음수가 될 수 있음)"""
+        self._refill(now)
+        self.tokens -= amount
+
+    def refund(self, amount: float):
+        """호출이 실제로 나가지 않은 예약 반환"""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class KeyLane:
+    """API 키 하나의 레인 (클라이언트 + RPM/TPM 버킷 + 쿨다운)"""
+
+    def __init__(self, name: str, client, rpm: float, tpm: float):
+        self.name = name
+        self.client = client
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.cooldown_until = 0.0
+        self.stats = {'requests': 0, 'tokens': 0, 'rate_limited': 0, 'errors': 0}
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        return max(
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(tokens, now),
+            self.cooldown_until - now
+        )
+
+
+class EmbeddingEngine:
+    """키별 레인에 배치를 분산하는 동시 임베딩 실행기"""
+
+    def __init__(self, model: str, api_keys: Optional[List[str]] = None,
+                 clients: Optional[OpenAIClientRegistry] = None,
+                 rpm: float = 3000, tpm: float = 1000000,
+                 max_workers: Optional[int] = None, max_retries: int = 6,
+                 max_backoff: float = 30.0, timeout: Optional[float] = None,
+                 max_batch_tokens: int = 100000, dimensions: Optional[int] = None):
+        """
+        Args:
+            model: 임베딩 모델명
+            api_keys: 사용할 API 키 (None이면 환경변수 전체)
+            clients: 공유 OpenAI 클라이언트 레지스트리
+            rpm: 키별 분당 요청 한도
+            tpm: 키별 분당 토큰 한도
+            max_workers: 동시 요청 수 (None이면 키 수 × 4)
+            max_retries: 배치당 최대 재시도 횟수 (429/일시적 오류)
+            max_backoff: 재시도 대기 상한 (초)
+            timeout: 요청 타임아웃 (None이면 레지스트리의 embedding 타임아웃)
+            max_batch_tokens: 요청당 입력 토큰 예산 (API 요청당 한도 이하)
+            dimensions: 축소 차원 (text-embedding-3 계열, None이면 모델 기본 차원)
+        """
+        api_keys = api_keys or load_api_keys()
+        if not api_keys:
+            raise ValueError("No valid API keys found")
+
+        registry = clients or get_registry()
+        # 재시도는 엔진이 레인 단위로 처리하므로 SDK 재시도는 끔
+        self.lanes = [
+            KeyLane(f"key{i + 1}", registry.client(key).with_options(max_retries=0), rpm, tpm)
+            for i, key in enumerate(api_keys)
+        ]
+        self.model = model
+        self.max_workers = max_workers or len(self.lanes) * 4
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.timeout = timeout or registry.timeout('embedding')
+        self.max_batch_tokens = max_batch_tokens
+        self.dimensions = dimensions
+        self._lock = Lock()
+        self.run_stats: Dict = {}
+        self.dead_letters: List[Dict] = []
+
+        logger.info(f"🔑 Embedding engine: {len(self.lanes)} key(s), "
+                    f"{self.max_workers} workers, {rpm:.0f} RPM / {tpm:.0f} TPM per key")
+
+    @classmethod
+    def from_env(cls, model: str, clients: Optional[OpenAIClientRegistry] = None,
+                 dimensions: Optional[int] = None) -> 'EmbeddingEngine':
+        """환경변수 기반 생성"""
+        max_workers = os.getenv('EMBEDDING_MAX_WORKERS')
+        return cls(
+            model=model,
+            clients=clients,
+            rpm=float(os.getenv('OPENAI_EMBEDDING_RPM', '3000')),
+            tpm=float(os.getenv('OPENAI_EMBEDDING_TPM', '1000000')),
+            max_workers=int(max_workers) if max_workers else None,
+            max_retries=int(os.getenv('OPENAI_MAX_RETRIES', '6')),
+            max_backoff=float(os.getenv('OPENAI_MAX_BACKOFF', '30')),
+            max_batch_tokens=int(os.getenv('EMBEDDING_MAX_BATCH_TOKENS', '100000')),
+            dimensions=dimensions
+        )
+
+    def _acquire_lane(self, tokens: int) -> KeyLane:
+        """가장 빨리 보낼 수 있는 레인을 골라 예약하고, 필요한 만큼 대기"""
+        with self._lock:
+            now = time.monotonic()
+            lane = min(self.lanes, key=lambda l: l.wait_time(tokens, now))
+            wait = lane.wait_time(tokens, now)
+            lane.requests.reserve(1, now)
+            lane.tokens.reserve(tokens, now)
+        if wait > 0:
+            time.sleep(wait)
+        return lane
+
+    def _backoff(self, attempt: int) -> float:
+        """서버 힌트가 없을 때의 지수 백오프 (jitter 포함)"""
+        return min(self.max_backoff, (2 ** attempt) * 0.5) * (0.5 + random.random() / 2)
+
+    def _request(self, client, batch: List[str]):
+        params = {'model': self.model, 'input': batch, 'timeout': self.timeout}
+        if self.dimensions:
+            params['dimensions'] = self.dimensions
+        return client.embeddings.create(**params)
+
+    def embed_batch(self, batch: List[str], tokens: Optional[int] = None) -> List[List[float]]:
+        """배치 하나 임베딩 (레인 선택 + 429/일시적 오류 재시도)"""
+        if tokens is None:
+            tokens = sum(count_tokens(text, self.model) for text in batch)
+        attempt = 0
+        while True:
+            lane = self._acquire_lane(tokens)
+            try:
+                response = self._request(lane.client, batch)
+            except openai.RateLimitError as e:
+                hint = retry_after_seconds(e)
+                delay = min(self.max_backoff, hint) if hint is not None else self._backoff(attempt)
+                with self._lock:
+                    lane.stats['rate_limited'] += 1
+                    # 이 키만 쉬게 하고 다른 키는 계속 사용
+                    lane.cooldown_until = max(lane.cooldown_until, time.monotonic() + delay)
+                    lane.tokens.refund(tokens)
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self._count('retries')
+                logger.warning(f"⏳ {lane.name} rate limited, cooling down {delay:.2f}s "
+                               f"(attempt {attempt}/{self.max_retries})")
+                continue
+            except TRANSIENT_ERRORS as e:
+                with self._lock:
+                    lane.stats['errors'] += 1
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self._count('retries')
+                delay = self._backoff(attempt)
+                logger.warning(f"⚠️  {lane.name} embedding error ({type(e).__name__}), "
+                               f"retrying in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+
+            with self._lock:
+                lane.stats['requests'] += 1
+                usage = getattr(response, 'usage', None)
+                lane.stats['tokens'] += getattr(usage, 'total_tokens', None) or tokens
+            # 응답 순서가 아닌 index 기준으로 정렬
+            return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+    def pack_batches(self, texts: List[str], batch_size: int) -> List[tuple]:
+        """
+        입력 순서를 유지하며 토큰 예산/항목 수 한도까지 배치 채우기
+
+        Returns:
+            [(시작 위치, 텍스트 리스트, 토큰 수), ...]
+        """
+        batches = []
+        start, tokens = 0, 0
+        for i, text in enumerate(texts):
+            text_tokens = count_tokens(text, self.model)
+            if i > start and (i - start >= batch_size or tokens + text_tokens > self.max_batch_tokens):
+                batches.append((start, texts[start:i], tokens))
+                start, tokens = i, 0
+            tokens += text_tokens
+        batches.append((start, texts[start:], tokens))
+        return batches
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.run_stats[name] = self.run_stats.get(name, 0) + amount
+
+    def embed_isolating(self, start: int, batch: List[str],
+                        tokens: Optional[int] = None) -> List[Optional[List[float]]]:
+        """
+        배치 임베딩 + 실패 격리
+
+        입력 오류(400/422)면 배치를 반으로 나눠 재귀적으로 다시 시도해 문제 항목만 dead letter로 보내고,
+        재시도를 다 쓴 429/일시적 오류 등은 배치 전체를 dead letter로 보냄 (실패 항목은 None)
+        """
+        try:
+            return self.embed_batch(batch, tokens)
+        except INPUT_ERRORS as e:
+            if len(batch) > 1:
+                self._count('splits')
+                middle = len(batch) // 2
+                return (self.embed_isolating(start, batch[:middle])
+                        + self.embed_isolating(start + middle, batch[middle:]))
+            self._dead_letter(start, batch, e)
+        except Exception as e:
+            self._dead_letter(start, batch, e)
+        return [None] * len(batch)
+
+    def _dead_letter(self, start: int, batch: List[str], error: Exception):
+        """실패 항목 기록 (입력 위치 + 오류)"""
+        logger.error(f"❌ Embedding failed for item(s) {start}~{start + len(batch) - 1}: "
+                     f"{type(error).__name__}: {error}")
+        with self._lock:
+            for offset in range(len(batch)):
+                self.dead_letters.append({'index': start + offset, 'error': f"{type(error).__name__}: {error}"})
+            self.run_stats['dead_letters'] = self.run_stats.get('dead_letters', 0) + len(batch)
+
+    def embed(self, texts: Sequence[str], batch_size: int = 100) -> List[Optional[List[float]]]:
+        """
+        텍스트 전체를 배치로 나눠 동시 임베딩
+
+        Args:
+            texts: 임베딩할 텍스트 (각각 모델 입력 한도 이하)
+            batch_size: 요청당 최대 텍스트 수
+
+        Returns:
+            입력 순서와 같은 벡터 리스트 (실패 항목은 None, 원인은 self.dead_letters)
+        """
+        texts = list(texts)
+        with self._lock:
+            self.run_stats = {'texts': len(texts), 'batches': 0, 'retries': 0, 'splits': 0, 'dead_letters': 0}
+            self.dead_letters = []
+        if not texts:
+            return []
+
+        batches = self.pack_batches(texts, batch_size)
+        self.run_stats['batches'] = len(batches)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        started = time.perf_counter()
+        done = 0
+
+        workers = min(self.max_workers, len(batches))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='embed') as executor:
+            futures = [
+                (start, batch, executor.submit(self.embed_isolating, start, batch, tokens))
+                for start, batch, tokens in batches
+            ]
+            for start, batch, future in futures:
+                results[start:start + len(batch)] = future.result()
+                done += len(batch)
+                logger.info(f"✅ Vectorized {done}/{len(texts)} texts")
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"⚡ Embedded {len(texts)} texts in {len(batches)} batch(es), {elapsed:.1f}s "
+                    f"({len(texts) / max(elapsed, 1e-9):.1f}/s, {len(self.lanes)} key(s), "
+                    f"retries {self.run_stats['retries']}, splits {self.run_stats['splits']}, "
+                    f"dead letters {self.run_stats['dead_letters']})")
+        return results
+
+    def stats(self) -> Dict:
+        """키별 사용 통계"""
+        with self._lock:
+            return {
+                'keys': len(self.lanes),
+                'max_workers': self.max_workers,
+                'lanes': {lane.name: dict(lane.stats) for lane in self.lanes}
+            }
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OpenAI 클라이언트 레지스트리
+- 앱 전역에서 하나의 HTTP 커넥션 풀을 공유 (TLS 핸드셰이크/keep-alive 재사용)
+- API 키별 OpenAI/AsyncOpenAI 클라이언트 캐싱
+- HTTP 풀 한도, 호출 종류별 타임아웃, 재시도 정책 설정
+- 커넥션 재사용 통계
+"""
+
+import os
+import logging
+from threading import Lock
+from typing import Dict, List, Optional
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+# 기본 클라이언트(키 미지정 → OPENAI_API_KEY 사용) 캐시 키
+DEFAULT_KEY = '__default__'
+
+
+def load_api_keys(max_keys: int = 10) -> List[str]:
+    """환경변수에서 OPENAI_API_KEY ~ OPENAI_API_KEY_10 로드 (플레이스홀더/중복 제외)"""
+    api_keys = []
+    for i in range(1, max_keys + 1):
+        key_name = f'OPENAI_API_KEY_{i}' if i > 1 else 'OPENAI_API_KEY'
+        key = os.getenv(key_name)
+        if key and key != 'your-api-key-here' and key not in api_keys:
+            api_keys.append(key)
+    return api_keys
+
+
+class _PoolCounter:
+    """httpcore trace 이벤트로 요청 수와 신규 커넥션 수를 집계"""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.counts = {
+            'requests': 0,
+            'new_connections': 0,
+            'tls_handshakes': 0,
+            'errors': 0
+        }
+
+    def incr(self, name: str):
+        with self.lock:
+            self.counts[name] += 1
+
+    def on_trace(self, event_name: str):
+        if event_name == 'connection.connect_tcp.complete':
+            self.incr('new_connections')
+        elif event_name == 'connection.start_tls.complete':
+            self.incr('tls_handshakes')
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            counts = dict(self.counts)
+        requests = counts['requests']
+        reused = max(requests - counts['new_connections'], 0)
+        counts['reused_connections'] = reused
+        counts['reuse_ratio'] = round(reused / requests, 3) if requests else 0.0
+        return counts
+
+
+class OpenAIClientRegistry:
+    """앱 단위 OpenAI 클라이언트 레지스트리 (startup에서 1회 생성 후 공유)"""
+
+    def __init__(self, max_connections: int = 50, max_keepalive: int = 20,
+                 keepalive_expiry: float = 30.0, connect_timeout: float = 5.0,
+                 timeout: float = 60.0, max_retries: int = 2,
+                 timeouts: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            max_connections: HTTP 풀 최대 커넥션 수
+            max_keepalive: 유지할 keep-alive 커넥션 수
+            keepalive_expiry: 유휴 커넥션 유지 시간 (초)
+            connect_timeout: TCP/TLS 연결 타임아웃 (초)
+            timeout: 기본 요청 타임아웃 (초)
+            max_retries: SDK 재시도 횟수 (429/5xx/연결 오류, 지수 백오프)
+            timeouts: 호출 종류별 타임아웃 (chat, embedding, translation)
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http_timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.timeouts = {'chat': timeout, 'embedding': timeout, 'translation': timeout}
+        self.timeouts.update(timeouts or {})
+
+        self._lock = Lock()
+        self._sync_counter = _PoolCounter()
+        self._async_counter = _PoolCounter()
+        self._http_client: Optional[httpx.Client] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[str, OpenAI] = {}
+        self._async_clients: Dict[str, AsyncOpenAI] = {}
+
+    @classmethod
+    def from_env(cls) -> 'OpenAIClientRegistry':
+        """환경변수 기반 생성"""
+        timeout = float(os.getenv('OPENAI_TIMEOUT', '60'))
+        return cls(
+            max_connections=int(os.getenv('OPENAI_HTTP_MAX_CONNECTIONS', '50')),
+            max_keepalive=int(os.getenv('OPENAI_HTTP_MAX_KEEPALIVE', '20')),
+            keepalive_expiry=float(os.getenv('OPENAI_HTTP_KEEPALIVE_EXPIRY', '30')),
+            connect_timeout=float(os.getenv('OPENAI_CONNECT_TIMEOUT', '5')),
+            timeout=timeout,
+            max_retries=int(os.getenv('OPENAI_MAX_RETRIES', '2')),
+            timeouts={
+                'chat': float(os.getenv('OPENAI_CHAT_TIMEOUT', str(timeout))),
+                'embedding': float(os.getenv('OPENAI_EMBEDDING_TIMEOUT', str(timeout))),
+                'translation': float(os.getenv('OPENAI_TRANSLATION_TIMEOUT', str(timeout)))
+            }
+        )
+
+    def _build_http_client(self) -> httpx.Client:
+        counter = self._sync_counter
+
+        def trace(event_name, info):
+            counter.on_trace(event_name)
+
+        def on_request(request: httpx.Request):
+            counter.incr('requests')
+            request.extensions['trace'] = trace
+
+        def on_response(response: httpx.Response):
+            if response.status_code >= 400:
+                counter.incr('errors')
+
+        return httpx.Client(
+            limits=self.limits,
+            timeout=self.http_timeout,
+            event_hooks={'request': [on_request], 'response': [on_response]}
+        )
+
+    def _build_async_http_client(self) -> httpx.AsyncClient:
+        counter = self._async_counter
+
+        async def trace(event_name, info):
+            counter.on_trace(event_name)
+
+        async def on_request(request: httpx.Request):
+            counter.incr('requests')
+            request.extensions['trace'] = trace
+
+        async def on_response(response: httpx.Response):
+            if response.status_code >= 400:
+                counter.incr('errors')
+
+        return httpx.AsyncClient(
+            limits=self.limits,
+            timeout=self.http_timeout,
+            event_hooks={'request': [on_request], 'response': [on_response]}
+        )
+
+    def client(self, api_key: Optional[str] = None) -> OpenAI:
+        """동기 클라이언트 (키별 캐싱, HTTP 풀 공유)"""
+        cache_key = api_key or DEFAULT_KEY
+        with self._lock:
+            if cache_key not in self._clients:
+                if self._http_client is None:
+                    self._http_client = self._build_http_client()
+                self._clients[cache_key] = OpenAI(
+                    api_key=api_key,
+                    max_retries=self.max_retries,
+                    http_client=self._http_client
+                )
+            return self._clients[cache_key]
+
+    def async_client(self, api_key: Optional[str] = None) -> AsyncOpenAI:
+        """비동기 클라이언트 (키별 캐싱, HTTP 풀 공유)"""
+        cache_key = api_key or DEFAULT_KEY
+        with self._lock:
+            if cache_key not in self._async_clients:
+                if self._async_http_client is None:
+                    self._async_http_client = self._build_async_http_client()
+                self._async_clients[cache_key] = AsyncOpenAI(
+                    api_key=api_key,
+                    max_retries=self.max_retries,
+                    http_client=self._async_http_client
+                )
+            return self._async_clients[cache_key]
+
+    def timeout(self, kind: str) -> float:
+        """호출 종류별 타임아웃 (초)"""
+        return self.timeouts.get(kind, self.http_timeout.read)
+
+    def stats(self) -> Dict:
+        """HTTP 풀 사용 통계"""
+        return {
+            'max_connections': self.limits.max_connections,
+            'max_keepalive': self.limits.max_keepalive_connections,
+            'max_retries': self.max_retries,
+            'timeouts': dict(self.timeouts),
+            'clients': len(self._clients),
+            'async_clients': len(self._async_clients),
+            'sync': self._sync_counter.snapshot(),
+            'async': self._async_counter.snapshot()
+        }
+
+    def close(self):
+        """동기 HTTP 풀 종료"""
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+        self._clients.clear()
+
+    async def aclose(self):
+        """동기/비동기 HTTP 풀 모두 종료"""
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+            self._async_http_client = None
+        self._async_clients.clear()
+        self.close()
+
+
+_registry: Optional[OpenAIClientRegistry] = None
+_registry_lock = Lock()
+
+
+def get_registry() -> OpenAIClientRegistry:
+    """프로세스 공용 레지스트리 (없으면 환경변수로 생성)"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = OpenAIClientRegistry.from_env()
+        return _registry
+
+
+def set_registry(registry: OpenAIClientRegistry):
+    """프로세스 공용 레지스트리 교체 (API 서버 startup에서 사용)"""
+    global _registry
+    with _registry_lock:
+        _registry = registry
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+채팅 프롬프트 조립 (토큰 예산)
+- 시스템 프롬프트(고정 지시문)는 요청마다 동일하게 유지 → OpenAI 프롬프트 캐시 접두사 적중
+- 가변 부분(취향, 대화 요약, 최근 대화, 레시피 정보, 요청)은 user 메시지에 예산 안에서 배치
+- 대화 내역은 어시스턴트 마크다운 대신 추천한 레시피 id/제목만 저장하고,
+  오래된 턴은 롤링 요약으로 접음
+"""
+
+import os
+import logging
+from threading import Lock
+from typing import Dict, List
+
+from src.token_counter import count_tokens, split_by_tokens
+
+logger = logging.getLogger(__name__)
+
+# 대화 내역의 요약 항목 role
+SUMMARY_ROLE = 'summary'
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str) -> str:
+    """토큰 예산 이하로 앞부분만 남김 (잘렸으면 '…')"""
+    if not text or max_tokens <= 0:
+        return ''
+    pieces = split_by_tokens(text, max_tokens, model)
+    return pieces[0] if len(pieces) == 1 else pieces[0].rstrip() + '…'
+
+
+def compact_recommendation(recipes: List[Dict]) -> str:
+    """어시스턴트 답변 → 저장용 요약 (번호, 레시피 id, 제목만: 사용자가 '2번'으로 고를 때 필요한 정보)"""
+    if not recipes:
+        return "추천 레시피 없음"
+    return "추천: " + ", ".join(
+        f"{number}번 #{recipe['id']} {recipe['title']}" for number, recipe in enumerate(recipes, 1)
+    )
+
+
+class PromptBuilder:
+    """토큰 예산 기반 채팅 프롬프트 조립 + 대화 내역 압축"""
+
+    def __init__(self, model: str = 'gpt-4o-mini', budget: int = 1800, summary_tokens: int = 150,
+                 description_tokens: int = 60, turn_tokens: int = 120, max_messages: int = 12):
+        """
+        Args:
+            model: 토큰 계산 기준 채팅 모델
+            budget: 프롬프트 전체(시스템 + user 메시지) 토큰 예산
+            summary_tokens: 롤링 요약 최대 토큰
+            description_tokens: 레시피 설명 최대 토큰 (예산이 부족하면 더 줄임)
+            turn_tokens: 대화 한 턴(메시지) 최대 토큰
+            max_messages: 저장할 최근 메시지 수 (넘치면 요약으로 접음)
+        """
+        self.model = model
+        self.budget = budget
+        self.summary_tokens = summary_tokens
+        self.description_tokens = description_tokens
+        self.turn_tokens = turn_tokens
+        self.max_messages = max_messages
+        self._lock = Lock()
+        self._stats = {'prompts': 0, 'prompt_tokens': 0, 'over_budget': 0,
+                       'turns_folded': 0, 'descriptions_shortened': 0}
+
+    @classmethod
+    def from_env(cls) -> 'PromptBuilder':
+        """환경변수 기반 생성"""
+        return cls(
+            model=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
+            budget=int(os.getenv('CHAT_PROMPT_TOKEN_BUDGET', '1800')),
+            summary_tokens=int(os.getenv('CHAT_SUMMARY_TOKENS', '150')),
+            description_tokens=int(os.getenv('CHAT_DESCRIPTION_TOKENS', '60')),
+            max_messages=int(os.getenv('CHAT_HISTORY_MAX_MESSAGES', '12'))
+        )
+
+    def _tokens(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    def _fold(self, summary: str, messages: List[Dict]) -> str:
+        """오래된 메시지를 롤링 요약에 덧붙이고 예산을 넘으면 오래된 쪽부터 버림"""
+        lines = [summary] if summary else []
+        for message in messages:
+            speaker = '사용자' if message['role'] == 'user' else '챗봇'
+            lines.append(f"{speaker}: {truncate_tokens(message['content'], 40, self.model)}")
+        folded = ' / '.join(lines)
+        while lines and self._tokens(folded) > self.summary_tokens:
+            lines.pop(0)
+            folded = ' / '.join(lines)
+        return folded
+
+    def append_turn(self, history: List[Dict], user_message: str, recipes: List[Dict]) -> List[Dict]:
+        """
+        대화 내역에 한 턴 추가 (어시스턴트는 추천 레시피 id/제목만, 오래된 턴은 요약으로 접음)
+
+        Returns:
+            새 대화 내역 ([요약 항목] + 최근 메시지)
+        """
+        summary = history[0]['content'] if history and history[0]['role'] == SUMMARY_ROLE else ''
+        messages = [m for m in history if m['role'] != SUMMARY_ROLE] + [
+            {"role": "user", "content": truncate_tokens(user_message, self.turn_tokens, self.model)},
+            {"role": "assistant", "content": compact_recommendation(recipes)}
+        ]
+        overflow = len(messages) - self.max_messages
+        if overflow > 0:
+            summary = self._fold(summary, messages[:overflow])
+            messages = messages[overflow:]
+            with self._lock:
+                self._stats['turns_folded'] += overflow
+        return ([{"role": SUMMARY_ROLE, "content": summary}] if summary else []) + messages
+
+    def _recipe_lines(self, recipes: List[Dict], description_tokens: int) -> List[str]:
+        lines = []
+        for number, recipe in enumerate(recipes, 1):
+            line = (f"{number}. #{recipe['id']} {recipe['title']}"
+                    f"{' (' + recipe['title_en'] + ')' if recipe.get('title_en') else ''}"
+                    f" | 조리시간 {recipe['cooking_time']} | {recipe['servings']}")
+            description = truncate_tokens(recipe.get('description') or '', description_tokens, self.model)
+            lines.append(f"{line} | {description}" if description else line)
+        return lines
+
+    def build(self, system_prompt: str, history: List[Dict], recipes: List[Dict],
+              request: str, preferences: str) -> List[Dict]:
+        """
+        GPT 메시지 조립 (예산: 요청/취향 > 레시피 > 최근 대화 > 요약 순으로 자리 배정)
+
+        Args:
+            system_prompt: 고정 시스템 프롬프트 (캐시 접두사, 요청마다 바꾸지 말 것)
+            history: append_turn으로 관리되는 대화 내역
+            recipes: 추천 후보 (retrieve_chat_recipes 결과)
+            request: 이번 사용자 요청
+            preferences: 취향 한 줄
+        """
+        request_block = f"사용자 취향: {preferences}\n사용자 요청: {truncate_tokens(request, self.turn_tokens * 2, self.model)}"
+        remaining = self.budget - self._tokens(system_prompt) - self._tokens(request_block)
+
+        # 레시피 정보: 예산의 최대 60%, 넘치면 설명을 줄이고 그래도 넘치면 설명 생략
+        recipe_budget = max(0, int(remaining * 0.6))
+        description_tokens = self.description_tokens
+        recipe_lines = self._recipe_lines(recipes, description_tokens)
+        while description_tokens > 0 and self._tokens('\n'.join(recipe_lines)) > recipe_budget:
+            description_tokens = description_tokens // 2 if description_tokens > 10 else 0
+            recipe_lines = self._recipe_lines(recipes, description_tokens)
+        if description_tokens < self.description_tokens:
+            with self._lock:
+                self._stats['descriptions_shortened'] += 1
+        recipe_block = "레시피 정보:\n" + '\n'.join(recipe_lines)
+        remaining -= self._tokens(recipe_block)
+
+        # 최근 대화: 최신 턴부터 예산 안에서, 못 들어간 턴은 이번 프롬프트에서만 요약으로 접음
+        summary = history[0]['content'] if history and history[0]['role'] == SUMMARY_ROLE else ''
+        messages = [m for m in history if m['role'] != SUMMARY_ROLE]
+        kept: List[str] = []
+        used = 0
+        cut = len(messages)
+        for index in range(len(messages) - 1, -1, -1):
+            message = messages[index]
+            speaker = '사용자' if message['role'] == 'user' else '챗봇'
+            line = f"{speaker}: {truncate_tokens(message['content'], self.turn_tokens, self.model)}"
+            cost = self._tokens(line)
+            if used + cost > remaining - self.summary_tokens:
+                break
+            kept.insert(0, line)
+            used += cost
+            cut = index
+        if cut > 0:
+            summary = self._fold(summary, messages[:cut])
+        summary_block = f"이전 대화 요약: {summary}" if summary else ''
+        if summary_block and self._tokens(summary_block) > remaining - used:
+            summary_block = truncate_tokens(summary_block, max(0, remaining - used), self.model)
+
+        sections = [summary_block, "최근 대화:\n" + '\n'.join(kept) if kept else '', recipe_block, request_block]
+        user_content = '\n\n'.join(section for section in sections if section)
+        messages_out = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content}
+        ]
+        total = self._tokens(system_prompt) + self._tokens(user_content)
+        with self._lock:
+            self._stats['prompts'] += 1
+            self._stats['prompt_tokens'] += total
+            if total > self.budget:
+                self._stats['over_budget'] += 1
+        return messages_out
+
+    def stats(self) -> Dict:
+        """프롬프트 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'budget': self.budget,
+            'avg_prompt_tokens': round(stats['prompt_tokens'] / stats['prompts'], 1) if stats['prompts'] else 0.0
+        })
+        return stats
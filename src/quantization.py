@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+임베딩 양자화
+- ScalarQuantizer: 차원별 int8 스칼라 양자화 (float32 대비 1/4 메모리)
+- ProductQuantizer: 부분공간별 256개 중심점 코드북 PQ (1536차원 → m바이트, 예: m=96 이면 1/64)
+- 양자화 코드로 근사 점수 계산 후, 후보 소수만 원본 벡터(recipes.embedding)로 재정렬
+"""
+
+import logging
+from typing import Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_TYPES = ('none', 'int8', 'pq')
+
+
+class ScalarQuantizer:
+    """차원별 min/max 범위를 int8(-128~127)로 선형 매핑"""
+
+    kind = 'int8'
+
+    def __init__(self, offset: np.ndarray = None, scale: np.ndarray = None):
+        self.offset = offset
+        self.scale = scale
+
+    def fit(self, vectors: np.ndarray) -> 'ScalarQuantizer':
+        low = vectors.min(axis=0)
+        high = vectors.max(axis=0)
+        self.scale = np.maximum(high - low, 1e-12).astype(np.float32) / 255.0
+        # 코드 -128 ↔ low, 127 ↔ high
+        self.offset = (low + 128.0 * self.scale).astype(np.float32)
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.offset) / self.scale)
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * self.scale + self.offset
+
+    def scores(self, codes: np.ndarray, query: np.ndarray, block: int = 16384) -> np.ndarray:
+        """비대칭 내적: q·x ≈ (q*scale)·code + q·offset (블록 단위로 float 변환)"""
+        weighted = (query * self.scale).astype(np.float32)
+        bias = float(query @ self.offset)
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), block):
+            out[start:start + block] = codes[start:start + block].astype(np.float32) @ weighted
+        return out + bias
+
+    def bytes_per_vector(self, dimensions: int) -> int:
+        return dimensions
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {'offset': self.offset, 'scale': self.scale}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> 'ScalarQuantizer':
+        return cls(state['offset'], state['scale'])
+
+
+class ProductQuantizer:
+    """벡터를 m개 부분공간으로 나눠 부분공간별 256개 중심점 인덱스(uint8)로 저장"""
+
+    kind = 'pq'
+
+    def __init__(self, m: int = 96, codebooks: np.ndarray = None):
+        """
+        Args:
+            m: 부분공간 수 (차원이 m으로 나누어떨어져야 함)
+            codebooks: (m, 256, 부분공간 차원) 코드북
+        """
+        self.m = m
+        self.codebooks = codebooks
+
+    def fit(self, vectors: np.ndarray, iterations: int = 15, sample: int = 20000,
+            seed: int = 0) -> 'ProductQuantizer':
+        dimensions = vectors.shape[1]
+        if dimensions % self.m:
+            raise ValueError(f"dimensions {dimensions} is not divisible by m={self.m}")
+        rng = np.random.default_rng(seed)
+        train = np.asarray(vectors[rng.choice(len(vectors), min(sample, len(vectors)), replace=False)])
+        sub = dimensions // self.m
+        k = min(256, len(train))
+        self.codebooks = np.empty((self.m, 256, sub), dtype=np.float32)
+        for j in range(self.m):
+            part = train[:, j * sub:(j + 1) * sub]
+            centroids = part[rng.choice(len(part), k, replace=False)].copy()
+            for _ in range(iterations):
+                # 제곱 거리 = |x|² - 2x·c + |c|² (|x|²는 argmin에 무관)
+                assign = np.argmin((centroids ** 2).sum(axis=1) - 2 * part @ centroids.T, axis=1)
+                for c in range(k):
+                    members = part[assign == c]
+                    if len(members):
+                        centroids[c] = members.mean(axis=0)
+            self.codebooks[j, :k] = centroids
+            self.codebooks[j, k:] = centroids[0]
+        return self
+
+    def encode(self, vectors: np.ndarray, block: int = 16384) -> np.ndarray:
+        sub = self.codebooks.shape[2]
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        norms = (self.codebooks ** 2).sum(axis=2)
+        for start in range(0, len(vectors), block):
+            chunk = np.asarray(vectors[start:start + block])
+            for j in range(self.m):
+                part = chunk[:, j * sub:(j + 1) * sub]
+                codes[start:start + block, j] = np.argmin(norms[j] - 2 * part @ self.codebooks[j].T, axis=1)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return np.concatenate([self.codebooks[j][codes[:, j]] for j in range(self.m)], axis=1)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray, block: int = 65536) -> np.ndarray:
+        """ADC: 부분공간별 (쿼리 조각 · 중심점) 룩업 테이블을 코드로 합산"""
+        sub = self.codebooks.shape[2]
+        table = np.einsum('jkd,jd->jk', self.codebooks, query.reshape(self.m, sub)).astype(np.float32)
+        out = np.empty(len(codes), dtype=np.float32)
+        columns = np.arange(self.m)
+        for start in range(0, len(codes), block):
+            out[start:start + block] = table[columns, codes[start:start + block]].sum(axis=1)
+        return out
+
+    def bytes_per_vector(self, dimensions: int) -> int:
+        return self.m
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {'codebooks': self.codebooks}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> 'ProductQuantizer':
+        codebooks = state['codebooks']
+        return cls(m=codebooks.shape[0], codebooks=codebooks)
+
+
+def make_quantizer(kind: str, pq_m: int = 96):
+    """양자화기 생성 ('none'이면 None)"""
+    if kind == 'int8':
+        return ScalarQuantizer()
+    if kind == 'pq':
+        return ProductQuantizer(m=pq_m)
+    if kind == 'none':
+        return None
+    raise ValueError(f"Unknown quantization '{kind}' (choose from {QUANTIZATION_TYPES})")
+
+
+def load_quantizer(kind: str, state: Dict[str, np.ndarray]):
+    """저장된 상태로 양자화기 복원"""
+    return {'int8': ScalarQuantizer, 'pq': ProductQuantizer}[kind].from_state(state)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+레시피 상세 문서 (한국어)
+- 조리시간/인분 한국어 표기, 검색 필터용 숫자 값(cooking_minutes / servings_count) 파싱
+- 재료 분류, 조리 단계 그룹화
+- 수집 시 또는 백필 작업으로 한 번만 생성해 recipe_details 테이블에 저장
+  (요청마다 GPT 번역 없이 바로 제공)
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# 개인적인 표현 제거용 패턴 (감탄사, 이모티콘)
+_EMOTICON_PATTERN = re.compile(
+    r'\^\^+|\^_*\^|[ㅋㅎㅠㅜ]{2,}|:\)|;\)|[♡♥★☆]'
+    r'|[\U0001F300-\U0001FAFF\U00002600-\U000027BF]'
+)
+# 문장 끝 물결표 (재료 분량의 '2~3개' 같은 범위 표기는 유지)
+_TRAILING_TILDE_PATTERN = re.compile(r'~+(?=[!?.\s]|$)')
+# ISO8601 조리시간 (PT1H30M, PT45S)
+_ISO_DURATION_PATTERN = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?')
+# 단어 구성 문자 (카테고리 이름 앞뒤 경계 판정)
+_WORD_CHARS = r'0-9A-Za-z가-힣'
+# 카테고리 이름 뒤에 붙을 수 있는 조사 ('양식으로', '국/탕이요')
+_PARTICLES = r'(?:이랑|으로|에서|이나|이요|은|는|이|가|을|를|로|에|의|도|만|류|과|와|랑|나|요){0,2}'
+
+
+def format_duration_korean(value: Optional[str]) -> str:
+    if not value:
+        return "미정"
+    s = str(value)
+    # ISO8601 like PT30M, PT1H30M, PT45S
+    if s.startswith('PT'):
+        hours = minutes = seconds = 0
+        cur = s[2:]
+        num = ''
+        for ch in cur:
+            if ch.isdigit():
+                num += ch
+            else:
+                if ch == 'H':
+                    hours = int(num or 0)
+                elif ch == 'M':
+                    minutes = int(num or 0)
+                elif ch == 'S':
+                    seconds = int(num or 0)
+                num = ''
+        parts = []
+        if hours:
+            parts.append(f"{hours}시간")
+        if minutes:
+            parts.append(f"{minutes}분")
+        if seconds and not parts:
+            parts.append(f"{seconds}초")
+        return ' '.join(parts) or "미정"
+    # already like '30분'
+    if any(u in s for u in ['분', '시간', '초']):
+        return s
+    # plain number treat as minutes
+    try:
+        n = int(''.join([c for c in s if c.isdigit()]))
+        if n:
+            return f"{n}분"
+    except Exception:
+        pass
+    return s
+
+
+def format_servings_korean(value: Optional[str]) -> str:
+    if not value:
+        return "미정"
+    s = str(value)
+    # e.g., '4 servings', '2인분'
+    digits = ''.join([c for c in s if c.isdigit()])
+    if digits:
+        return f"{int(digits)}인분"
+    return s
+
+
+def parse_duration_minutes(value: Optional[str]) -> Optional[int]:
+    """조리시간 원문 (PT1H30M, 1시간 30분, 30분 이내, 45) → 분 (해석 불가 시 None)"""
+    if not value:
+        return None
+    s = str(value).strip().upper()
+    if s.startswith('PT'):
+        match = _ISO_DURATION_PATTERN.fullmatch(s)
+        if not match:
+            return None
+        hours, minutes, seconds = (int(part or 0) for part in match.groups())
+        total = hours * 60 + minutes + (1 if seconds and not (hours or minutes) else 0)
+        return total or None
+    hours = re.search(r'(\d+)\s*시간', s)
+    minutes = re.search(r'(\d+)\s*분', s)
+    if hours or minutes:
+        return (int(hours.group(1)) * 60 if hours else 0) + (int(minutes.group(1)) if minutes else 0) or None
+    number = re.search(r'\d+', s)
+    return int(number.group()) or None if number else None
+
+
+def parse_servings_count(value: Optional[str]) -> Optional[int]:
+    """인분 원문 (2인분, 4 servings, 2~3인분, 6인분 이상) → 첫 숫자 (해석 불가 시 None)"""
+    number = re.search(r'\d+', str(value or ''))
+    return int(number.group()) or None if number else None
+
+
+def normalize_category(value) -> Optional[str]:
+    """수집 카테고리 (문자열 또는 JSON-LD 목록) → 저장용 문자열"""
+    if isinstance(value, (list, tuple)):
+        value = next((v for v in value if v), None)
+    value = str(value or '').strip()
+    return value[:50] or None
+
+
+def format_minutes_korean(minutes: Optional[int]) -> str:
+    """분 → 한국어 표기 (90 → '1시간 30분')"""
+    if not minutes:
+        return "미정"
+    hours, rest = divmod(int(minutes), 60)
+    parts = ([f"{hours}시간"] if hours else []) + ([f"{rest}분"] if rest else [])
+    return ' '.join(parts)
+
+
+def format_servings_count_korean(count: Optional[int]) -> str:
+    return f"{count}인분" if count else "미정"
+
+
+def extract_recipe_filters(text: str, categories: List[str] = ()) -> Dict:
+    """
+    자연어 요청에서 구조화 필터 추출 ("20분 이내 2인분 국/탕")
+    
+    Returns:
+        {'max_minutes': int, 'servings': int, 'category': str} 중 찾은 항목만
+    """
+    filters = {}
+    text = text or ''
+    duration = re.search(r'(\d+)\s*(시간|분)\s*(?:이내|이하|안에|안쪽|미만|까지)', text) \
+        or re.search(r'(?:under|within|less than)\s*(\d+)\s*(hours?|min(?:ute)?s?)', text, re.IGNORECASE)
+    if duration:
+        amount = int(duration.group(1))
+        filters['max_minutes'] = amount * 60 if duration.group(2).startswith(('시간', 'hour')) else amount
+    servings = re.search(r'(\d+)\s*인분', text) or re.search(r'(\d+)\s*servings?', text, re.IGNORECASE)
+    if servings:
+        filters['servings'] = int(servings.group(1))
+    # 긴 이름 우선 (예: '메인반찬'이 '반찬'보다 먼저), 단어 경계에서만 인정
+    # ('영양식'의 '양식', '빵가루'의 '빵'은 카테고리가 아님)
+    for category in sorted(categories, key=len, reverse=True):
+        if category and category_mentioned(category, text):
+            filters['category'] = category
+            break
+    return filters
+
+
+def category_mentioned(category: str, text: str) -> bool:
+    """text에 카테고리 이름이 독립된 단어로 있는지 (뒤에 조사는 허용)"""
+    pattern = rf'(?<![{_WORD_CHARS}]){re.escape(category)}{_PARTICLES}(?![{_WORD_CHARS}])'
+    return re.search(pattern, text) is not None
+
+
+def clean_korean_text(text: Optional[str]) -> str:
+    """개인적인 표현(~!, ^^, 감탄사 이모티콘 등)을 제거하고 공백 정리"""
+    if not text:
+        return ""
+    text = _EMOTICON_PATTERN.sub('', str(text))
+    text = _TRAILING_TILDE_PATTERN.sub('', text)
+    text = re.sub(r'([!?])\1+', r'\1', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def classify_ingredient(name: str) -> str:
+    text = (name or '').lower()
+    seasoning_kw = [
+        '간장','고추장','된장','소금','설탕','후추','식용유','참기름','고춧가루','다진 마늘','마늘','양념','청주','미림','식초','버터','올리브유','우스터','소스','후춧가루','설탕','꿀','고추기름','된장','쌈장','파우더','조미료'
+    ]
+    main_kw = [
+        '닭','소고기','돼지고기','쇠고기','양고기','생선','새우','오징어','문어','두부','두유','베이컨','햄','계란','달걀','면','파스타','밥','쌀','감자','고구마','버섯','두껍','스테이크'
+    ]
+    if any(k in text for k in seasoning_kw):
+        return 'seasoning'
+    if any(k in text for k in main_kw):
+        return 'main'
+    return 'sub'
+
+
+def split_ingredients_kor(ings: list[str]) -> dict:
+    result = {'main': [], 'sub': [], 'seasoning': []}
+    for ing in ings:
+        cat = classify_ingredient(ing)
+        result[cat].append(ing)
+    return result
+
+
+def group_steps_kor(steps: list[str]) -> list[tuple[str, list[str]]]:
+    groups: list[tuple[str, list[str]]] = []
+    buckets = {
+        '준비': [],
+        '볶기/굽기': [],
+        '끓이기/조림': [],
+        '마무리': []
+    }
+    for s in steps:
+        t = s.lower()
+        if any(k in t for k in ['손질','썰','자르','씻','준비','해동','다지']):
+            buckets['준비'].append(s)
+        elif any(k in t for k in ['볶','굽','부침','지지','볶아','팬','프라이팬']):
+            buckets['볶기/굽기'].append(s)
+        elif any(k in t for k in ['끓','조리','졸','끓이','煮']):
+            buckets['끓이기/조림'].append(s)
+        elif any(k in t for k in ['완성','담','섞','간','추가','서빙']):
+            buckets['마무리'].append(s)
+        else:
+            buckets['마무리'].append(s)
+    for k in ['준비','볶기/굽기','끓이기/조림','마무리']:
+        if buckets[k]:
+            groups.append((k, buckets[k]))
+    return groups
+
+
+def render_recipe_markdown(title: str, cooking_time: Optional[str], servings: Optional[str],
+                           ingredient_groups: Dict[str, List[str]],
+                           step_groups: List[tuple], cooking_steps: List[str]) -> str:
+    """채팅식 레시피 설명 마크다운 생성"""
+    time_kr = format_duration_korean(cooking_time)
+    servings_kr = format_servings_korean(servings)
+
+    md_lines = []
+    md_lines.append(f"🍳 **{title}** 레시피를 알려드릴게요!")
+    md_lines.append("")
+    md_lines.append(f"⏰ **조리시간**: {time_kr}")
+    md_lines.append(f"👥 **인분**: {servings_kr}")
+    md_lines.append("")
+    md_lines.append("🥘 **재료**")
+    if ingredient_groups.get('main'):
+        md_lines.append("- **주재료**:")
+        md_lines += [f"  - {x}" for x in ingredient_groups['main']]
+    if ingredient_groups.get('sub'):
+        md_lines.append("- **부재료**:")
+        md_lines += [f"  - {x}" for x in ingredient_groups['sub']]
+    if ingredient_groups.get('seasoning'):
+        md_lines.append("- **양념**:")
+        md_lines += [f"  - {x}" for x in ingredient_groups['seasoning']]
+    if not any(ingredient_groups.values()):
+        md_lines.append("- 재료 정보 없음")
+    md_lines.append("")
+    md_lines.append("👨‍🍳 **조리 단계**")
+    if step_groups:
+        for group_title, steps_list in step_groups:
+            md_lines.append(f"- **{group_title}**")
+            for idx, st in enumerate(steps_list, 1):
+                md_lines.append(f"  {idx}. {st}")
+    else:
+        if cooking_steps:
+            for idx, st in enumerate(cooking_steps, 1):
+                md_lines.append(f"{idx}. {st}")
+        else:
+            md_lines.append("- 조리 방법 정보 없음")
+    md_lines.append("")
+    md_lines.append("맛있게 만들어보세요! 😊")
+
+    return "\n".join(md_lines)
+
+
+def build_recipe_detail(title: str, cooking_time: Optional[str], servings: Optional[str],
+                        ingredients: List[str], cooking_steps: List[str]) -> Dict:
+    """
+    한국어 원문으로 레시피 상세 문서 생성 (LLM 호출 없음)
+    
+    Args:
+        title: 레시피 제목 (한국어)
+        cooking_time: 원본 조리시간 (예: PT30M)
+        servings: 원본 인분 (예: 2인분)
+        ingredients: 재료 원문 리스트 (ingredients.name)
+        cooking_steps: 조리 단계 원문 리스트 (cooking_steps.description, step_number 순)
+    
+    Returns:
+        {'ingredients', 'cooking_steps', 'ingredient_groups', 'step_groups', 'markdown'}
+    """
+    clean_ingredients = [x for x in (clean_korean_text(i) for i in ingredients) if x]
+    clean_steps = [x for x in (clean_korean_text(st) for st in cooking_steps) if x]
+    ingredient_groups = split_ingredients_kor(clean_ingredients)
+    step_groups = group_steps_kor(clean_steps)
+
+    return {
+        'ingredients': clean_ingredients,
+        'cooking_steps': clean_steps,
+        'ingredient_groups': ingredient_groups,
+        'step_groups': [[group_title, steps_list] for group_title, steps_list in step_groups],
+        'markdown': render_recipe_markdown(
+            title, cooking_time, servings, ingredient_groups, step_groups, clean_steps
+        )
+    }
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+검색 결과 캐시
+- 키: (쿼리 지문, limit, min_similarity, 필터)
+- 값: 순위가 매겨진 (id, similarity) 리스트
+- 항목마다 데이터셋 버전을 기록하고, 버전이 바뀌면 자동으로 버림 (TTL 추정 불필요)
+- 페이지 커서: (마지막 유사도, 마지막 id, 검색 지문)을 불투명 문자열로 인코딩 (keyset 페이지네이션)
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from src.embedding_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+RankedResults = List[Tuple[int, float]]
+
+
+def query_fingerprint(query: str, model: str) -> str:
+    """정규화 쿼리 + 임베딩 모델 → 쿼리 지문"""
+    raw = f"{model}\n{normalize_query(query)}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def search_fingerprint(key: tuple) -> str:
+    """캐시 키(쿼리 지문 + min_similarity + 필터/파라미터, limit 제외) → 커서 검증용 지문"""
+    fingerprint, _, min_similarity, filter_items = key
+    raw = json.dumps([fingerprint, min_similarity, filter_items], ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def encode_cursor(similarity: float, recipe_id: int, fingerprint: str) -> str:
+    """다음 페이지 커서 (유사도는 float 그대로 보존해 SQL keyset 비교가 정확히 일치)"""
+    raw = json.dumps({'s': similarity, 'i': recipe_id, 'f': fingerprint}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> Tuple[float, int]:
+    """
+    커서 → (마지막 유사도, 마지막 id)
+    
+    Raises:
+        ValueError: 잘못된 커서이거나 다른 검색(쿼리/필터/파라미터)의 커서
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        after = (float(data['s']), int(data['i']))
+        owner = data['f']
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if owner != fingerprint:
+        raise ValueError("Cursor does not belong to this search (query, filters or parameters changed)")
+    return after
+
+
+class SearchResultCache:
+    """데이터셋 버전 기반 top-k 검색 결과 캐시"""
+
+    def __init__(self, max_entries: int = 5000, version_check_interval: float = 2.0):
+        """
+        Args:
+            max_entries: 최대 항목 수 (초과 시 LRU 제거)
+            version_check_interval: DB 데이터셋 버전 재확인 간격 (초)
+        """
+        self.max_entries = max_entries
+        self.version_check_interval = version_check_interval
+        self.version: Optional[int] = None
+        self._last_version_check = 0.0
+        self._entries: 'OrderedDict[tuple, Tuple[int, RankedResults]]' = OrderedDict()
+        self._lock = Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    @classmethod
+    def from_env(cls) -> 'SearchResultCache':
+        """환경변수 기반 생성"""
+        return cls(
+            max_entries=int(os.getenv('SEARCH_CACHE_SIZE', '5000')),
+            version_check_interval=float(os.getenv('SEARCH_CACHE_VERSION_CHECK', '2'))
+        )
+
+    @staticmethod
+    def make_key(fingerprint: str, limit: int, min_similarity: float,
+                 filters: Optional[Dict] = None) -> tuple:
+        """캐시 키 생성 (필터는 정렬된 튜플로 고정)"""
+        filter_items = tuple(sorted((k, v) for k, v in (filters or {}).items() if v is not None))
+        return (fingerprint, int(limit), round(float(min_similarity), 4), filter_items)
+
+    def needs_version_check(self) -> bool:
+        """DB 버전 재확인이 필요한지 (확인 간격 경과 여부)"""
+        return self.version is None or time.monotonic() - self._last_version_check >= self.version_check_interval
+
+    def observe_version(self, version: Optional[int]):
+        """DB에서 읽은 데이터셋 버전 반영 (바뀌었으면 기존 항목 전부 폐기)"""
+        with self._lock:
+            self._last_version_check = time.monotonic()
+            if version != self.version:
+                if self._entries:
+                    self._stats['invalidations'] += 1
+                    logger.info(f"🔄 Dataset version {self.version} → {version}: "
+                                f"dropped {len(self._entries)} cached searches")
+                self._entries.clear()
+                self.version = version
+
+    def get(self, key: tuple) -> Optional[RankedResults]:
+        """캐시 조회 (현재 버전과 다른 항목은 버림)"""
+        with self._lock:
+            if self.version is None:
+                # 버전 테이블이 없으면 무효화 기준이 없으므로 캐시하지 않음
+                self._stats['misses'] += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            version, results = entry
+            if version != self.version:
+                del self._entries[key]
+                self._stats['stale'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return results
+
+    def put(self, key: tuple, results: RankedResults):
+        """현재 데이터셋 버전으로 결과 저장"""
+        with self._lock:
+            if self.version is None:
+                return
+            self._entries[key] = (self.version, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'max_entries': self.max_entries,
+            'dataset_version': self.version,
+            'hit_rate': round(stats['hits'] / lookups, 3) if lookups else 0.0
+        })
+        return stats
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+채팅 의미 기반 답변 캐시
+- 항목: (쿼리 임베딩, 취향 튜플, 검색된 레시피 id, 생성된 추천 마크다운)
+- 취향과 검색 결과가 같고 쿼리 임베딩 코사인 유사도가 임계값 이상이면 캐시된 답변 재사용
+  ("소고기 요리 알려줘" ≈ "소고기 레시피 추천" → GPT 호출 생략)
+- LRU + TTL, 데이터셋 버전이 바뀌면 전부 폐기
+"""
+
+import os
+import time
+import logging
+from collections import OrderedDict
+from itertools import count
+from threading import Lock
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """쿼리 임베딩 유사도 기반 채팅 답변 캐시"""
+
+    def __init__(self, max_entries: int = 1000, threshold: float = 0.95, ttl: float = 21600):
+        """
+        Args:
+            max_entries: 최대 항목 수 (초과 시 LRU 제거)
+            threshold: 쿼리 임베딩 코사인 유사도 임계값
+            ttl: 항목 유효 시간(초, 0이면 무제한)
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.version: Optional[int] = None
+        self._ids = count()
+        # entry_id → (key, 정규화 벡터, 마크다운, 저장 시각), LRU 순서
+        self._entries: OrderedDict = OrderedDict()
+        # (취향, 레시피 id) → entry_id 집합 (유사도 비교는 같은 키끼리만)
+        self._by_key: Dict[tuple, set] = {}
+        self._lock = Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'expired': 0, 'invalidations': 0}
+
+    @classmethod
+    def from_env(cls) -> 'SemanticAnswerCache':
+        """환경변수 기반 생성"""
+        return cls(
+            max_entries=int(os.getenv('SEMANTIC_CACHE_SIZE', '1000')),
+            threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.95')),
+            ttl=float(os.getenv('SEMANTIC_CACHE_TTL', '21600'))
+        )
+
+    @staticmethod
+    def make_key(preferences: Sequence, recipe_ids: Sequence[int]) -> tuple:
+        """캐시 키 (취향 튜플, 검색 결과 id 순서 포함)"""
+        return (tuple(preferences), tuple(recipe_ids))
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def _remove(self, entry_id: int):
+        key = self._entries.pop(entry_id)[0]
+        ids = self._by_key.get(key)
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._by_key[key]
+
+    def observe_version(self, version: Optional[int]):
+        """데이터셋 버전 반영 (바뀌었으면 기존 답변 전부 폐기)"""
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self._stats['invalidations'] += 1
+                    logger.info(f"🔄 Dataset version {self.version} → {version}: "
+                                f"dropped {len(self._entries)} cached chat answers")
+                self._entries.clear()
+                self._by_key.clear()
+                self.version = version
+
+    def get(self, query_vector: List[float], preferences: Sequence,
+            recipe_ids: Sequence[int]) -> Optional[str]:
+        """취향/검색 결과가 같고 쿼리가 충분히 비슷한 캐시 답변 조회"""
+        key = self.make_key(preferences, recipe_ids)
+        with self._lock:
+            if self.version is None or key not in self._by_key:
+                # 버전 테이블이 없으면 무효화 기준이 없으므로 캐시하지 않음
+                self._stats['misses'] += 1
+                return None
+            now = time.monotonic()
+            candidates = []
+            for entry_id in list(self._by_key[key]):
+                if self.ttl and now - self._entries[entry_id][3] > self.ttl:
+                    self._remove(entry_id)
+                    self._stats['expired'] += 1
+                else:
+                    candidates.append(entry_id)
+            if not candidates:
+                self._stats['misses'] += 1
+                return None
+            similarities = np.stack([self._entries[i][1] for i in candidates]) @ self._normalize(query_vector)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self._stats['misses'] += 1
+                return None
+            entry_id = candidates[best]
+            self._entries.move_to_end(entry_id)
+            self._stats['hits'] += 1
+            return self._entries[entry_id][2]
+
+    def put(self, query_vector: List[float], preferences: Sequence, recipe_ids: Sequence[int],
+            markdown: str):
+        """현재 데이터셋 버전으로 답변 저장"""
+        if not markdown:
+            return
+        key = self.make_key(preferences, recipe_ids)
+        with self._lock:
+            if self.version is None:
+                return
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (key, self._normalize(query_vector), markdown, time.monotonic())
+            self._by_key.setdefault(key, set()).add(entry_id)
+            self._stats['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'max_entries': self.max_entries,
+            'threshold': self.threshold,
+            'dataset_version': self.version,
+            'hit_rate': round(stats['hits'] / lookups, 3) if lookups else 0.0
+        })
+        return stats
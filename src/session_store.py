@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+채팅 세션 저장소 (사용자별 대화 내역 + 취향)
+- memory: 워커 내 LRU (전체 세션 수 상한 + 유휴 TTL), 세션은 압축 JSON 바이트로 보관
+- postgres: chat_sessions 테이블 (db/migrations/008_chat_sessions.sql)
+  워커 간 공유, 재시작 후에도 유지, 조회/저장은 기본키 1건씩
+- 대화 내역은 턴마다 [역할 코드, 내용] 쌍으로 압축 저장
+- 요청당 load 1번 → update(읽은 세션, 변경 함수): 그사이 다른 요청이 저장했으면 최신 세션에 변경을 다시 적용
+  (같은 사용자의 동시 요청이 서로의 대화 턴을 덮어쓰지 않음)
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.prompt_builder import SUMMARY_ROLE
+
+logger = logging.getLogger(__name__)
+
+# 세션 저장소 백엔드
+SESSION_BACKENDS = ('memory', 'postgres')
+
+# 대화 내역 역할 ↔ 저장 코드
+_ROLE_CODES = {SUMMARY_ROLE: 's', 'user': 'u', 'assistant': 'a'}
+_CODE_ROLES = {code: role for role, code in _ROLE_CODES.items()}
+
+
+def encode_history(history: List[Dict]) -> List[List[str]]:
+    """대화 내역 → 압축 형식 ([["u", 내용], ["a", 내용], ...])"""
+    return [[_ROLE_CODES[message['role']], message['content']] for message in history]
+
+
+def decode_history(rows: List[List[str]]) -> List[Dict]:
+    """압축 형식 → 대화 내역 (PromptBuilder 형식)"""
+    return [{"role": _CODE_ROLES[code], "content": content} for code, content in rows]
+
+
+def empty_session() -> Dict:
+    """새 세션 (version 0 = 저장된 적 없음)"""
+    return {'history': [], 'prefs': {}, 'version': 0}
+
+
+# update()에 넘기는 변경 함수: 세션 → (새 대화 내역, 새 취향)
+SessionUpdate = Callable[[Dict], Tuple[List[Dict], Dict]]
+
+
+class MemorySessionStore:
+    """워커 내 세션 저장소 (LRU + 유휴 TTL)"""
+
+    backend = 'memory'
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 86400):
+        """
+        Args:
+            max_sessions: 최대 세션 수 (초과 시 가장 오래 쓰지 않은 세션 제거, 0이면 무제한)
+            ttl: 유휴 TTL(초, 마지막 조회/저장 후 경과, 0이면 무제한)
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        # user_id → (압축 JSON 바이트, 마지막 사용 시각, version), 오래 쓰지 않은 순
+        self._sessions: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'saves': 0, 'conflicts': 0, 'evictions': 0, 'expired': 0}
+
+    @classmethod
+    def from_env(cls) -> 'MemorySessionStore':
+        """환경변수 기반 생성"""
+        return cls(
+            max_sessions=int(os.getenv('CHAT_SESSION_MAX', '10000')),
+            ttl=float(os.getenv('CHAT_SESSION_TTL', '86400'))
+        )
+
+    def _remove(self, user_id: str):
+        self._bytes -= len(self._sessions.pop(user_id)[0])
+
+    def _evict(self, now: float):
+        """앞쪽(가장 오래 쓰지 않은 세션)부터 TTL 지난 세션 → 상한 초과분 제거"""
+        while self._sessions and self.ttl:
+            user_id, (_, last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl:
+                break
+            self._remove(user_id)
+            self._stats['expired'] += 1
+        while self.max_sessions and len(self._sessions) > self.max_sessions:
+            self._remove(next(iter(self._sessions)))
+            self._stats['evictions'] += 1
+
+    @staticmethod
+    def _decode(payload: bytes, version: int) -> Dict:
+        data = json.loads(payload)
+        return {'history': decode_history(data['h']), 'prefs': data['p'], 'version': version}
+
+    async def load(self, user_id: str) -> Dict:
+        """세션 조회 → {'history': [...], 'prefs': {...}, 'version': int} (없거나 만료면 빈 세션)"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._sessions.get(user_id)
+            if entry is None:
+                self._stats['misses'] += 1
+                return empty_session()
+            self._sessions[user_id] = (entry[0], now, entry[2])
+            self._sessions.move_to_end(user_id)
+            self._stats['hits'] += 1
+        return self._decode(entry[0], entry[2])
+
+    async def update(self, user_id: str, session: Dict, apply: SessionUpdate) -> Dict:
+        """
+        읽은 세션에 변경 적용 후 저장 (읽은 뒤 다른 요청이 저장했으면 최신 세션에 다시 적용)
+
+        Returns:
+            저장된 세션
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._sessions.get(user_id)
+            version = entry[2] if entry is not None else 0
+            if version != session.get('version', 0):
+                self._stats['conflicts'] += 1
+                session = self._decode(entry[0], version) if entry is not None else empty_session()
+            history, prefs = apply(session)
+            payload = json.dumps(
+                {'h': encode_history(history), 'p': prefs}, ensure_ascii=False, separators=(',', ':')
+            ).encode('utf-8')
+            if entry is not None:
+                self._remove(user_id)
+            self._sessions[user_id] = (payload, now, version + 1)
+            self._bytes += len(payload)
+            self._stats['saves'] += 1
+            self._evict(now)
+        return {'history': history, 'prefs': prefs, 'version': version + 1}
+
+    def stats(self) -> Dict:
+        """세션 저장소 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({'sessions': len(self._sessions), 'bytes': self._bytes})
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'backend': self.backend,
+            'max_sessions': self.max_sessions,
+            'ttl': self.ttl,
+            'hit_rate': round(stats['hits'] / lookups, 3) if lookups else 0.0
+        })
+        return stats
+
+
+class PostgresSessionStore:
+    """
+    Postgres 세션 저장소 (chat_sessions 테이블, 워커 간 공유)
+
+    조회 시점에 유휴 TTL을 적용하므로 만료된 세션은 삭제 전에도 보이지 않는다.
+    삭제(유휴 TTL + 최대 세션 수)는 워커마다 purge_interval 초에 한 번 백그라운드로 실행한다.
+    """
+
+    backend = 'postgres'
+
+    def __init__(self, db, max_sessions: int = 10000, ttl: float = 86400, purge_interval: float = 300):
+        """
+        Args:
+            db: 풀 모드로 연결된 RecipeDB
+            max_sessions: 최대 세션 수 (삭제 주기마다 초과분을 오래된 순으로 삭제, 0이면 무제한)
+            ttl: 유휴 TTL(초, 마지막 저장 후 경과, 0이면 무제한)
+            purge_interval: 삭제 실행 간격(초)
+        """
+        self.db = db
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._lock = Lock()
+        self._last_purge = 0.0
+        self._purge_task: Optional[asyncio.Task] = None
+        self._table = {'sessions': None, 'bytes': None}
+        self._stats = {'hits': 0, 'misses': 0, 'saves': 0, 'conflicts': 0, 'evictions': 0, 'expired': 0,
+                       'errors': 0, 'total_ms': 0.0}
+
+    @classmethod
+    def from_env(cls, db) -> 'PostgresSessionStore':
+        """환경변수 기반 생성"""
+        return cls(
+            db,
+            max_sessions=int(os.getenv('CHAT_SESSION_MAX', '10000')),
+            ttl=float(os.getenv('CHAT_SESSION_TTL', '86400')),
+            purge_interval=float(os.getenv('CHAT_SESSION_PURGE_INTERVAL', '300'))
+        )
+
+    def _record(self, key: str, started: float):
+        with self._lock:
+            self._stats[key] += 1
+            self._stats['total_ms'] += (time.perf_counter() - started) * 1000
+
+    async def load(self, user_id: str) -> Dict:
+        """세션 조회 → {'history': [...], 'prefs': {...}, 'version': int} (없거나 만료면 빈 세션)"""
+        started = time.perf_counter()
+        try:
+            async with self.db.acquire_async() as cur:
+                row = await cur.run(self.db.get_chat_session, user_id, self.ttl)
+        except Exception as e:
+            # 세션 저장소 장애로 채팅 자체가 실패하지 않도록 빈 세션으로 진행
+            logger.warning(f"⚠️  채팅 세션 조회 실패 ({user_id}): {e}")
+            with self._lock:
+                self._stats['errors'] += 1
+            return empty_session()
+        self._record('hits' if row else 'misses', started)
+        if not row:
+            return empty_session()
+        return {'history': decode_history(row[0]), 'prefs': row[1] or {}, 'version': row[2]}
+
+    async def update(self, user_id: str, session: Dict, apply: SessionUpdate,
+                     attempts: int = 3) -> Optional[Dict]:
+        """
+        읽은 세션에 변경 적용 후 version 비교 저장, 충돌하면 다시 읽고 재적용 (최대 attempts번)
+
+        Returns:
+            저장된 세션 (실패하면 None, 채팅 응답은 그대로 진행)
+        """
+        for _ in range(attempts):
+            history, prefs = apply(session)
+            started = time.perf_counter()
+            try:
+                async with self.db.acquire_async() as cur:
+                    version = await cur.run(
+                        self.db.save_chat_session, user_id, encode_history(history), prefs,
+                        session.get('version', 0), self.ttl
+                    )
+            except Exception as e:
+                logger.warning(f"⚠️  채팅 세션 저장 실패 ({user_id}): {e}")
+                with self._lock:
+                    self._stats['errors'] += 1
+                return None
+            if version is not None:
+                self._record('saves', started)
+                self._schedule_purge()
+                return {'history': history, 'prefs': prefs, 'version': version}
+            # 다른 요청이 먼저 저장 → 최신 세션을 읽어 변경 재적용
+            with self._lock:
+                self._stats['conflicts'] += 1
+            session = await self.load(user_id)
+        logger.warning(f"⚠️  채팅 세션 저장 충돌이 계속되어 이번 턴을 저장하지 않았습니다 ({user_id})")
+        with self._lock:
+            self._stats['errors'] += 1
+        return None
+
+    def _schedule_purge(self):
+        with self._lock:
+            now = time.monotonic()
+            if (self._purge_task is not None and not self._purge_task.done()) \
+                    or now - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = now
+            self._purge_task = asyncio.get_running_loop().create_task(self.purge())
+
+    async def purge(self) -> Dict:
+        """유휴/상한 초과 세션 삭제 (다른 워커와 동시에 실행돼도 안전)"""
+        try:
+            async with self.db.acquire_async() as cur:
+                result = await cur.run(self.db.purge_chat_sessions, self.ttl, self.max_sessions)
+        except Exception as e:
+            logger.warning(f"⚠️  채팅 세션 정리 실패: {e}")
+            with self._lock:
+                self._stats['errors'] += 1
+            return {}
+        with self._lock:
+            self._stats['expired'] += result['expired']
+            self._stats['evictions'] += result['evicted']
+            self._table = {'sessions': result['sessions'], 'bytes': result['bytes']}
+        if result['expired'] or result['evicted']:
+            logger.info(f"🧹 Chat sessions purged: {result['expired']} idle, {result['evicted']} over cap "
+                        f"({result['sessions']} left)")
+        return result
+
+    def stats(self) -> Dict:
+        """세션 저장소 통계 (sessions/bytes는 마지막 삭제 주기 기준 테이블 전체)"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(self._table)
+        lookups = stats['hits'] + stats['misses']
+        queries = lookups + stats['saves']
+        stats.update({
+            'backend': self.backend,
+            'max_sessions': self.max_sessions,
+            'ttl': self.ttl,
+            'hit_rate': round(stats['hits'] / lookups, 3) if lookups else 0.0,
+            'avg_ms': round(stats.pop('total_ms') / queries, 2) if queries else 0.0
+        })
+        return stats
+
+
+def session_store_from_env(db=None):
+    """CHAT_SESSION_BACKEND(memory | postgres)에 맞는 세션 저장소 생성 (postgres는 풀 연결된 db 필요)"""
+    backend = os.getenv('CHAT_SESSION_BACKEND', 'memory').lower()
+    if backend not in SESSION_BACKENDS:
+        raise ValueError(f"CHAT_SESSION_BACKEND must be one of {SESSION_BACKENDS}: {backend}")
+    if backend == 'postgres':
+        if db is None:
+            raise ValueError("CHAT_SESSION_BACKEND=postgres requires a pooled RecipeDB")
+        return PostgresSessionStore.from_env(db)
+    return MemorySessionStore.from_env()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+임베딩 입력 토큰 계산
+- tiktoken 설치 시 모델 토크나이저로 정확히 계산, 없으면 보수적 근사치
+- 토큰 예산 기준 텍스트 분할 (문장/줄 경계 우선)
+"""
+
+import re
+import logging
+from functools import lru_cache
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# 줄바꿈 / 문장 끝 경계
+_SEGMENT_PATTERN = re.compile(r'(?<=\n)|(?<=[.!?])\s+')
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """모델 토크나이저 (tiktoken 미설치 시 None)"""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.info("ℹ️  tiktoken not installed, using approximate token counts")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+
+def count_tokens(text: str, model: str = 'text-embedding-3-small') -> int:
+    """텍스트 토큰 수"""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # 근사치: ASCII는 4자당 1토큰, 한글 등 비ASCII는 글자당 1토큰 (과소 추정 방지)
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii) // 4 + non_ascii + 1
+
+
+def _hard_split(text: str, max_tokens: int, model: str) -> List[str]:
+    """경계 없이 토큰 수로 강제 분할 (한 문장이 예산을 넘을 때)"""
+    encoding = _encoding(model)
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+    pieces, current = [], ''
+    for word in text.split(' '):
+        candidate = f"{current} {word}" if current else word
+        if current and count_tokens(candidate, model) > max_tokens:
+            pieces.append(current)
+            candidate = word
+        current = candidate
+    if current:
+        pieces.append(current)
+    # 공백 없는 초장문 단어는 글자 수로 자름 (근사치에서 글자당 최대 1토큰)
+    return [p[i:i + max_tokens] for p in pieces for i in range(0, len(p), max_tokens)]
+
+
+def split_by_tokens(text: str, max_tokens: int, model: str = 'text-embedding-3-small') -> List[str]:
+    """
+    토큰 예산 이하 조각으로 분할 (줄/문장 경계에서 자름)
+
+    Args:
+        text: 분할할 텍스트
+        max_tokens: 조각당 최대 토큰 수
+        model: 토크나이저 기준 모델
+
+    Returns:
+        조각 리스트 (예산 이하면 [text])
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return [text]
+
+    chunks, current, current_tokens = [], '', 0
+    for segment in _SEGMENT_PATTERN.split(text):
+        if not segment:
+            continue
+        segment_tokens = count_tokens(segment, model)
+        if segment_tokens > max_tokens:
+            if current:
+                chunks.append(current)
+                current, current_tokens = '', 0
+            chunks.extend(_hard_split(segment, max_tokens, model))
+            continue
+        if current and current_tokens + segment_tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = '', 0
+        current = f"{current} {segment}" if current and not current.endswith('\n') else current + segment
+        current_tokens += segment_tokens
+    if current:
+        chunks.append(current)
+    return [c.strip() for c in chunks if c.strip()]
@@ -106,6 +106,9 @@ class TranslationFixer:
                 if steps:
                     updated.append(f'{len(steps)} steps')
             
+            # JSONB 레시피 문서 동기화
+            self.db.refresh_recipe_documents([recipe_id])
+            
             self.db.conn.commit()
             return True, updated
             
@@ -165,6 +168,10 @@ class TranslationFixer:
                 logger.error(f"❌ [{recipe_id}] {title[:40]}... - 실패: {details}")
                 failed += 1
         
+        # 번역(임베딩 원문)이 바뀌었으므로 검색 결과 캐시 무효화
+        if fixed > 0:
+            self.db.bump_dataset_version()
+        
         # 결과 요약
         result = {
             'total': len(missing_recipes),
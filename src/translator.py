@@ -19,6 +19,8 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 import random
 
+from src.openai_clients import OpenAIClientRegistry, get_registry, load_api_keys
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,22 +28,21 @@ class RecipeTranslator:
     """한글만 효율적으로 번역 (멀티 API 키 지원)"""
     
     def __init__(self, api_keys: List[str] = None, model: str = 'gpt-4o-mini', 
-                 delay: float = 2.0, cache_file: str = 'logs/translation_cache.json'):
+                 delay: float = 2.0, cache_file: str = 'logs/translation_cache.json',
+                 clients: Optional[OpenAIClientRegistry] = None):
         # 멀티 API 키 설정
         if api_keys is None:
-            # 환경변수에서 모든 API 키 로드
-            api_keys = []
-            for i in range(1, 11):  # 최대 10개까지
-                key_name = f'OPENAI_API_KEY_{i}' if i > 1 else 'OPENAI_API_KEY'
-                key = os.getenv(key_name)
-                if key and key != 'your-api-key-here' and key not in api_keys:
-                    api_keys.append(key)
+            # 환경변수에서 모든 API 키 로드 (최대 10개까지)
+            api_keys = load_api_keys()
         
         if not api_keys:
             raise ValueError("No valid API keys found")
         
         self.api_keys = api_keys
-        self.clients = [OpenAI(api_key=key) for key in api_keys]
+        # 키별 클라이언트는 공유 레지스트리에서 가져옴 (HTTP 커넥션 풀 공유)
+        self.registry = clients or get_registry()
+        self.clients = [self.registry.client(key) for key in api_keys]
+        self.timeout = self.registry.timeout('translation')
         self.current_key_index = 0
         
         logger.info(f"🔑 Loaded {len(self.api_keys)} API key(s)")
@@ -136,7 +137,8 @@ class RecipeTranslator:
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=500,
-                temperature=0.2
+                temperature=0.2,
+                timeout=self.timeout
             )
             
             return response.choices[0].message.content.strip()
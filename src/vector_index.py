@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+인프로세스 메모리 맵 벡터 인덱스
+- recipes.embedding 을 float32 행렬(.npy) + 정렬된 recipe id 배열로 내보냄
+- 내적 한 번으로 top-k 계산 (정규화 벡터이므로 내적 = 코사인 유사도)
+- 선택적 IVF 분할: k-means 중심점으로 리스트를 나누고 쿼리마다 nprobe개 리스트만 스캔
+- 선택적 양자화(int8 / PQ): 코드만 메모리에 두고 근사 점수로 후보를 뽑은 뒤 원본 벡터로 재정렬
+- 스냅샷은 데이터셋 버전별 디렉터리에 저장, 버전이 바뀌면 백그라운드에서 재생성
+- 읽기 전용 mmap이라 여러 uvicorn 워커가 같은 페이지 캐시를 공유
+- Postgres가 원본이며, 스냅샷이 최신이 아니면 호출 측이 Postgres로 검색
+"""
+
+import os
+import json
+import time
+import fcntl
+import shutil
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.quantization import make_quantizer, load_quantizer
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = 'current.json'
+LOCK_FILE = '.build.lock'
+
+
+def parse_vector_text(text: str) -> np.ndarray:
+    """pgvector 텍스트 표현 '[0.1,0.2,...]' → float32 배열"""
+    return np.array(text.strip()[1:-1].split(','), dtype=np.float32)
+
+
+class _Snapshot:
+    """
+    로드된 스냅샷 (생성 후 변경하지 않음, 교체는 참조 대입 한 번으로 원자적)
+
+    검색 한 번은 처음 읽은 스냅샷 객체 하나만 사용해야 중심점/리스트/코드가 섞이지 않는다.
+    """
+
+    __slots__ = ('path', 'meta', 'version', 'ids', 'quantizer', 'vectors', 'codes', 'centroids', 'offsets')
+
+    def __init__(self, path: str, meta: Dict):
+        self.path = path
+        self.meta = meta
+        self.version = meta['version']
+        self.ids = np.load(os.path.join(path, 'ids.npy'), mmap_mode='r')
+        self.quantizer = None
+        self.vectors = None
+        self.codes = None
+        if meta.get('quantization', 'none') != 'none':
+            # 양자화 스냅샷: 코드 + 양자화 파라미터만 (원본 벡터는 Postgres에서 재정렬 시 사용)
+            self.codes = np.load(os.path.join(path, 'codes.npy'), mmap_mode='r')
+            with np.load(os.path.join(path, 'quantizer.npz')) as state:
+                self.quantizer = load_quantizer(meta['quantization'], dict(state))
+        else:
+            self.vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        self.centroids = None
+        self.offsets = None
+        if meta.get('nlist'):
+            self.centroids = np.load(os.path.join(path, 'centroids.npy'))
+            self.offsets = np.load(os.path.join(path, 'offsets.npy'))
+            self.centroids.flags.writeable = False
+            self.offsets.flags.writeable = False
+
+    @property
+    def needs_rerank(self) -> bool:
+        return self.quantizer is not None
+
+    def scores(self, start: int, end: int, query: np.ndarray) -> np.ndarray:
+        """행 구간 [start, end)의 (근사) 내적"""
+        if self.quantizer is not None:
+            return self.quantizer.scores(self.codes[start:end], query)
+        return self.vectors[start:end] @ query
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _kmeans(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """구면 k-means 중심점 (샘플에서 학습)"""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * 256)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = sample[assign == c]
+            # 빈 리스트는 임의 샘플로 다시 시드
+            centroids[c] = members.sum(axis=0) if len(members) else sample[rng.integers(sample_size)]
+        centroids = _normalize(centroids).astype(np.float32)
+    return centroids
+
+
+class MmapVectorIndex:
+    """Postgres 임베딩의 읽기 전용 mmap 스냅샷으로 top-k 검색"""
+
+    def __init__(self, directory: str = 'data/vector_index', nlist: int = 0, nprobe: int = 8,
+                 refresh_interval: float = 5.0, quantization: str = 'none', pq_m: int = 96,
+                 rerank_factor: int = 4):
+        """
+        Args:
+            directory: 스냅샷 저장 디렉터리 (워커들이 공유)
+            nlist: IVF 리스트 수 (0이면 전체 스캔)
+            nprobe: 쿼리마다 스캔할 IVF 리스트 수
+            refresh_interval: 스냅샷 재확인/재생성 시도 최소 간격 (초)
+            quantization: 'none' / 'int8' / 'pq'
+            pq_m: PQ 부분공간 수 (벡터당 바이트 수)
+            rerank_factor: 양자화 시 재정렬할 후보 수 = limit × rerank_factor
+        """
+        self.directory = directory
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self.pq_m = pq_m
+        self.rerank_factor = rerank_factor
+        self.refresh_interval = refresh_interval
+        self._snapshot: Optional[_Snapshot] = None
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._last_refresh = 0.0
+        self._stats = {'searches': 0, 'fallbacks': 0, 'builds': 0, 'loads': 0}
+
+    @classmethod
+    def from_env(cls) -> 'MmapVectorIndex':
+        """환경변수 기반 생성"""
+        return cls(
+            directory=os.getenv('VECTOR_INDEX_DIR', 'data/vector_index'),
+            nlist=int(os.getenv('VECTOR_INDEX_NLIST', '0')),
+            nprobe=int(os.getenv('VECTOR_INDEX_NPROBE', '8')),
+            refresh_interval=float(os.getenv('VECTOR_INDEX_REFRESH_INTERVAL', '5')),
+            quantization=os.getenv('VECTOR_INDEX_QUANTIZATION', 'none').lower(),
+            pq_m=int(os.getenv('VECTOR_INDEX_PQ_M', '96')),
+            rerank_factor=int(os.getenv('VECTOR_INDEX_RERANK_FACTOR', '4'))
+        )
+
+    @property
+    def version(self) -> Optional[int]:
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else None
+
+    @property
+    def needs_rerank(self) -> bool:
+        """양자화 스냅샷이면 search() 결과는 근사 점수 후보 (원본 벡터로 재정렬 필요)"""
+        snapshot = self._snapshot
+        return snapshot is not None and snapshot.needs_rerank
+
+    def is_fresh(self, version: Optional[int]) -> bool:
+        """스냅샷이 현재 데이터셋 버전과 같은지 (버전을 모르면 False → Postgres 사용)"""
+        return version is not None and self.version == version
+
+    def fresh_snapshot(self, version: Optional[int]) -> Optional[_Snapshot]:
+        """
+        현재 데이터셋 버전의 스냅샷 (없거나 오래됐으면 None)
+
+        검색 요청은 이 객체 하나로 needs_rerank 확인과 search(snapshot=...)를 수행해
+        도중에 백그라운드 갱신이 스냅샷을 바꿔도 한 버전만 사용한다.
+        """
+        snapshot = self._snapshot
+        return snapshot if snapshot is not None and version is not None and snapshot.version == version else None
+
+    def load(self) -> bool:
+        """current.json 이 가리키는 스냅샷 로드 (다른 워커가 만든 것 포함)"""
+        current = os.path.join(self.directory, CURRENT_FILE)
+        if not os.path.exists(current):
+            return False
+        try:
+            with open(current, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            loaded = self._snapshot
+            if loaded and loaded.version == meta['version']:
+                return True
+            # 새 스냅샷을 완전히 연 뒤 참조 한 번으로 교체 (진행 중인 검색은 이전 객체를 계속 사용)
+            self._snapshot = _Snapshot(os.path.join(self.directory, meta['snapshot']), meta)
+            self._stats['loads'] += 1
+            logger.info(f"🧭 Vector index snapshot v{meta['version']} loaded "
+                        f"({meta['count']} vectors, {meta['dimensions']}d, nlist={meta.get('nlist', 0)}, "
+                        f"quantization={meta.get('quantization', 'none')})")
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️  Vector index snapshot load failed: {e}")
+            return False
+
+    def build(self, db) -> Optional[Dict]:
+        """
+        Postgres에서 스냅샷 생성 후 current.json 교체 (워커 간 파일 잠금으로 한 번만 실행)
+
+        Returns:
+            생성한 스냅샷 메타데이터 (다른 프로세스가 생성 중이면 None)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_FILE), 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info("⏳ Vector index snapshot is being built by another process")
+                return None
+            try:
+                return self._build_locked(db)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _build_locked(self, db) -> Dict:
+        started = time.perf_counter()
+        with db.embedding_snapshot() as (version, count, chunks):
+            name = f"v{version}-{int(time.time())}"
+            tmp_path = os.path.join(self.directory, f".{name}.tmp")
+            os.makedirs(tmp_path, exist_ok=True)
+
+            ids = np.empty(count, dtype=np.int64)
+            vectors = None
+            row = 0
+            for chunk in chunks:
+                if vectors is None:
+                    dimensions = len(parse_vector_text(chunk[0][1]))
+                    vectors = np.lib.format.open_memmap(
+                        os.path.join(tmp_path, 'vectors.npy'), mode='w+',
+                        dtype=np.float32, shape=(count, dimensions)
+                    )
+                for recipe_id, text in chunk:
+                    if row >= count:
+                        break
+                    ids[row] = recipe_id
+                    vectors[row] = parse_vector_text(text)
+                    row += 1
+            if vectors is None:
+                raise RuntimeError("No embeddings to index")
+
+        # 코사인 유사도 = 내적이 되도록 정규화
+        vectors[:row] = _normalize(vectors[:row])
+        meta = {
+            'version': version,
+            'count': row,
+            'dimensions': int(vectors.shape[1]),
+            'snapshot': name,
+            'nlist': 0,
+            'quantization': 'none',
+            'created_at': time.time()
+        }
+
+        if self.nlist and row >= self.nlist * 39:
+            # IVF: 리스트별로 연속 저장되도록 재배열 (리스트 스캔 = 슬라이스 하나)
+            centroids = _kmeans(vectors[:row], self.nlist)
+            assign = np.concatenate([
+                np.argmax(np.asarray(vectors[i:i + 8192]) @ centroids.T, axis=1)
+                for i in range(0, row, 8192)
+            ])
+            order = np.argsort(assign, kind='stable')
+            vectors[:row] = np.asarray(vectors[:row])[order]
+            ids[:row] = ids[:row][order]
+            offsets = np.searchsorted(assign[order], np.arange(self.nlist + 1))
+            np.save(os.path.join(tmp_path, 'centroids.npy'), centroids)
+            np.save(os.path.join(tmp_path, 'offsets.npy'), offsets.astype(np.int64))
+            meta['nlist'] = self.nlist
+        elif self.nlist:
+            logger.info(f"ℹ️  {row} vectors is too few for nlist={self.nlist}, using flat scan")
+
+        quantizer = make_quantizer(self.quantization, self.pq_m)
+        if quantizer is not None:
+            # 코드만 남기고 float32 행렬은 삭제 (재정렬은 recipes.embedding 사용)
+            quantizer.fit(vectors[:row])
+            np.save(os.path.join(tmp_path, 'codes.npy'), quantizer.encode(vectors[:row]))
+            np.savez(os.path.join(tmp_path, 'quantizer.npz'), **quantizer.state())
+            meta['quantization'] = quantizer.kind
+            meta['bytes_per_vector'] = quantizer.bytes_per_vector(meta['dimensions'])
+            del vectors
+            os.remove(os.path.join(tmp_path, 'vectors.npy'))
+        else:
+            meta['bytes_per_vector'] = meta['dimensions'] * 4
+            vectors.flush()
+            del vectors
+        np.save(os.path.join(tmp_path, 'ids.npy'), ids[:row])
+        with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+        # 디렉터리 이름 변경 → current.json 원자적 교체 순서로 공개
+        final_path = os.path.join(self.directory, name)
+        os.rename(tmp_path, final_path)
+        current_tmp = os.path.join(self.directory, f".{CURRENT_FILE}.tmp")
+        with open(current_tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(current_tmp, os.path.join(self.directory, CURRENT_FILE))
+        self._prune(keep={name})
+        self._stats['builds'] += 1
+
+        logger.info(f"🧭 Vector index snapshot v{version} built: {row} vectors, "
+                    f"nlist={meta['nlist']}, quantization={meta['quantization']} "
+                    f"({meta['bytes_per_vector']} B/vector), {time.perf_counter() - started:.1f}s")
+        return meta
+
+    def _prune(self, keep: set):
+        """이전 스냅샷 정리 (직전 것 하나는 다른 워커가 아직 쓰고 있을 수 있어 유지)"""
+        snapshots = sorted(
+            (d for d in os.listdir(self.directory) if d.startswith('v') and d not in keep),
+            key=lambda d: os.path.getmtime(os.path.join(self.directory, d)),
+            reverse=True
+        )
+        for old in snapshots[1:]:
+            shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+
+    def refresh_async(self, db, version: Optional[int]):
+        """
+        스냅샷이 오래됐으면 백그라운드에서 갱신 (다른 워커가 만든 최신 스냅샷이 있으면 로드만)
+
+        호출 측은 갱신이 끝날 때까지 Postgres로 검색한다.
+        """
+        if version is None:
+            return
+        with self._refresh_lock:
+            now = time.monotonic()
+            if self._refreshing or now - self._last_refresh < self.refresh_interval:
+                return
+            self._refreshing = True
+            self._last_refresh = now
+
+        def run():
+            try:
+                if self.load() and self.is_fresh(version):
+                    return
+                if self.build(db):
+                    self.load()
+            except Exception as e:
+                logger.error(f"❌ Vector index refresh failed: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='vector-index-refresh', daemon=True).start()
+
+    def search(self, query_vector: Sequence[float], limit: int = 10,
+               min_similarity: float = 0.0,
+               snapshot: Optional[_Snapshot] = None) -> Optional[List[Tuple[int, float]]]:
+        """
+        top-k 검색 (양자화 스냅샷이면 근사 점수, needs_rerank 참고)
+
+        Args:
+            snapshot: fresh_snapshot()으로 받은 스냅샷 (None이면 현재 스냅샷)
+
+        Returns:
+            [(recipe_id, similarity), ...] 유사도 내림차순 (스냅샷이 없으면 None)
+        """
+        snapshot = snapshot or self._snapshot
+        if snapshot is None:
+            self._stats['fallbacks'] += 1
+            return None
+
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        if snapshot.centroids is not None:
+            nprobe = min(self.nprobe, len(snapshot.centroids))
+            lists = np.argpartition(snapshot.centroids @ query, -nprobe)[-nprobe:]
+            ranges = [(snapshot.offsets[c], snapshot.offsets[c + 1]) for c in lists]
+            positions = np.concatenate([np.arange(start, end) for start, end in ranges])
+            scores = np.concatenate([snapshot.scores(start, end, query) for start, end in ranges])
+        else:
+            positions = None
+            scores = snapshot.scores(0, len(snapshot.ids), query)
+
+        k = min(limit, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        ids = snapshot.ids[positions[top]] if positions is not None else snapshot.ids[top]
+
+        self._stats['searches'] += 1
+        return [
+            (int(recipe_id), float(score))
+            for recipe_id, score in zip(ids, scores[top])
+            if score >= min_similarity
+        ]
+
+    def stats(self) -> Dict:
+        """인덱스 통계"""
+        snapshot = self._snapshot
+        stats = dict(self._stats)
+        stats.update({
+            'version': snapshot.version if snapshot else None,
+            'count': snapshot.meta['count'] if snapshot else 0,
+            'dimensions': snapshot.meta['dimensions'] if snapshot else None,
+            'nlist': snapshot.meta.get('nlist', 0) if snapshot else 0,
+            'nprobe': self.nprobe,
+            'quantization': snapshot.meta.get('quantization', 'none') if snapshot else self.quantization,
+            'bytes_per_vector': snapshot.meta.get('bytes_per_vector') if snapshot else None,
+            'refreshing': self._refreshing
+        })
+        return stats
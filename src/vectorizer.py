@@ -4,39 +4,96 @@
 레시피 벡터화 모듈
 - OpenAI Embeddings 또는 SentenceTransformers 사용
 - PostgreSQL에 벡터 저장
+- 입력 한도를 넘는 긴 레시피는 조각으로 나눠 임베딩 후 토큰 가중 평균으로 합침
 """
 
 import os
+import asyncio
+import math
+import hashlib
 import logging
 from typing import List, Dict, Optional, Union
-from openai import OpenAI
-import time
+
+from src.openai_clients import OpenAIClientRegistry, get_registry
+from src.embedding_cache import EmbeddingCache
+from src.embedding_engine import EmbeddingEngine
+from src.token_counter import count_tokens, split_by_tokens
 
 logger = logging.getLogger(__name__)
 
+# OpenAI 임베딩 모델 기본 차원 (text-embedding-3 계열만 dimensions 파라미터로 축소 가능)
+OPENAI_EMBEDDING_DIMENSIONS = {
+    'text-embedding-3-small': 1536,
+    'text-embedding-3-large': 3072,
+    'text-embedding-ada-002': 1536
+}
+
+
+def embedding_model_id(model: str, dimensions: int) -> str:
+    """모델 식별자 (캐시 키 / recipes.embedding_model, 기본 차원이 아니면 '모델@차원')"""
+    if dimensions == OPENAI_EMBEDDING_DIMENSIONS.get(model, dimensions):
+        return model
+    return f"{model}@{dimensions}"
+
+
+def configured_embedding_model(use_openai: bool = True) -> str:
+    """설정된 임베딩 모델 (EMBEDDING_MODEL, 비우면 백엔드 기본 모델)"""
+    return os.getenv('EMBEDDING_MODEL') or ('text-embedding-3-small' if use_openai else 'all-MiniLM-L6-v2')
+
 
 class RecipeVectorizer:
     """레시피를 벡터로 변환하는 클래스"""
     
-    def __init__(self, use_openai: bool = True, model_name: Optional[str] = None):
+    def __init__(self, use_openai: bool = True, model_name: Optional[str] = None,
+                 clients: Optional[OpenAIClientRegistry] = None,
+                 query_cache: Optional[EmbeddingCache] = None):
         """
         Args:
             use_openai: True면 OpenAI, False면 SentenceTransformers
             model_name: 사용할 모델 이름 (None이면 기본값)
+            clients: 공유 OpenAI 클라이언트 레지스트리 (None이면 프로세스 공용)
+            query_cache: 검색 쿼리 임베딩 캐시 (None이면 환경변수 설정으로 생성)
         """
         self.use_openai = use_openai
+        self.query_cache = query_cache or EmbeddingCache.from_env()
+        # 마지막 vectorize_batch() 호출의 실패 항목 / 통계
+        self.dead_letters: List[Dict] = []
+        self.batch_stats: Dict = {}
         
         if use_openai:
-            self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-            self.model = model_name or "text-embedding-3-small"
-            self.dimensions = 1536
+            self.registry = clients or get_registry()
+            self.client = self.registry.client(os.getenv('OPENAI_API_KEY'))
+            # 비동기 경로 (FastAPI 핸들러에서 이벤트 루프를 막지 않도록)
+            self.async_client = self.registry.async_client(os.getenv('OPENAI_API_KEY'))
+            self.timeout = self.registry.timeout('embedding')
+            self.model = model_name or configured_embedding_model(True)
+            native_dimensions = OPENAI_EMBEDDING_DIMENSIONS.get(self.model, 1536)
+            self.dimensions = int(os.getenv('EMBEDDING_DIMENSIONS') or native_dimensions)
+            # 축소 차원 요청 (API가 앞쪽 차원을 잘라 재정규화한 벡터를 반환)
+            self.request_dimensions = None
+            if self.dimensions != native_dimensions:
+                if not self.model.startswith('text-embedding-3'):
+                    raise ValueError(f"{self.model} does not support EMBEDDING_DIMENSIONS={self.dimensions}")
+                self.request_dimensions = self.dimensions
+            # 모델 식별자 (캐시 키 / recipes.embedding_model, 차원이 다르면 다른 모델로 취급)
+            self.model_name = embedding_model_id(self.model, self.dimensions)
+            # 모델 입력 한도(8191 토큰)보다 약간 작게 잡아 근사치 오차 흡수
+            self.max_input_tokens = int(os.getenv('EMBEDDING_MAX_INPUT_TOKENS', '8000'))
+            # 대량 임베딩은 첫 배치 호출 시 엔진 생성 (API 서버는 사용하지 않음)
+            self._engine: Optional[EmbeddingEngine] = None
             logger.info(f"🤖 Using OpenAI Embeddings: {self.model}")
         else:
             try:
                 from sentence_transformers import SentenceTransformer
-                self.model = SentenceTransformer(model_name or 'all-MiniLM-L6-v2')
+                self.model_name = model_name or configured_embedding_model(False)
+                self.model = SentenceTransformer(self.model_name)
+                self.request_dimensions = None
                 self.dimensions = self.model.get_sentence_embedding_dimension()
-                logger.info(f"🤖 Using SentenceTransformers: {model_name or 'all-MiniLM-L6-v2'}")
+                configured = os.getenv('EMBEDDING_DIMENSIONS')
+                if configured and int(configured) != self.dimensions:
+                    raise ValueError(f"{self.model_name} produces {self.dimensions}-dimension vectors "
+                                     f"(EMBEDDING_DIMENSIONS={configured})")
+                logger.info(f"🤖 Using SentenceTransformers: {self.model_name}")
             except ImportError:
                 raise ImportError("sentence-transformers not installed. Run: pip install sentence-transformers")
     
@@ -79,6 +136,32 @@ class RecipeVectorizer:
         
         return "\n".join(parts)
     
+    def create_document_text(self, document: Dict) -> str:
+        """
+        JSONB 레시피 문서(recipes.document)로 통합 텍스트 생성
+        
+        Args:
+            document: RecipeDB.get_recipes_by_ids()가 반환하는 문서
+        
+        Returns:
+            통합된 텍스트
+        """
+        return self.create_recipe_text({
+            'title_en': document.get('title_en') or document.get('title'),
+            'description_en': document.get('description_en') or '',
+            'ingredients_en': [i.get('name_en') for i in document.get('ingredients', []) if i.get('name_en')],
+            'cooking_steps_en': [s.get('description_en') for s in document.get('cooking_steps', []) if s.get('description_en')]
+        })
+    
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """임베딩 원문 지문 (recipes.embedding_text_hash, 원문이 바뀌면 재임베딩)"""
+        return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+    
+    def _dimension_params(self) -> Dict:
+        """임베딩 API 차원 파라미터 (모델 기본 차원이면 생략)"""
+        return {'dimensions': self.request_dimensions} if self.request_dimensions else {}
+    
     def vectorize(self, text: str) -> List[float]:
         """
         단일 텍스트를 벡터로 변환
@@ -88,16 +171,21 @@ class RecipeVectorizer:
         
         Returns:
             벡터 (리스트)
+        
+        Raises:
+            ValueError: 빈 텍스트
         """
         if not text or text.strip() == "":
-            logger.warning("Empty text provided for vectorization")
-            return [0.0] * self.dimensions
+            # 영벡터는 코사인 거리가 NaN → 빈 입력은 실패로 처리 (vectorize_batch는 dead letter)
+            raise ValueError("Empty text provided for vectorization")
         
         if self.use_openai:
             try:
                 response = self.client.embeddings.create(
                     model=self.model,
-                    input=text
+                    input=text,
+                    timeout=self.timeout,
+                    **self._dimension_params()
                 )
                 return response.data[0].embedding
             except Exception as e:
@@ -107,54 +195,163 @@ class RecipeVectorizer:
             # SentenceTransformers
             return self.model.encode(text, show_progress_bar=False).tolist()
     
-    def vectorize_batch(self, texts: List[str], batch_size: int = 100, delay: float = 1.0) -> List[List[float]]:
+    async def avectorize(self, text: str) -> List[float]:
+        """
+        단일 텍스트를 비동기로 벡터화 (API 서버용)
+        
+        Args:
+            text: 변환할 텍스트
+        
+        Returns:
+            벡터 (리스트)
+        
+        Raises:
+            ValueError: 빈 텍스트
+        """
+        if not text or text.strip() == "":
+            # 영벡터는 코사인 거리가 NaN → 빈 입력은 실패로 처리 (vectorize_batch는 dead letter)
+            raise ValueError("Empty text provided for vectorization")
+        
+        if self.use_openai:
+            try:
+                response = await self.async_client.embeddings.create(
+                    model=self.model,
+                    input=text,
+                    timeout=self.timeout,
+                    **self._dimension_params()
+                )
+                return response.data[0].embedding
+            except Exception as e:
+                logger.error(f"OpenAI embedding error: {e}")
+                raise
+        else:
+            # 로컬 모델 추론은 CPU 작업이므로 스레드에서 실행
+            embedding = await asyncio.to_thread(self.model.encode, text, show_progress_bar=False)
+            return embedding.tolist()
+    
+    def vectorize_query(self, text: str) -> List[float]:
+        """
+        검색 쿼리 벡터화 (쿼리 임베딩 캐시 사용)
+        
+        Args:
+            text: 검색 쿼리
+        
+        Returns:
+            벡터 (리스트)
+        """
+        cached = self.query_cache.get(text, self.model_name)
+        if cached is not None:
+            return list(cached)
+        vector = self.vectorize(text)
+        self.query_cache.put(text, self.model_name, vector)
+        return vector
+    
+    async def avectorize_query(self, text: str) -> List[float]:
+        """검색 쿼리 비동기 벡터화 (쿼리 임베딩 캐시 사용, 디스크 계층은 스레드에서 접근)"""
+        cached = await self.query_cache.aget(text, self.model_name)
+        if cached is not None:
+            return list(cached)
+        vector = await self.avectorize(text)
+        await self.query_cache.aput(text, self.model_name, vector)
+        return vector
+    
+    @property
+    def engine(self) -> EmbeddingEngine:
+        """멀티 키 동시 임베딩 엔진 (OPENAI_API_KEY ~ OPENAI_API_KEY_10)"""
+        if self._engine is None:
+            self._engine = EmbeddingEngine.from_env(
+                self.model, clients=self.registry, dimensions=self.request_dimensions
+            )
+        return self._engine
+    
+    def split_long_text(self, text: str) -> List[str]:
+        """
+        입력 한도를 넘는 텍스트를 조각으로 분할 (각 조각 앞에 제목 줄 유지)
+        
+        Args:
+            text: create_recipe_text() 결과
+        
+        Returns:
+            조각 리스트 (한도 이하면 [text])
+        """
+        if count_tokens(text, self.model) <= self.max_input_tokens:
+            return [text]
+        header, _, body = text.partition('\n')
+        if not header.startswith('Title:') or not body:
+            return split_by_tokens(text, self.max_input_tokens, self.model)
+        budget = self.max_input_tokens - count_tokens(header, self.model) - 1
+        return [f"{header}\n{chunk}" for chunk in split_by_tokens(body, budget, self.model)]
+    
+    @staticmethod
+    def pool_embeddings(embeddings: List[List[float]], weights: List[int]) -> List[float]:
+        """조각 임베딩의 가중 평균 (L2 정규화, 코사인 거리 기준 유지)"""
+        total = float(sum(weights)) or 1.0
+        pooled = [
+            sum(weight * vector[i] for vector, weight in zip(embeddings, weights)) / total
+            for i in range(len(embeddings[0]))
+        ]
+        norm = math.sqrt(sum(v * v for v in pooled)) or 1.0
+        return [v / norm for v in pooled]
+    
+    def vectorize_batch(self, texts: List[str], batch_size: int = 100) -> List[Optional[List[float]]]:
         """
         여러 텍스트를 배치로 벡터화
         
         Args:
             texts: 변환할 텍스트 리스트
             batch_size: 배치 크기 (OpenAI는 2048까지 가능)
-            delay: 배치 간 딜레이 (초)
         
         Returns:
-            벡터 리스트
+            벡터 리스트 (입력 순서 유지, 실패 항목은 None → self.dead_letters에 원인 기록)
         """
+        self.dead_letters = []
+        self.batch_stats = {}
         if not texts:
             return []
         
-        embeddings = []
-        
-        if self.use_openai:
-            # OpenAI는 배치 처리 지원
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i+batch_size]
-                
-                try:
-                    response = self.client.embeddings.create(
-                        model=self.model,
-                        input=batch
-                    )
-                    batch_embeddings = [item.embedding for item in response.data]
-                    embeddings.extend(batch_embeddings)
-                    
-                    logger.info(f"✅ Vectorized {i+len(batch)}/{len(texts)} recipes")
-                    
-                    # Rate limiting
-                    if i + batch_size < len(texts):
-                        time.sleep(delay)
-                
-                except Exception as e:
-                    logger.error(f"Batch embedding error: {e}")
-                    # 실패한 배치는 개별 처리
-                    for text in batch:
-                        try:
-                            embeddings.append(self.vectorize(text))
-                        except:
-                            embeddings.append([0.0] * self.dimensions)
-        else:
+        if not self.use_openai:
             # SentenceTransformers는 로컬이라 빠름
-            embeddings = self.model.encode(texts, show_progress_bar=True, batch_size=batch_size).tolist()
+            return self.model.encode(texts, show_progress_bar=True, batch_size=batch_size).tolist()
+        
+        # 빈 텍스트는 API에 보내지 않고 바로 dead letter (영벡터를 저장하지 않음)
+        for index, text in enumerate(texts):
+            if not text or not text.strip():
+                self.dead_letters.append({'index': index, 'error': 'empty text'})
+        empty = {d['index'] for d in self.dead_letters}
+        
+        # 긴 레시피는 조각으로 펼침 (owners[i] = 조각 i의 원래 텍스트 위치)
+        pieces, owners = [], []
+        for index, text in enumerate(texts):
+            if index in empty:
+                continue
+            for piece in self.split_long_text(text):
+                pieces.append(piece)
+                owners.append(index)
         
+        # 모든 API 키에 토큰 예산만큼 채운 배치를 분산
+        # (키별 RPM/TPM 버킷, 429는 서버 힌트로 재시도, 입력 오류는 이분 분할로 격리)
+        piece_embeddings = self.engine.embed(pieces, batch_size=batch_size)
+        self.batch_stats = dict(self.engine.run_stats, empty=len(empty))
+        for dead in self.engine.dead_letters:
+            self.dead_letters.append({'index': owners[dead['index']], 'error': dead['error']})
+        
+        grouped: Dict[int, list] = {}
+        for owner, piece, embedding in zip(owners, pieces, piece_embeddings):
+            grouped.setdefault(owner, []).append((piece, embedding))
+        
+        embeddings: List[Optional[List[float]]] = []
+        for index in range(len(texts)):
+            group = grouped.get(index)
+            if not group or any(embedding is None for _, embedding in group):
+                # 실패 항목은 None (DB에는 NULL로 남아 다음 실행에서 재시도)
+                embeddings.append(None)
+            elif len(group) == 1:
+                embeddings.append(group[0][1])
+            else:
+                embeddings.append(self.pool_embeddings(
+                    [embedding for _, embedding in group],
+                    [count_tokens(piece, self.model) for piece, _ in group]
+                ))
         return embeddings
     
     def vectorize_recipe(self, recipe: Dict) -> List[float]:
@@ -168,6 +365,12 @@ class RecipeVectorizer:
             벡터
         """
         text = self.create_recipe_text(recipe)
+        if self.use_openai:
+            # 입력 한도를 넘는 레시피도 처리되도록 배치 경로 사용
+            vector = self.vectorize_batch([text])[0]
+            if vector is None:
+                raise RuntimeError(f"Embedding failed: {self.dead_letters[0]['error']}")
+            return vector
         return self.vectorize(text)
 
 
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""양자화 / mmap 벡터 인덱스 테스트 (Postgres 없이 순수 계산만)"""
+
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+
+from src.quantization import ScalarQuantizer, ProductQuantizer, make_quantizer, load_quantizer
+from src.vector_index import MmapVectorIndex, parse_vector_text
+
+
+def clustered_vectors(count=3000, dimensions=64, clusters=20, seed=0):
+    """군집이 있는 정규화 벡터 (레시피 임베딩처럼 비슷한 것끼리 모임)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions))
+    vectors = centers[rng.integers(0, clusters, count)] + 0.5 * rng.normal(size=(count, dimensions))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def recall(quantizer, vectors, k=10, candidates=10, queries=50):
+    """정확 top-k 중 근사 점수 상위 candidates개 안에 든 비율"""
+    codes = quantizer.encode(vectors)
+    hits = []
+    for query in vectors[:queries]:
+        exact = set(np.argsort(vectors @ query)[-k:])
+        approx = set(np.argsort(quantizer.scores(codes, query))[-candidates:])
+        hits.append(len(exact & approx) / k)
+    return float(np.mean(hits))
+
+
+def test_int8_round_trip_error_within_half_step():
+    vectors = clustered_vectors()
+    quantizer = ScalarQuantizer().fit(vectors)
+    decoded = quantizer.decode(quantizer.encode(vectors))
+    assert np.all(np.abs(decoded - vectors) <= quantizer.scale / 2 + 1e-6)
+
+
+def test_int8_recall():
+    vectors = clustered_vectors()
+    assert recall(ScalarQuantizer().fit(vectors), vectors) >= 0.95
+
+
+def test_pq_recall_after_rerank_window():
+    vectors = clustered_vectors()
+    quantizer = ProductQuantizer(m=16).fit(vectors, iterations=8)
+    # rerank_factor=4: 근사 상위 40개 안에 정확 top-10이 대부분 있어야 재정렬로 복구됨
+    assert recall(quantizer, vectors, candidates=40) >= 0.85
+
+
+@pytest.mark.parametrize('kind', ['int8', 'pq'])
+def test_state_round_trip(kind):
+    vectors = clustered_vectors(count=1000)
+    quantizer = make_quantizer(kind, pq_m=16).fit(vectors)
+    restored = load_quantizer(kind, quantizer.state())
+    codes = quantizer.encode(vectors)
+    np.testing.assert_array_equal(restored.encode(vectors), codes)
+    np.testing.assert_allclose(restored.scores(codes, vectors[0]), quantizer.scores(codes, vectors[0]))
+
+
+def test_unknown_quantization():
+    assert make_quantizer('none') is None
+    with pytest.raises(ValueError):
+        make_quantizer('int4')
+
+
+def test_pq_rejects_indivisible_dimensions():
+    with pytest.raises(ValueError):
+        ProductQuantizer(m=10).fit(clustered_vectors(count=300))
+
+
+def test_parse_vector_text():
+    np.testing.assert_allclose(parse_vector_text('[0.5,-1,2e-3]'), [0.5, -1.0, 0.002])
+
+
+class FakeSnapshotDB:
+    """embedding_snapshot()만 흉내 내는 DB (pgvector 텍스트 표현으로 청크 전달)"""
+
+    def __init__(self, vectors, version=7):
+        self.vectors = vectors
+        self.version = version
+
+    @contextmanager
+    def embedding_snapshot(self, chunk_size=500):
+        rows = [(i + 1, '[' + ','.join(map(str, v)) + ']') for i, v in enumerate(self.vectors)]
+        yield self.version, len(rows), (rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size))
+
+
+@pytest.mark.parametrize('quantization', ['none', 'int8'])
+def test_mmap_index_finds_stored_vector(tmp_path, quantization):
+    vectors = clustered_vectors(count=600)
+    index = MmapVectorIndex(directory=str(tmp_path), quantization=quantization)
+    index.build(FakeSnapshotDB(vectors))
+    assert index.load()
+
+    snapshot = index.fresh_snapshot(7)
+    assert snapshot is not None and index.fresh_snapshot(8) is None
+    assert snapshot.needs_rerank == (quantization != 'none')
+    results = index.search(vectors[41], limit=5, min_similarity=-1.0, snapshot=snapshot)
+    assert results[0][0] == 42
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
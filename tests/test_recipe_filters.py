@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""자연어 요청 → 구조화 필터 추출 테스트"""
+
+import pytest
+
+from src.recipe_detail import extract_recipe_filters
+
+CATEGORIES = ['양식', '한식', '빵', '국/탕', '반찬', '메인반찬']
+
+
+def test_duration_servings_category():
+    assert extract_recipe_filters('국/탕 20분 이내 2인분', CATEGORIES) == {
+        'max_minutes': 20, 'servings': 2, 'category': '국/탕'
+    }
+
+
+def test_hours_and_english():
+    assert extract_recipe_filters('1시간 안에 되는 요리')['max_minutes'] == 60
+    assert extract_recipe_filters('dinner under 30 minutes for 4 servings') == {'max_minutes': 30, 'servings': 4}
+
+
+@pytest.mark.parametrize('text', ['영양식 추천해줘', '빵가루 입힌 요리', '반찬거리 없을까'])
+def test_category_inside_another_word_is_ignored(text):
+    assert 'category' not in extract_recipe_filters(text, CATEGORIES)
+
+
+@pytest.mark.parametrize('text, category', [
+    ('양식으로 추천해줘', '양식'),
+    ('빵 먹고 싶어', '빵'),
+    ('메인반찬이요', '메인반찬'),
+    ('오늘은 한식!', '한식'),
+])
+def test_category_as_word_with_particle(text, category):
+    assert extract_recipe_filters(text, CATEGORIES)['category'] == category
+
+
+def test_no_filters():
+    assert extract_recipe_filters('닭고기 요리', CATEGORIES) == {}
+    assert extract_recipe_filters('', CATEGORIES) == {}
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""검색 결과 캐시 키 / 페이지 커서 테스트"""
+
+import pytest
+
+from src.search_cache import (
+    SearchResultCache, query_fingerprint, search_fingerprint, encode_cursor, decode_cursor
+)
+
+
+def fingerprint(query='닭고기 요리', limit=5, filters=None):
+    key = SearchResultCache.make_key(query_fingerprint(query, 'text-embedding-3-small'), limit, 0.0,
+                                     {'probes': 10, 'ef_search': 40, **(filters or {})})
+    return search_fingerprint(key)
+
+
+def test_cursor_round_trip_keeps_exact_similarity():
+    owner = fingerprint()
+    similarity = 0.8123456789012345
+    assert decode_cursor(encode_cursor(similarity, 42, owner), owner) == (similarity, 42)
+
+
+def test_fingerprint_ignores_limit_only():
+    assert fingerprint(limit=5) == fingerprint(limit=20)
+    assert fingerprint() != fingerprint(query='소고기 요리')
+    assert fingerprint() != fingerprint(filters={'category': '국/탕'})
+
+
+def test_cursor_from_another_search_is_rejected():
+    cursor = encode_cursor(0.7, 42, fingerprint())
+    with pytest.raises(ValueError, match='does not belong'):
+        decode_cursor(cursor, fingerprint(filters={'max_minutes': 20}))
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', '', 'e30'])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor, fingerprint())
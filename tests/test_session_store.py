@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""채팅 세션 저장소 테스트 (version 충돌 시 최신 세션에 변경 재적용)"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from src.session_store import MemorySessionStore, PostgresSessionStore, encode_history, decode_history
+
+
+def add_turn(message):
+    """update()용 변경 함수: 사용자 메시지 한 턴 추가"""
+    return lambda session: (session['history'] + [{'role': 'user', 'content': message}], {'spiciness': 'less'})
+
+
+def contents(session):
+    return [message['content'] for message in session['history']]
+
+
+class FakeSessionDB:
+    """get_chat_session / save_chat_session의 version 비교 동작만 흉내 내는 DB"""
+
+    def __init__(self):
+        self.rows = {}
+        self.saves = 0
+
+    def get_chat_session(self, user_id, idle_seconds=0, cursor=None):
+        return self.rows.get(user_id)
+
+    def save_chat_session(self, user_id, history, prefs, expected_version=0, idle_seconds=0, cursor=None):
+        self.saves += 1
+        current = self.rows.get(user_id)
+        version = current[2] if current else 0
+        if version != expected_version:
+            return None
+        self.rows[user_id] = (history, prefs, version + 1)
+        return version + 1
+
+    def purge_chat_sessions(self, idle_seconds=0, max_sessions=0, cursor=None):
+        return {'expired': 0, 'evicted': 0, 'sessions': len(self.rows), 'bytes': 0}
+
+    @asynccontextmanager
+    async def acquire_async(self):
+        class Cursor:
+            async def run(_, fn, *args, **kwargs):
+                return fn(*args, **kwargs)
+        yield Cursor()
+
+
+def test_history_encoding_round_trip():
+    history = [{'role': 'user', 'content': '닭고기'}, {'role': 'assistant', 'content': '추천: 1번 #12'}]
+    assert encode_history(history) == [['u', '닭고기'], ['a', '추천: 1번 #12']]
+    assert decode_history(encode_history(history)) == history
+
+
+def test_memory_store_reapplies_on_version_conflict():
+    async def run():
+        store = MemorySessionStore()
+        first, second = await store.load('u1'), await store.load('u1')
+        assert first['version'] == second['version'] == 0
+        await store.update('u1', first, add_turn('하나'))
+        saved = await store.update('u1', second, add_turn('둘'))
+        assert contents(saved) == ['하나', '둘'] and saved['version'] == 2
+        assert contents(await store.load('u1')) == ['하나', '둘']
+        assert store.stats()['conflicts'] == 1
+    asyncio.run(run())
+
+
+def test_postgres_store_reloads_and_retries_on_conflict():
+    async def run():
+        db = FakeSessionDB()
+        store = PostgresSessionStore(db, purge_interval=1e9)
+        first, second = await store.load('u1'), await store.load('u1')
+        await store.update('u1', first, add_turn('하나'))
+        saved = await store.update('u1', second, add_turn('둘'))
+        assert contents(saved) == ['하나', '둘'] and saved['version'] == 2
+        assert db.rows['u1'][2] == 2 and db.saves == 3
+        assert store.stats()['conflicts'] == 1
+    asyncio.run(run())
+
+
+def test_postgres_store_gives_up_after_attempts():
+    class AlwaysConflictDB(FakeSessionDB):
+        def save_chat_session(self, *args, **kwargs):
+            self.saves += 1
+            return None
+
+    async def run():
+        db = AlwaysConflictDB()
+        store = PostgresSessionStore(db, purge_interval=1e9)
+        assert await store.update('u1', await store.load('u1'), add_turn('하나'), attempts=3) is None
+        assert db.saves == 3
+        stats = store.stats()
+        assert stats['conflicts'] == 3 and stats['errors'] == 1
+    asyncio.run(run())
@@ -71,6 +71,7 @@ def main():
     
     # 각 레시피 번역
     recipe_success = 0
+    updated_recipe_ids = set()
     for recipe_id, title, description in missing_recipes:
         logger.info(f"\n번역 중 [{recipe_id}]: {title[:50]}...")
         
@@ -93,6 +94,7 @@ def main():
             logger.info(f"✅ [{recipe_id}] {title[:40]}")
             logger.info(f"   EN: {title_en[:60]}")
             recipe_success += 1
+            updated_recipe_ids.add(recipe_id)
             
         except Exception as e:
             logger.error(f"❌ [{recipe_id}] 실패: {e}")
@@ -119,11 +121,20 @@ def main():
             logger.info(f"✅ [{recipe_id}-{step_number}] {description[:40]}")
             logger.info(f"   EN: {step_en[:60]}")
             step_success += 1
+            updated_recipe_ids.add(recipe_id)
             
         except Exception as e:
             logger.error(f"❌ [{recipe_id}-{step_number}] 실패: {e}")
             db.conn.rollback()
     
+    # 번역이 바뀐 레시피의 JSONB 문서 동기화
+    if updated_recipe_ids:
+        db.refresh_recipe_documents(sorted(updated_recipe_ids))
+    
+    # 번역이 바뀌었으므로 검색 결과 캐시 무효화
+    if recipe_success > 0 or step_success > 0:
+        db.bump_dataset_version()
+    
     db.close()
     
     logger.info("\n" + "=" * 60)
@@ -132,6 +143,9 @@ def main():
     logger.info(f"   조리 단계: {step_success}/{len(missing_steps)}개 번역 완료")
     logger.info("=" * 60)
     
+    if updated_recipe_ids:
+        logger.info("ℹ️  바뀐 번역을 임베딩에 반영하려면: python vectorize_recipes.py --incremental")
+    
     if recipe_success > 0 or step_success > 0:
         logger.info("\n✅ 번역이 완료되었습니다!")
 
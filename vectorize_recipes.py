@@ -2,11 +2,20 @@
 # -*- coding: utf-8 -*-
 """
 모든 레시피를 벡터화하고 DB에 저장
+- 서버 사이드 커서로 청크 단위 스트리밍 (문서에 재료/조리 단계 포함)
+- 청크별 배치 임베딩 요청 + UPDATE ... FROM (VALUES ...) 일괄 저장
+- 체크포인트로 중단 지점부터 재개
+- 원문 해시 + 모델명 비교로 바뀐 레시피만 재임베딩 (--incremental)
+- 같은 원문 해시의 임베딩은 API 호출 없이 재사용
 """
 
 import os
+import sys
+import json
+import time
 import logging
 import argparse
+from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 from src.database import RecipeDB
@@ -25,6 +34,72 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 모드별 체크포인트 (일반 실행의 체크포인트가 --incremental 실행 범위를 가리지 않도록 분리)
+CHECKPOINT_FILES = {
+    'missing': 'logs/vectorize_checkpoint.json',
+    'incremental': 'logs/vectorize_checkpoint_incremental.json'
+}
+DEAD_LETTER_FILE = 'logs/vectorize_dead_letters.json'
+# 파이프라인이 읽고 쓰는 recipes 컬럼 → 추가하는 마이그레이션
+REQUIRED_COLUMNS = {
+    'document': 'db/migrations/004_recipe_document.sql',
+    'embedding_text_hash': 'db/migrations/005_embedding_fingerprint.sql',
+    'embedding_model': 'db/migrations/005_embedding_fingerprint.sql'
+}
+
+
+def load_checkpoint(path: str) -> int:
+    """마지막으로 저장 완료된 레시피 id (없으면 0)"""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return int(json.load(f).get('last_id', 0))
+        except (ValueError, OSError):
+            logger.warning(f"⚠️  체크포인트 파일을 읽을 수 없어 처음부터 시작합니다: {path}")
+    return 0
+
+
+def stale_rows(vectorizer: RecipeVectorizer, chunk: list, incremental: bool) -> list:
+    """
+    청크에서 (재)임베딩이 필요한 레시피 선별
+    
+    Returns:
+        [(recipe_id, text, text_hash), ...]
+    """
+    targets = []
+    for recipe_id, _, document, stored_hash, stored_model, has_embedding in chunk:
+        text = vectorizer.create_document_text(document)
+        text_hash = vectorizer.text_hash(text)
+        if incremental and has_embedding and stored_hash == text_hash \
+                and stored_model == vectorizer.model_name:
+            continue
+        targets.append((recipe_id, text, text_hash))
+    return targets
+
+
+def save_dead_letters(path: str, dead_letters: list):
+    """임베딩에 실패한 레시피 기록 (DB에는 NULL로 남음)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dead_letters, f, ensure_ascii=False, indent=2)
+
+
+def clear_checkpoint(path: str):
+    """전체 청크를 끝까지 처리한 뒤 체크포인트 삭제 (다음 실행은 처음부터 NULL/변경 레시피를 다시 찾음)"""
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def save_checkpoint(path: str, last_id: int, processed: int):
+    """청크 커밋 후 체크포인트 기록"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'last_id': last_id,
+            'processed': processed,
+            'updated_at': datetime.now().isoformat()
+        }, f)
+
 
 def main():
     parser = argparse.ArgumentParser(description="레시피 벡터화 파이프라인")
@@ -38,6 +113,22 @@ def main():
         type=str,
         help='직접 지정할 DATABASE_URL (이 인자는 .env 값을 덮어씀)'
     )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=int(os.getenv('VECTORIZATION_CHUNK_SIZE', '500')),
+        help='DB에서 한 번에 가져와 저장할 레시피 수 (기본: 500)'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='임베딩이 없거나 원문 해시/모델이 바뀐 레시피만 재임베딩 (번역 수정 반영)'
+    )
+    parser.add_argument(
+        '--restart',
+        action='store_true',
+        help='체크포인트를 무시하고 처음부터 (중단된 실행을 이어가지 않음)'
+    )
     args = parser.parse_args()
 
     # 추가 env 파일 로드 (Railway 등)
@@ -61,7 +152,7 @@ def main():
     batch_size = int(os.getenv('VECTORIZATION_BATCH_SIZE', '100'))
     
     logger.info(f"Embedding 모델: {'OpenAI' if use_openai else 'SentenceTransformers'}")
-    logger.info(f"Batch size: {batch_size}")
+    logger.info(f"Batch size: {batch_size} / Chunk size: {args.chunk_size}")
     
     # DB 연결
     db_name = os.getenv('DB_NAME', 'recipe_ai_db')
@@ -70,83 +161,163 @@ def main():
     db = RecipeDB(db_name, db_user)
     db.connect()
     
-    # 벡터화되지 않은 레시피 찾기
-    db.cursor.execute("""
-        SELECT id, title, title_en, description_en
-        FROM recipes
-        WHERE embedding IS NULL
-        ORDER BY id
-    """)
-    missing_recipes = db.cursor.fetchall()
+    missing = db.missing_columns('recipes', list(REQUIRED_COLUMNS))
+    if missing:
+        migrations = sorted({REQUIRED_COLUMNS[column] for column in missing})
+        logger.error(f"❌ recipes 컬럼 없음: {', '.join(missing)} → 먼저 적용하세요: {', '.join(migrations)}")
+        db.close()
+        sys.exit(1)
+    
+    # 백필 전 레시피의 JSONB 문서 생성
+    db.refresh_recipe_documents(only_missing=True)
     
-    if not missing_recipes:
+    # 체크포인트 (마지막으로 저장 완료된 id 이후부터, 모드별 파일)
+    checkpoint_file = CHECKPOINT_FILES['incremental' if args.incremental else 'missing']
+    if args.restart and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    after_id = load_checkpoint(checkpoint_file)
+    if after_id:
+        logger.info(f"⏩ 체크포인트에서 재개: id > {after_id}")
+    
+    count_sql = f"""
+        SELECT COUNT(*) FROM recipes
+        WHERE id > %s {"" if args.incremental else "AND embedding IS NULL"}
+    """
+    db.cursor.execute(count_sql, (after_id,))
+    total = db.cursor.fetchone()[0]
+    if not total and after_id:
+        # 이전 실행이 마지막 청크까지 저장한 뒤 체크포인트를 지우기 전에 끝난 경우 → 처음부터 다시 점검
+        logger.info("⏩ 체크포인트 이후 대상이 없어 처음부터 다시 점검합니다")
+        clear_checkpoint(checkpoint_file)
+        after_id = 0
+        db.cursor.execute(count_sql, (after_id,))
+        total = db.cursor.fetchone()[0]
+    
+    if not total:
         logger.info("✅ 모든 레시피가 이미 벡터화되어 있습니다!")
         db.close()
         return
     
-    logger.info(f"🔍 벡터화 대상: {len(missing_recipes)}개 레시피")
+    if args.incremental:
+        logger.info(f"🔍 증분 모드: {total}개 레시피의 원문 해시 점검")
+    else:
+        logger.info(f"🔍 벡터화 대상: {total}개 레시피")
     
     # Vectorizer 초기화
     vectorizer = RecipeVectorizer(use_openai=use_openai)
     
-    # 각 레시피의 재료와 조리 단계를 가져와서 벡터화
     success = 0
     failed = 0
+    reused = 0
+    unchanged = 0
+    dead_letters = []
+    run_stats = {'batches': 0, 'retries': 0, 'splits': 0}
+    aborted = False
+    started = time.perf_counter()
     
-    for recipe_id, title, title_en, description_en in missing_recipes:
+    chunks = db.iter_recipe_documents(
+        chunk_size=args.chunk_size,
+        after_id=after_id,
+        only_missing_embedding=not args.incremental
+    )
+    for chunk in chunks:
+        chunk_started = time.perf_counter()
+        last_id = chunk[-1][0]
         try:
-            # 재료 가져오기
-            db.cursor.execute("""
-                SELECT name_en FROM ingredients WHERE recipe_id = %s
-            """, (recipe_id,))
-            ingredients_en = [row[0] for row in db.cursor.fetchall() if row[0]]
-            
-            # 조리 단계 가져오기
-            db.cursor.execute("""
-                SELECT description_en FROM cooking_steps 
-                WHERE recipe_id = %s 
-                ORDER BY step_number
-            """, (recipe_id,))
-            steps_en = [row[0] for row in db.cursor.fetchall() if row[0]]
+            targets = stale_rows(vectorizer, chunk, args.incremental)
+            unchanged += len(chunk) - len(targets)
             
-            # 레시피 딕셔너리 구성
-            recipe = {
-                'title_en': title_en or title,
-                'description_en': description_en or '',
-                'ingredients_en': ingredients_en,
-                'cooking_steps_en': steps_en
-            }
+            # 같은 원문 해시 + 모델의 기존 임베딩 재사용 (API 호출 없음)
+            copied = db.reuse_embeddings_by_hash(
+                [(recipe_id, text_hash) for recipe_id, _, text_hash in targets],
+                vectorizer.model_name
+            )
+            targets = [t for t in targets if t[0] not in copied]
             
-            # 벡터화
-            embedding = vectorizer.vectorize_recipe(recipe)
+            # 청크 안의 중복 원문은 한 번만 임베딩
+            unique_texts = {}
+            for _, text, text_hash in targets:
+                unique_texts.setdefault(text_hash, text)
+            hashes = list(unique_texts)
+            embeddings = dict(zip(
+                hashes,
+                vectorizer.vectorize_batch([unique_texts[h] for h in hashes], batch_size=batch_size)
+            ))
+            batch_stats = vectorizer.batch_stats
+            for key in run_stats:
+                run_stats[key] += batch_stats.get(key, 0)
             
-            # DB 업데이트
-            db.cursor.execute("""
-                UPDATE recipes
-                SET embedding = %s
-                WHERE id = %s
-            """, (embedding, recipe_id))
+            # 임베딩 실패(None)는 저장하지 않고 dead letter로 기록 (NULL 유지 → 재시도 가능)
+            errors = {hashes[d['index']]: d['error'] for d in vectorizer.dead_letters}
+            rows = []
+            for recipe_id, _, text_hash in targets:
+                if embeddings[text_hash] is None:
+                    dead_letters.append({
+                        'recipe_id': recipe_id,
+                        'error': errors.get(text_hash, 'unknown'),
+                        'failed_at': datetime.now().isoformat()
+                    })
+                else:
+                    rows.append((recipe_id, embeddings[text_hash], text_hash, vectorizer.model_name))
             
-            db.conn.commit()
+            # 청크 단위 일괄 업데이트 (UPDATE ... FROM (VALUES ...))
+            db.update_embeddings(rows)
+            if rows or copied:
+                db.bump_dataset_version()
             
-            success += 1
-            if success % 10 == 0:
-                logger.info(f"✅ 진행: {success}/{len(missing_recipes)}")
+            success += len(rows)
+            reused += len(copied)
+            failed += len(targets) - len(rows)
+            save_checkpoint(checkpoint_file, last_id, success + reused + failed + unchanged)
             
         except Exception as e:
-            logger.error(f"❌ [{recipe_id}] {title[:30]}... 실패: {e}")
-            db.conn.rollback()
-            failed += 1
+            # 다음 청크의 체크포인트가 실패한 청크를 건너뛰지 않도록 여기서 중단 (재실행하면 이 청크부터)
+            logger.error(f"❌ 청크 (id {chunk[0][0]}~{last_id}) 실패, 실행 중단: {e}")
+            failed += len(chunk)
+            dead_letters.extend(
+                {'recipe_id': row[0], 'error': f"chunk failed: {e}", 'failed_at': datetime.now().isoformat()}
+                for row in chunk
+            )
+            aborted = True
+            break
+        
+        elapsed = time.perf_counter() - started
+        done = success + reused + failed + unchanged
+        chunk_rate = len(chunk) / max(time.perf_counter() - chunk_started, 1e-9)
+        logger.info(
+            f"✅ 진행: {done}/{total} "
+            f"(청크 {chunk_rate:.1f}개/초, 누적 {done / max(elapsed, 1e-9):.1f}개/초)"
+        )
     
+    # 끝까지 처리했으면 체크포인트 삭제 (실패해 NULL로 남은 레시피는 다음 실행에서 다시 시도)
+    # 청크 실패로 중단했으면 체크포인트는 실패한 청크 직전에 남겨 다음 실행이 그 청크부터 재개
+    if not aborted:
+        clear_checkpoint(checkpoint_file)
+    elapsed = time.perf_counter() - started
     db.close()
     
+    if dead_letters:
+        save_dead_letters(DEAD_LETTER_FILE, dead_letters)
+    
     logger.info("\n" + "=" * 60)
     logger.info("📊 벡터화 결과:")
-    logger.info(f"   성공: {success}/{len(missing_recipes)}개")
-    logger.info(f"   실패: {failed}개")
+    logger.info(f"   임베딩: {success}개")
+    logger.info(f"   해시 재사용: {reused}개")
+    if args.incremental:
+        logger.info(f"   변경 없음: {unchanged}개")
+    logger.info(f"   실패 (dead letter): {failed}개")
+    logger.info(f"   요청 배치: {run_stats['batches']}개, 재시도: {run_stats['retries']}회, "
+                f"배치 분할: {run_stats['splits']}회")
+    logger.info(f"   처리 속도: {(success + reused + unchanged) / max(elapsed, 1e-9):.1f}개/초 ({elapsed:.1f}초)")
     logger.info("=" * 60)
     
-    if success > 0:
+    if aborted:
+        logger.info(f"ℹ️  청크 실패로 중단했습니다. 다시 실행하면 체크포인트({checkpoint_file})에서 재개합니다.")
+    elif failed > 0:
+        logger.info(f"ℹ️  실패한 레시피는 NULL로 남아 있습니다 ({DEAD_LETTER_FILE}). "
+                    "다음 실행에서 다시 시도됩니다.")
+    
+    if success > 0 or reused > 0:
         logger.info("\n✅ 벡터화 완료!")
         logger.info("\n🔍 이제 다음 명령으로 검색할 수 있습니다:")
         logger.info("   python search_recipes.py 'spicy chicken dish'")
@@ -154,4 +325,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-